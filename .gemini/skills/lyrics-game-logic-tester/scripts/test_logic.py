@@ -7,7 +7,7 @@ sys.path.append(os.path.join(os.getcwd(), "backend"))
 
 try:
     from app.core.utils import mask_text, mask_text_with_blanks
-    from thefuzz import fuzz
+    from rapidfuzz import fuzz
 except ImportError as e:
     print(f"Error: {e}. Make sure to run from project root with PYTHONPATH including 'backend'.")
     sys.exit(1)
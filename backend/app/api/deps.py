@@ -1 +1,7 @@
-# Dependency injection placeholders (e.g., get_db, get_current_user)
+import httpx
+
+from app.core.http import get_client
+
+
+def get_lyrics_client() -> httpx.AsyncClient:
+    return get_client("lyrics")
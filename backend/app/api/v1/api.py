@@ -1,6 +1,7 @@
 from fastapi import APIRouter
 
-from app.api.v1.endpoints import game
+from app.api.v1.endpoints import game, metrics
 
 api_router = APIRouter()
 api_router.include_router(game.router)
+api_router.include_router(metrics.router)
@@ -1,15 +1,41 @@
+import asyncio
 import logging
 import random
-from urllib.parse import quote
+import time
+from collections.abc import AsyncIterator
+from functools import partial
+from typing import Any
 
 import httpx
-from fastapi import APIRouter, HTTPException, Query
-from thefuzz import fuzz
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.responses import StreamingResponse
 
-from app.core.song_picker import get_random_song
+from app.api.deps import get_lyrics_client
+from app.core.config import (
+    LYRICS_FANOUT,
+    QUEUE_CONCURRENCY,
+    REQUEST_DEADLINE,
+    ROUND_BUFFER_ENABLED,
+    ROUND_BUFFER_HIGH_WATERMARK,
+    ROUND_BUFFER_LOW_WATERMARK,
+    ROUND_SOURCE,
+)
+from app.core.deadline import Deadline, is_expired
+from app.core.http import get_client
+from app.core.lyrics import fetch_lyrics, get_lyrics_index
+from app.core.metrics import server_timing, timed
+from app.core.recent_tracks import recent_tracks, track_key
+from app.core.round_buffer import RoundBuffer
+from app.core.round_pack import round_pack
+from app.core.round_store import is_round_id, round_store
+from app.core.scoring import normalize_answer, score_blanks, score_guess
+from app.core.sessions import session_history
+from app.core.song_picker import get_random_song, get_random_songs
 from app.core.security import create_game_token, decode_game_token
-from app.core.utils import mask_text, mask_text_with_blanks
 from app.schemas.game import (
+    BatchGuessItem,
+    BatchGuessRequest,
+    BatchGuessResponse,
     GuessRequest,
     GuessResult,
     NewRoundResponse,
@@ -20,114 +46,177 @@ router = APIRouter(prefix="/game", tags=["game"])
 logger = logging.getLogger(__name__)
 
 
-async def _build_round(
+async def _issue_round_token(state: dict[str, Any], store: bool = True) -> str:
+    if store and round_store is not None:
+        return await round_store.put(state)
+    return create_game_token(state)
+
+
+def _round_not_found() -> HTTPException:
+    return HTTPException(status_code=400, detail="Round not found, expired or already submitted.")
+
+
+async def _load_round_state(game_token: str) -> dict[str, Any]:
+    if is_round_id(game_token):
+        # Unknown, expired and already-submitted rounds are all a cheap miss.
+        # Only a peek: the round is consumed once the guess has been validated.
+        state = await round_store.get(game_token) if round_store is not None else None
+        if state is None:
+            raise _round_not_found()
+        return state
+    try:
+        return decode_game_token(game_token)
+    except Exception:
+        raise HTTPException(status_code=400, detail="Invalid or tampered game token.")
+
+
+async def _consume_round(game_token: str) -> None:
+    if is_round_id(game_token):
+        # A concurrent submit may have taken the round since it was loaded.
+        if round_store is None or await round_store.take(game_token) is None:
+            raise _round_not_found()
+
+
+async def _pick_candidate(
     client: httpx.AsyncClient,
-    mode: str,
-    difficulty: str,
-) -> NewRoundResponse:
-    clean_lyrics = ""
-    artist = ""
-    title = ""
-    album_cover = None
-
-    for _ in range(12):
-        logger.info("Selecting a new track for lyrics lookup.")
-        selection = await get_random_song()
-        artist = selection["artist"]
-        title = selection["title"]
-        album_cover = selection.get("album_cover")
-
-        artist_path = quote(artist, safe="")
-        title_path = quote(title, safe="")
-        url = f"https://api.lyrics.ovh/v1/{artist_path}/{title_path}"
-        for attempt in range(1, 3):
-            logger.info(
-                "Lyrics lookup attempt %s/2 for %s - %s (url=%s).",
-                attempt,
-                artist,
-                title,
-                url,
-            )
-            try:
-                response = await client.get(url)
-            except httpx.HTTPError:
-                logger.warning(
-                    "Lyrics request failed for %s - %s (attempt %s/2).",
-                    artist,
-                    title,
-                    attempt,
-                )
-                continue
-
-            if response.status_code != 200:
-                logger.info(
-                    "Lyrics response status %s for %s - %s (attempt %s/2).",
-                    response.status_code,
-                    artist,
-                    title,
-                    attempt,
-                )
-                continue
-
-            data = response.json()
-            raw_lyrics = data.get("lyrics", "")
-            if not raw_lyrics:
-                logger.info(
-                    "Lyrics response empty for %s - %s (attempt %s/2).",
-                    artist,
-                    title,
-                    attempt,
+    candidates: list[dict[str, Any]] | None = None,
+    deadline: Deadline | None = None,
+    session_id: str | None = None,
+) -> tuple[dict[str, Any], str]:
+    if candidates:
+        selection = candidates.pop()
+    else:
+        logger.debug("Selecting a new track for lyrics lookup.")
+        with timed("song_pick", "single"):
+            selection = await get_random_song(deadline=deadline, session_id=session_id)
+    with timed("lyrics"):
+        lyrics = await fetch_lyrics(
+            client,
+            selection["artist"],
+            selection["title"],
+            deadline=deadline,
+        )
+    return selection, lyrics
+
+
+async def _find_track_with_lyrics(
+    client: httpx.AsyncClient,
+    max_tracks: int = 12,
+    fanout: int = LYRICS_FANOUT,
+    candidates: list[dict[str, Any]] | None = None,
+    deadline: Deadline | None = None,
+    session_id: str | None = None,
+) -> tuple[dict[str, Any], str] | None:
+    """
+    Picks up to `max_tracks` candidates, checking lyrics for `fanout` of them at
+    a time. The first candidate with non-empty lyrics wins; the rest are cancelled.
+    Pre-picked `candidates` (shared across a queue) are consumed before new picks.
+    """
+    pending: set[asyncio.Task[tuple[dict[str, Any], str]]] = set()
+    started = 0
+    fanout = max(1, fanout)
+    try:
+        while True:
+            while len(pending) < fanout and started < max_tracks and not is_expired(deadline):
+                started += 1
+                pending.add(
+                    asyncio.create_task(
+                        _pick_candidate(client, candidates, deadline, session_id)
+                    )
                 )
-                continue
+            if not pending:
+                return None
+            done, pending = await asyncio.wait(
+                pending,
+                timeout=deadline.remaining() if deadline is not None else None,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if not done:
+                return None
+            for task in done:
+                selection, lyrics = task.result()
+                if lyrics:
+                    return selection, lyrics
+    finally:
+        for task in pending:
+            task.cancel()
 
-            # Cleanup: API sometimes returns "Paroles de la chanson..." headers
-            clean_lyrics = raw_lyrics.replace(f"Paroles de la chanson {title}", "").strip()
-            if clean_lyrics:
-                logger.info("Lyrics found for %s - %s.", artist, title)
-                break
-            logger.info("Lyrics cleanup produced empty text for %s - %s.", artist, title)
-        if clean_lyrics:
-            break
 
-    if not clean_lyrics:
+async def _build_round_entry(
+    client: httpx.AsyncClient,
+    mode: str,
+    difficulty: str,
+    candidates: list[dict[str, Any]] | None = None,
+    deadline: Deadline | None = None,
+    session_id: str | None = None,
+    store_round: bool = True,
+) -> tuple[NewRoundResponse, dict[str, Any]]:
+    started = time.perf_counter()
+    candidate = await _find_track_with_lyrics(
+        client,
+        candidates=candidates,
+        deadline=deadline,
+        session_id=session_id,
+    )
+    if candidate is None and is_expired(deadline):
+        logger.error("Round build ran out of time budget.")
+        raise HTTPException(status_code=503, detail="Could not build a round in time.")
+    if candidate is None:
         logger.error("Lyrics provider failed after multiple tracks.")
         raise HTTPException(status_code=503, detail="Could not fetch lyrics provider.")
 
+    selection, clean_lyrics = candidate
+    artist = selection["artist"]
+    title = selection["title"]
+    album_cover = selection.get("album_cover")
+
     blanks_metadata = []
     lyrics_answers = []
-    lyrics_for_round = clean_lyrics
+    with timed("mask", mode):
+        index = await get_lyrics_index(artist, title, clean_lyrics)
 
+        # A different stanza-aligned passage each round, picked from the cached index.
+        start, end = index.choose_passage()
+
+        if mode == "lyrics":
+            mask_ratio = 0.4 if difficulty == "hard" else 0.25
+            masked, blanks_metadata, lyrics_answers = index.mask_with_blanks(
+                mask_ratio=mask_ratio,
+                start=start,
+                end=end,
+            )
+            hint_length = 0
+        else:
+            if difficulty == "hard":
+                masked = index.mask_words(mask_ratio=0.4, start=start, end=end)
+            else:
+                masked = clean_lyrics[start:end]
+            hint_length = len(artist) if mode == "artist" else len(title)
+
+    round_state = {
+        "artist": artist,
+        "title": title,
+        "round_type": mode,
+        "difficulty": difficulty,
+        "lyrics_answers": lyrics_answers,
+    }
+    # Normalized answers are computed once here instead of on every guess. Blanks
+    # are mostly plain lowercase words, so the list is only stored when it differs;
+    # submit normalizes the answers itself when it is missing.
     if mode == "lyrics":
-        if len(lyrics_for_round) > 500:
-            lyrics_for_round = lyrics_for_round[:500].rsplit(" ", 1)[0]
-        mask_ratio = 0.4 if difficulty == "hard" else 0.25
-        masked, blanks_metadata, lyrics_answers = mask_text_with_blanks(
-            lyrics_for_round,
-            mask_ratio=mask_ratio,
-        )
-        hint_length = 0
+        normalized_answers = [normalize_answer(word) for word in lyrics_answers]
+        if normalized_answers != lyrics_answers:
+            round_state["normalized_answers"] = normalized_answers
     else:
-        if difficulty == "hard":
-            masked = mask_text(clean_lyrics, mask_ratio=0.4)
-        else:
-            masked = clean_lyrics
-        hint_length = len(artist) if mode == "artist" else len(title)
-
-    game_token = create_game_token(
-        {
-            "artist": artist,
-            "title": title,
-            "round_type": mode,
-            "difficulty": difficulty,
-            "lyrics_answers": lyrics_answers,
-        }
-    )
+        round_state["normalized_answer"] = normalize_answer(artist if mode == "artist" else title)
+    with timed("sign"):
+        game_token = await _issue_round_token(round_state, store=store_round)
 
     masked_lyrics = masked
-    if mode != "lyrics" and len(masked_lyrics) > 500:
-        masked_lyrics = masked_lyrics[:500] + "..."
+    if mode != "lyrics" and end < len(clean_lyrics):
+        masked_lyrics += "..."
 
-    return NewRoundResponse(
+    round_ = NewRoundResponse(
         game_token=game_token,
         masked_lyrics=masked_lyrics,
         hint_length=hint_length,
@@ -136,61 +225,437 @@ async def _build_round(
         blanks_metadata=blanks_metadata,
         album_cover_url=album_cover,
     )
+    session_history.mark_seen(session_id, selection)
+    elapsed_ms = round((time.perf_counter() - started) * 1000)
+    logger.info(
+        "Round built: %s - %s (%s/%s) in %s ms.",
+        artist,
+        title,
+        mode,
+        difficulty,
+        elapsed_ms,
+        extra={
+            "round": {
+                "artist": artist,
+                "title": title,
+                "mode": mode,
+                "difficulty": difficulty,
+                "blanks": len(blanks_metadata),
+                "duration_ms": elapsed_ms,
+            }
+        },
+    )
+    return round_, selection
+
+
+async def _build_round(
+    client: httpx.AsyncClient,
+    mode: str,
+    difficulty: str,
+    candidates: list[dict[str, Any]] | None = None,
+    deadline: Deadline | None = None,
+    session_id: str | None = None,
+) -> NewRoundResponse:
+    round_, _ = await _build_round_entry(
+        client,
+        mode=mode,
+        difficulty=difficulty,
+        candidates=candidates,
+        deadline=deadline,
+        session_id=session_id,
+    )
+    return round_
+
+
+round_buffer = (
+    RoundBuffer(
+        lambda mode, difficulty: _build_round_entry(
+            get_client("lyrics"),
+            mode=mode,
+            difficulty=difficulty,
+            deadline=Deadline(REQUEST_DEADLINE),
+            # Buffered rounds carry a signed token; a stored round is issued on pop.
+            store_round=False,
+        ),
+        high_watermark=ROUND_BUFFER_HIGH_WATERMARK,
+        low_watermark=ROUND_BUFFER_LOW_WATERMARK,
+    )
+    if ROUND_BUFFER_ENABLED
+    else None
+)
+
+
+def _resolve_round(mode: str, difficulty: str) -> tuple[str, str]:
+    actual_mode = mode if mode != "shuffle" else random.choice(["artist", "track", "lyrics"])
+    actual_difficulty = (
+        difficulty if difficulty != "random" else random.choice(["easy", "hard"])
+    )
+    return actual_mode, actual_difficulty
+
+
+async def _pop_buffered_round(
+    mode: str,
+    difficulty: str,
+    session_id: str | None = None,
+) -> NewRoundResponse | None:
+    if round_buffer is None:
+        return None
+    skip = partial(session_history.has_seen, session_id) if session_id is not None else None
+    entry = round_buffer.pop(mode, difficulty, skip=skip)
+    if entry is None:
+        return None
+    round_, song = entry
+    # The round's TTL starts when it is served, not when it was buffered.
+    round_ = await _store_prebuilt_round(round_)
+    session_history.mark_seen(session_id, song)
+    return round_
+
+
+async def _store_prebuilt_round(round_: NewRoundResponse) -> NewRoundResponse:
+    """
+    Swaps the signed token of a round built ahead of time (buffered or from the
+    round pack) for a fresh round-store ID, so each serve can be submitted once.
+    """
+    if round_store is None:
+        return round_
+    state = decode_game_token(round_.game_token)
+    return round_.model_copy(update={"game_token": await round_store.put(state)})
+
+
+def _require_source(source: str) -> None:
+    if source == "pack" and round_pack is None:
+        raise HTTPException(status_code=503, detail="No round pack is loaded.")
+
+
+async def _pop_pack_round(
+    mode: str,
+    difficulty: str,
+    session_id: str | None = None,
+    served: set[str] | None = None,
+) -> NewRoundResponse | None:
+    """
+    Serves a random pre-built round from the round pack, preferring rounds the
+    session has not seen. Never repeats a song in `served`, and adds the song
+    it serves to it. Never calls an upstream.
+    """
+
+    def repeated(song: dict[str, Any]) -> bool:
+        return served is not None and track_key(song) in served
+
+    def skip(song: dict[str, Any]) -> bool:
+        return repeated(song) or session_history.has_seen(session_id, song)
+
+    with timed("pack"):
+        entry = round_pack.sample(mode, difficulty, skip=skip)
+        if entry is None and session_id is not None:
+            entry = round_pack.sample(mode, difficulty, skip=repeated)
+    if entry is None:
+        return None
+    round_, song = entry
+    if served is not None:
+        served.add(track_key(song))
+    session_history.mark_seen(session_id, song)
+    return await _store_prebuilt_round(round_)
 
 
 @router.get("/new", response_model=NewRoundResponse)
 async def start_new_round(
+    response: Response,
     mode: str = Query("artist", pattern="^(artist|track|lyrics|shuffle)$"),
     difficulty: str = Query("easy", pattern="^(easy|hard|random)$"),
+    session_id: str | None = Query(
+        None,
+        max_length=64,
+        pattern="^[A-Za-z0-9_-]+$",
+        description="Player session; songs it has already seen are not repeated.",
+    ),
+    source: str = Query(
+        ROUND_SOURCE,
+        pattern="^(live|pack)$",
+        description="Build rounds live, or serve them from the precomputed round pack.",
+    ),
+    client: httpx.AsyncClient = Depends(get_lyrics_client),
 ) -> NewRoundResponse:
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        actual_mode = mode if mode != "shuffle" else random.choice(["artist", "track", "lyrics"])
-        actual_difficulty = (
-            difficulty if difficulty != "random" else random.choice(["easy", "hard"])
+    _require_source(source)
+    with server_timing() as timing:
+        actual_mode, actual_difficulty = _resolve_round(mode, difficulty)
+        if source == "pack":
+            round_ = await _pop_pack_round(actual_mode, actual_difficulty, session_id)
+            if round_ is None:
+                raise HTTPException(
+                    status_code=503,
+                    detail="The round pack has no rounds for this mode and difficulty.",
+                )
+        else:
+            round_ = await _pop_buffered_round(actual_mode, actual_difficulty, session_id)
+        if round_ is None:
+            deadline = Deadline(REQUEST_DEADLINE)
+            try:
+                round_ = await asyncio.wait_for(
+                    _build_round(
+                        client,
+                        mode=actual_mode,
+                        difficulty=actual_difficulty,
+                        deadline=deadline,
+                        session_id=session_id,
+                    ),
+                    timeout=deadline.remaining(),
+                )
+            except TimeoutError:
+                logger.error("Round build ran out of time budget.")
+                raise HTTPException(status_code=503, detail="Could not build a round in time.")
+    response.headers["Server-Timing"] = timing.header()
+    return round_
+
+
+async def _iter_round_queue(
+    client: httpx.AsyncClient,
+    count: int,
+    mode: str,
+    difficulty: str,
+    concurrency: int = QUEUE_CONCURRENCY,
+    deadline: Deadline | None = None,
+    session_id: str | None = None,
+    source: str = "live",
+) -> AsyncIterator[NewRoundResponse]:
+    """
+    Yields up to `count` rounds as soon as each is ready, buffered rounds first.
+    New builds are only scheduled when the consumer asks for more, so at most
+    `concurrency` builds run ahead of a slow reader. Stops early once the
+    attempt budget or `deadline` is spent. The "pack" source only reads the round pack.
+    """
+    if source == "pack":
+        # Sampling is with replacement: track this queue's songs so none repeats.
+        served: set[str] = set()
+        for _ in range(count):
+            round_ = await _pop_pack_round(*_resolve_round(mode, difficulty), session_id, served)
+            if round_ is not None:
+                yield round_
+        return
+
+    sent = 0
+    pending: set[asyncio.Task[tuple[NewRoundResponse, dict[str, Any]]]] = set()
+    attempts = 0
+    max_attempts = count * 3
+    concurrency = max(1, concurrency)
+
+    for _ in range(count):
+        buffered = await _pop_buffered_round(*_resolve_round(mode, difficulty), session_id)
+        if buffered is not None:
+            sent += 1
+            yield buffered
+    if sent >= count:
+        return
+
+    # One or two batched listing calls cover the whole queue, fanout included;
+    # rounds fall back to single picks once the shared pool runs dry. Pooled
+    # tracks are only marked recent once served, so leftovers keep the recent
+    # window for songs players actually got.
+    with timed("song_pick", "batch"):
+        candidates = await get_random_songs(
+            (count - sent) * max(1, LYRICS_FANOUT),
+            deadline=deadline,
+            session_id=session_id,
+            mark_recent=False,
         )
-        return await _build_round(
+    pooled = {track_key(song) for song in candidates}
+
+    def schedule() -> None:
+        nonlocal attempts
+        # Never run more builds than are still needed to reach `count`.
+        while (
+            len(pending) < concurrency
+            and sent + len(pending) < count
+            and attempts < max_attempts
+            and not is_expired(deadline)
+        ):
+            attempts += 1
+            round_mode, round_difficulty = _resolve_round(mode, difficulty)
+            pending.add(
+                asyncio.create_task(
+                    _build_round_entry(
+                        client,
+                        mode=round_mode,
+                        difficulty=round_difficulty,
+                        candidates=candidates,
+                        deadline=deadline,
+                        session_id=session_id,
+                    )
+                )
+            )
+
+    try:
+        schedule()
+        while pending and sent < count:
+            done, _ = await asyncio.wait(
+                pending,
+                timeout=deadline.remaining() if deadline is not None else None,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if not done:
+                logger.warning("Queue ran out of time budget with %s/%s rounds.", sent, count)
+                break
+            for task in done:
+                pending.discard(task)
+                try:
+                    round_, song = task.result()
+                except HTTPException:
+                    continue
+                if sent < count:
+                    sent += 1
+                    if track_key(song) in pooled:
+                        recent_tracks.mark(song)
+                    yield round_
+            schedule()
+    finally:
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+
+
+async def _build_round_queue(
+    client: httpx.AsyncClient,
+    count: int,
+    mode: str,
+    difficulty: str,
+    concurrency: int = QUEUE_CONCURRENCY,
+    deadline: Deadline | None = None,
+    session_id: str | None = None,
+    source: str = "live",
+) -> list[NewRoundResponse]:
+    """
+    Builds up to `count` rounds; once `deadline` is spent it returns the rounds
+    finished so far.
+    """
+    return [
+        round_
+        async for round_ in _iter_round_queue(
             client,
-            mode=actual_mode,
-            difficulty=actual_difficulty,
+            count=count,
+            mode=mode,
+            difficulty=difficulty,
+            concurrency=concurrency,
+            deadline=deadline,
+            session_id=session_id,
+            source=source,
         )
+    ]
 
 
 @router.get("/queue", response_model=QueueResponse)
 async def get_round_queue(
+    response: Response,
     count: int = Query(7, ge=5, le=10, description="Number of rounds to enqueue."),
     mode: str = Query("artist", pattern="^(artist|track|lyrics|shuffle)$"),
     difficulty: str = Query("easy", pattern="^(easy|hard|random)$"),
+    session_id: str | None = Query(
+        None,
+        max_length=64,
+        pattern="^[A-Za-z0-9_-]+$",
+        description="Player session; songs it has already seen are not repeated.",
+    ),
+    source: str = Query(
+        ROUND_SOURCE,
+        pattern="^(live|pack)$",
+        description="Build rounds live, or serve them from the precomputed round pack.",
+    ),
+    client: httpx.AsyncClient = Depends(get_lyrics_client),
 ) -> QueueResponse:
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        rounds = []
-        attempts = 0
-        max_attempts = count * 3
-        while len(rounds) < count and attempts < max_attempts:
-            attempts += 1
-            round_mode = mode if mode != "shuffle" else random.choice(
-                ["artist", "track", "lyrics"]
-            )
-            round_difficulty = (
-                difficulty if difficulty != "random" else random.choice(["easy", "hard"])
-            )
-            try:
-                rounds.append(
-                    await _build_round(
-                        client,
-                        mode=round_mode,
-                        difficulty=round_difficulty,
-                    )
-                )
-            except HTTPException:
-                continue
+    _require_source(source)
+    deadline = Deadline(REQUEST_DEADLINE)
+    with server_timing() as timing:
+        rounds = await _build_round_queue(
+            client,
+            count=count,
+            mode=mode,
+            difficulty=difficulty,
+            deadline=deadline,
+            session_id=session_id,
+            source=source,
+        )
+    if not rounds and source == "pack":
+        raise HTTPException(
+            status_code=503,
+            detail="The round pack has no rounds for this mode and difficulty.",
+        )
+    if not rounds and deadline.expired:
+        raise HTTPException(status_code=503, detail="Could not build any rounds in time.")
+    response.headers["Server-Timing"] = timing.header()
     return QueueResponse(rounds=rounds)
 
 
-@router.post("/submit", response_model=GuessResult)
-async def submit_guess(request: GuessRequest) -> GuessResult:
-    # 1. Decrypt the token to get the real answer
+async def _stream_round_queue(
+    client: httpx.AsyncClient,
+    count: int,
+    mode: str,
+    difficulty: str,
+    stream_format: str,
+    session_id: str | None = None,
+    source: str = "live",
+) -> AsyncIterator[str]:
+    sent = 0
+    async for round_ in _iter_round_queue(
+        client,
+        count=count,
+        mode=mode,
+        difficulty=difficulty,
+        deadline=Deadline(REQUEST_DEADLINE),
+        session_id=session_id,
+        source=source,
+    ):
+        sent += 1
+        if stream_format == "sse":
+            yield f"event: round\ndata: {round_.model_dump_json()}\n\n"
+        else:
+            yield round_.model_dump_json() + "\n"
+    if stream_format == "sse":
+        yield f'event: end\ndata: {{"count": {sent}}}\n\n'
+
+
+@router.get("/queue/stream")
+async def stream_round_queue(
+    count: int = Query(7, ge=5, le=10, description="Number of rounds to stream."),
+    mode: str = Query("artist", pattern="^(artist|track|lyrics|shuffle)$"),
+    difficulty: str = Query("easy", pattern="^(easy|hard|random)$"),
+    stream_format: str = Query("ndjson", alias="format", pattern="^(ndjson|sse)$"),
+    session_id: str | None = Query(
+        None,
+        max_length=64,
+        pattern="^[A-Za-z0-9_-]+$",
+        description="Player session; songs it has already seen are not repeated.",
+    ),
+    source: str = Query(
+        ROUND_SOURCE,
+        pattern="^(live|pack)$",
+        description="Build rounds live, or serve them from the precomputed round pack.",
+    ),
+    client: httpx.AsyncClient = Depends(get_lyrics_client),
+) -> StreamingResponse:
+    """
+    Streams each NewRoundResponse as soon as it is built, as NDJSON lines or
+    Server-Sent Events. Rounds are only built as fast as the client reads them.
+    """
+    _require_source(source)
+    media_type = "text/event-stream" if stream_format == "sse" else "application/x-ndjson"
+    return StreamingResponse(
+        _stream_round_queue(client, count, mode, difficulty, stream_format, session_id, source),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache"},
+    )
+
+
+async def _score_submission(request: GuessRequest) -> GuessResult:
+    # 1. Decrypt the token (or look up the stored round) to get the real answer
+    data = await _load_round_state(request.game_token)
+    result = _grade_submission(request, data)
+    # 2. Only a valid submission uses up a stored round
+    await _consume_round(request.game_token)
+    return result
+
+
+def _grade_submission(request: GuessRequest, data: dict[str, Any]) -> GuessResult:
     try:
-        data = decode_game_token(request.game_token)
         correct_artist = data["artist"]
         correct_title = data["title"]
         round_type = data.get("round_type", "artist")
@@ -215,7 +680,8 @@ async def submit_guess(request: GuessRequest) -> GuessResult:
             raise HTTPException(status_code=400, detail="Guess must be a string.")
 
         correct_answer = correct_artist if round_type == "artist" else correct_title
-        score = fuzz.ratio(guess.lower(), correct_answer.lower())
+        normalized_answer = data.get("normalized_answer") or normalize_answer(correct_answer)
+        score = score_guess(guess, normalized_answer)
         is_correct = score > 80  # 80% similarity threshold
 
         if is_correct:
@@ -244,11 +710,10 @@ async def submit_guess(request: GuessRequest) -> GuessResult:
                 detail="Guess count does not match blanks count.",
             )
 
-        matches = sum(
-            1
-            for guess, answer in zip(guesses, answers)
-            if guess.lower() == answer.lower()
-        )
+        normalized_answers = data.get("normalized_answers") or [
+            normalize_answer(answer) for answer in answers
+        ]
+        matches = sum(score_blanks(guesses, normalized_answers))
         score = int((matches / len(answers)) * 100)
         is_correct = score == 100
         correct_words = answers
@@ -269,3 +734,20 @@ async def submit_guess(request: GuessRequest) -> GuessResult:
         round_type=round_type,
         correct_words=correct_words,
     )
+
+
+@router.post("/submit", response_model=GuessResult)
+async def submit_guess(request: GuessRequest) -> GuessResult:
+    return await _score_submission(request)
+
+
+@router.post("/submit/batch", response_model=BatchGuessResponse)
+async def submit_guess_batch(request: BatchGuessRequest) -> BatchGuessResponse:
+    # One invocation for a whole queue; a bad guess only fails its own item.
+    results = []
+    for guess in request.guesses:
+        try:
+            results.append(BatchGuessItem(result=await _score_submission(guess)))
+        except HTTPException as exc:
+            results.append(BatchGuessItem(error=exc.detail))
+    return BatchGuessResponse(results=results)
@@ -0,0 +1,69 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app.core import deezer, itunes, song_picker
+from app.core.health import CLOSED, HALF_OPEN, OPEN
+from app.core.metrics import CallbackMetric, register, render_metrics
+
+router = APIRouter(tags=["metrics"])
+
+_CIRCUIT_STATES = (CLOSED, HALF_OPEN, OPEN)
+
+
+def _circuit_states() -> dict[tuple[str, str], float]:
+    health = {**song_picker.get_health_stats(), **deezer.get_health_stats()}
+    return {
+        (source, state): float(snapshot["state"] == state)
+        for source, snapshot in health.items()
+        for state in _CIRCUIT_STATES
+    }
+
+
+register(
+    CallbackMetric(
+        "deezer_catalog_cache_total",
+        "Deezer listing cache lookups by result.",
+        "counter",
+        ("result",),
+        lambda: {
+            (result,): value
+            for result, value in deezer.get_cache_stats().items()
+            if result in ("hits", "stale_hits", "misses", "refreshes")
+        },
+    )
+)
+register(
+    CallbackMetric(
+        "upstream_requests_total",
+        "Upstream catalog requests, and how many were coalesced onto one in flight.",
+        "counter",
+        ("upstream", "kind"),
+        lambda: {
+            (upstream, kind): stats[kind]
+            for upstream, stats in (
+                ("deezer", deezer.get_request_stats()),
+                ("itunes", itunes.get_request_stats()),
+            )
+            for kind in ("calls", "coalesced")
+        },
+    )
+)
+register(
+    CallbackMetric(
+        "circuit_state",
+        "1 for the current breaker state of each song source.",
+        "gauge",
+        ("source", "state"),
+        _circuit_states,
+    )
+)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def get_metrics() -> PlainTextResponse:
+    """
+    Prometheus text exposition of round-building timings and counters.
+    Async so rendering runs on the event loop, which is the only writer of the
+    metric and cache dicts it reads; a threadpool handler could race them.
+    """
+    return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
@@ -0,0 +1,20 @@
+import sys
+from array import array
+
+# Binary files (song catalog, round pack, stored lyrics indexes) are little-endian
+# on every host; these convert arrays to and from that layout.
+
+
+def to_little_endian(values: array) -> bytes:
+    if sys.byteorder != "little":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def from_little_endian(typecode: str, data: bytes | memoryview) -> array:
+    values = array(typecode)
+    values.frombytes(data)
+    if sys.byteorder != "little":
+        values.byteswap()
+    return values
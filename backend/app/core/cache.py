@@ -0,0 +1,94 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _Entry:
+    value: Any
+    fresh_until: float
+    stale_until: float
+
+
+class TTLCache:
+    """
+    Size-bounded LRU cache with per-entry TTLs and stale-while-revalidate.
+    Expired entries are still served for `stale_ttl` seconds while a single
+    background task reloads them.
+    """
+
+    def __init__(self, name: str, max_entries: int, stale_ttl: float):
+        self.name = name
+        self.max_entries = max_entries
+        self.stale_ttl = stale_ttl
+        self._entries: OrderedDict[str, _Entry] = OrderedDict()
+        self._refreshing: dict[str, asyncio.Task] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+
+    def _store(self, key: str, value: Any, ttl: float) -> None:
+        now = time.monotonic()
+        self._entries[key] = _Entry(value, now + ttl, now + ttl + self.stale_ttl)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def _refresh(
+        self,
+        key: str,
+        ttl: float,
+        loader: Callable[[], Awaitable[Any | None]],
+    ) -> None:
+        try:
+            value = await loader()
+            if value is not None:
+                self._store(key, value, ttl)
+        except Exception:
+            logger.exception("%s cache refresh failed for %s", self.name, key)
+        finally:
+            self._refreshing.pop(key, None)
+
+    async def get_or_load(
+        self,
+        key: str,
+        ttl: float,
+        loader: Callable[[], Awaitable[Any | None]],
+    ) -> Any | None:
+        entry = self._entries.get(key)
+        now = time.monotonic()
+        if entry is not None and now < entry.stale_until:
+            self._entries.move_to_end(key)
+            if now < entry.fresh_until:
+                self.hits += 1
+            else:
+                self.stale_hits += 1
+                if key not in self._refreshing:
+                    self.refreshes += 1
+                    self._refreshing[key] = asyncio.create_task(self._refresh(key, ttl, loader))
+            return entry.value
+
+        self.misses += 1
+        value = await loader()
+        if value is not None:
+            self._store(key, value, ttl)
+        return value
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+        }
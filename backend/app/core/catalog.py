@@ -0,0 +1,245 @@
+import hashlib
+import logging
+import mmap
+import os
+import random
+import struct
+import sys
+import tempfile
+from array import array
+from bisect import bisect_left
+from collections.abc import Callable
+from typing import Any
+
+from app.core.byteorder import from_little_endian, to_little_endian
+from app.core.config import SONG_CATALOG_PATH, SONG_DATABASE
+from app.core.recent_tracks import track_key
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b"LGSC"
+_FORMAT_VERSION = 1
+# magic, version, tracks, strings, string bytes, lyrics bytes
+_HEADER = struct.Struct("<4sBIIII")
+# artist, title and cover string IDs, then lyrics offset and length (bytes)
+_TRACK_FIELDS = 5
+_NO_COVER = 0xFFFFFFFF
+_ALIGNMENT = 8
+
+
+def _key_hash(song: dict[str, Any]) -> int:
+    digest = hashlib.blake2b(track_key(song).encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "little")
+
+
+def _padding(size: int) -> bytes:
+    return bytes(-size % _ALIGNMENT)
+
+
+def write_catalog(path: str, entries: list[tuple[dict[str, Any], str]]) -> int:
+    """
+    Writes (song, lyrics) pairs as a catalog file, atomically replacing `path`.
+    Duplicate tracks keep their first entry. Returns the number of tracks written.
+    """
+    strings: dict[str, int] = {}
+
+    def intern(value: str) -> int:
+        if value not in strings:
+            strings[value] = len(strings)
+        return strings[value]
+
+    tracks = array("I")
+    hashes: list[tuple[int, int]] = []
+    seen: set[str] = set()
+    lyrics_blob = bytearray()
+    for song, lyrics in entries:
+        key = track_key(song)
+        if key in seen or not lyrics:
+            continue
+        seen.add(key)
+        encoded = lyrics.encode()
+        cover = song.get("album_cover")
+        tracks.extend(
+            (
+                intern(song["artist"]),
+                intern(song["title"]),
+                intern(cover) if cover else _NO_COVER,
+                len(lyrics_blob),
+                len(encoded),
+            )
+        )
+        hashes.append((_key_hash(song), len(hashes)))
+        lyrics_blob += encoded
+
+    string_offsets = array("I", [0])
+    string_blob = bytearray()
+    for value in strings:
+        string_blob += value.encode()
+        string_offsets.append(len(string_blob))
+    hashes.sort()
+    sorted_hashes = array("Q", (key_hash for key_hash, _ in hashes))
+    sorted_rows = array("I", (row for _, row in hashes))
+
+    sections = [
+        _HEADER.pack(
+            _MAGIC,
+            _FORMAT_VERSION,
+            len(hashes),
+            len(strings),
+            len(string_blob),
+            len(lyrics_blob),
+        ),
+        to_little_endian(string_offsets),
+        to_little_endian(tracks),
+        to_little_endian(sorted_hashes),
+        to_little_endian(sorted_rows),
+        bytes(string_blob),
+        bytes(lyrics_blob),
+    ]
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile("wb", dir=directory, delete=False) as handle:
+        for section in sections:
+            handle.write(section)
+            handle.write(_padding(len(section)))
+    os.replace(handle.name, path)
+    return len(hashes)
+
+
+class SongCatalog:
+    """
+    Read-only view of a catalog file built by tools/build_catalog.py. The file is
+    memory-mapped and its tables are read in place, so opening it costs a header
+    parse regardless of size. Tracks are rows of interned string IDs plus the
+    offset and length of their lyrics; a sorted table of track-key hashes finds
+    a track by artist and title.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as handle:
+            self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._load()
+        except ValueError:
+            self.close()
+            raise
+
+    def _load(self) -> None:
+        view = memoryview(self._mmap)
+        self._view = view
+        if len(view) < _HEADER.size:
+            raise ValueError(f"Truncated song catalog: {self.path}")
+        magic, version, track_count, string_count, string_bytes, lyrics_bytes = (
+            _HEADER.unpack_from(view)
+        )
+        if magic != _MAGIC or version != _FORMAT_VERSION:
+            raise ValueError(f"Not a version {_FORMAT_VERSION} song catalog: {self.path}")
+        self._offset = _HEADER.size + len(_padding(_HEADER.size))
+        self._string_offsets = self._table("I", string_count + 1)
+        self._tracks = self._table("I", track_count * _TRACK_FIELDS)
+        self._hashes = self._table("Q", track_count)
+        self._rows = self._table("I", track_count)
+        self._strings = self._bytes(string_bytes)
+        self._lyrics = self._bytes(lyrics_bytes)
+        if self._offset > len(view):
+            raise ValueError(f"Truncated song catalog: {self.path}")
+        self._count = track_count
+
+    def _bytes(self, size: int) -> memoryview:
+        section = self._view[self._offset : self._offset + size]
+        self._offset += size + len(_padding(size))
+        return section
+
+    def _table(self, typecode: str, count: int) -> memoryview | array:
+        section = self._bytes(count * array(typecode).itemsize)
+        if sys.byteorder == "little":
+            return section.cast(typecode)
+        return from_little_endian(typecode, section)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _string(self, string_id: int) -> str:
+        start = self._string_offsets[string_id]
+        return str(self._strings[start : self._string_offsets[string_id + 1]], "utf-8")
+
+    def song(self, track_id: int) -> dict[str, Any]:
+        row = track_id * _TRACK_FIELDS
+        cover_id = self._tracks[row + 2]
+        return {
+            "artist": self._string(self._tracks[row]),
+            "title": self._string(self._tracks[row + 1]),
+            "album_cover": self._string(cover_id) if cover_id != _NO_COVER else None,
+        }
+
+    def lyrics(self, track_id: int) -> str:
+        row = track_id * _TRACK_FIELDS
+        start = self._tracks[row + 3]
+        return str(self._lyrics[start : start + self._tracks[row + 4]], "utf-8")
+
+    def find(self, artist: str, title: str) -> int | None:
+        song = {"artist": artist, "title": title}
+        key_hash = _key_hash(song)
+        key = track_key(song)
+        position = bisect_left(self._hashes, key_hash)
+        while position < self._count and self._hashes[position] == key_hash:
+            track_id = self._rows[position]
+            if track_key(self.song(track_id)) == key:
+                return track_id
+            position += 1
+        return None
+
+    def get_lyrics(self, artist: str, title: str) -> str | None:
+        track_id = self.find(artist, title)
+        return self.lyrics(track_id) if track_id is not None else None
+
+    def sample(
+        self,
+        exclude: Callable[[dict[str, Any]], bool] | None = None,
+        attempts: int = 32,
+    ) -> dict[str, Any] | None:
+        """
+        Returns a random track `exclude` does not reject, trying up to `attempts` rows.
+        """
+        if not self._count:
+            return None
+        for _ in range(attempts):
+            song = self.song(random.randrange(self._count))
+            if exclude is None or not exclude(song):
+                return song
+        return None
+
+    def close(self) -> None:
+        for name in ("_string_offsets", "_tracks", "_hashes", "_rows", "_strings", "_lyrics", "_view"):
+            section = getattr(self, name, None)
+            if isinstance(section, memoryview):
+                section.release()
+        self._mmap.close()
+
+
+def load_song_catalog(path: str = SONG_CATALOG_PATH) -> SongCatalog | None:
+    if not os.path.exists(path):
+        logger.info("No song catalog at %s; fallback picks use SONG_DATABASE.", path)
+        return None
+    try:
+        catalog = SongCatalog(path)
+    except (OSError, ValueError) as exc:
+        logger.warning("Song catalog unusable at %s (%s); using SONG_DATABASE.", path, exc)
+        return None
+    logger.info("Song catalog loaded: %s tracks from %s", len(catalog), path)
+    return catalog
+
+
+song_catalog = load_song_catalog()
+
+
+def pick_fallback_song(exclude: Callable[[dict[str, Any]], bool]) -> dict[str, Any]:
+    """
+    Picks a fallback track `exclude` does not reject: from the song catalog when
+    one is loaded, else SONG_DATABASE. Picks an excluded one if nothing else is left.
+    """
+    if song_catalog is not None and len(song_catalog):
+        return song_catalog.sample(exclude) or song_catalog.sample()
+    pool = [song for song in SONG_DATABASE if not exclude(song)]
+    return random.choice(pool or SONG_DATABASE)
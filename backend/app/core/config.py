@@ -4,6 +4,113 @@ import os
 # e.g., SECRET_KEY = os.getenv("SECRET_KEY", "fallback_dev_key")
 SECRET_KEY = os.getenv("SECRET_KEY", "super_secret_game_key_for_signing_tokens")
 
+# End-to-end time budget per request, kept under the 30s Lambda timeout
+REQUEST_DEADLINE = float(os.getenv("REQUEST_DEADLINE", "25.0"))
+
+# Shared upstream HTTP clients (one pool per provider host group)
+HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10.0"))
+HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "20"))
+HTTP_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("HTTP_MAX_KEEPALIVE_CONNECTIONS", "10"))
+HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "60.0"))
+HTTP2_ENABLED = os.getenv("HTTP2_ENABLED", "1") == "1"
+
+# Adaptive source weighting: rolling success rate / latency per provider and fetcher,
+# with a circuit breaker that opens after consecutive failures and half-opens to probe.
+HEALTH_EWMA_ALPHA = float(os.getenv("HEALTH_EWMA_ALPHA", "0.2"))
+HEALTH_LATENCY_SCALE = float(os.getenv("HEALTH_LATENCY_SCALE", "1.0"))
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv("CIRCUIT_FAILURE_THRESHOLD", "5"))
+CIRCUIT_RESET_TIMEOUT = float(os.getenv("CIRCUIT_RESET_TIMEOUT", "30.0"))
+
+# Hedged song picks: start a second provider if the first has not answered in time
+SONG_PICKER_HEDGED = os.getenv("SONG_PICKER_HEDGED", "1") == "1"
+SONG_PICKER_HEDGE_DELAY = float(os.getenv("SONG_PICKER_HEDGE_DELAY", "1.0"))
+
+# Deezer catalog listing cache
+DEEZER_CACHE_MAX_ENTRIES = int(os.getenv("DEEZER_CACHE_MAX_ENTRIES", "512"))
+DEEZER_CACHE_STALE_TTL = float(os.getenv("DEEZER_CACHE_STALE_TTL", "3600"))
+
+# Lyrics cache: in-memory LRU in front of a SQLite file. /tmp is the only writable
+# path on Lambda; a pre-warmed copy shipped at LYRICS_SEED_DB_PATH seeds it on cold start.
+LYRICS_DB_PATH = os.getenv("LYRICS_DB_PATH", "/tmp/lyrics-cache.sqlite3")
+LYRICS_SEED_DB_PATH = os.getenv(
+    "LYRICS_SEED_DB_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "lyrics-seed.sqlite3"),
+)
+LYRICS_MEMORY_ENTRIES = int(os.getenv("LYRICS_MEMORY_ENTRIES", "1024"))
+LYRICS_TTL = float(os.getenv("LYRICS_TTL", str(30 * 24 * 3600)))
+LYRICS_NEGATIVE_TTL = float(os.getenv("LYRICS_NEGATIVE_TTL", str(6 * 3600)))
+
+# Number of candidate tracks picked and checked for lyrics concurrently per round
+LYRICS_FANOUT = int(os.getenv("LYRICS_FANOUT", "3"))
+
+# Lyrics shown per round: a passage of whole lines up to this many characters,
+# holding at least this many blank-eligible words when the song allows it
+LYRICS_PASSAGE_MAX_CHARS = int(os.getenv("LYRICS_PASSAGE_MAX_CHARS", "500"))
+LYRICS_PASSAGE_MIN_WORDS = int(os.getenv("LYRICS_PASSAGE_MIN_WORDS", "8"))
+
+# Pre-built round buffer per (mode, difficulty): refilled up to the high watermark
+# whenever a pop leaves it at or below the low watermark.
+ROUND_BUFFER_ENABLED = os.getenv("ROUND_BUFFER_ENABLED", "1") == "1"
+ROUND_BUFFER_HIGH_WATERMARK = int(os.getenv("ROUND_BUFFER_HIGH_WATERMARK", "3"))
+ROUND_BUFFER_LOW_WATERMARK = int(os.getenv("ROUND_BUFFER_LOW_WATERMARK", "1"))
+
+# Where round answers live: "token" (signed into the client token), or a server-side
+# round store ("memory", or "sqlite" to share rounds across local workers) that hands
+# the client a short opaque round ID instead.
+ROUND_STORE_BACKEND = os.getenv("ROUND_STORE_BACKEND", "token")
+ROUND_STORE_DB_PATH = os.getenv("ROUND_STORE_DB_PATH", "/tmp/round-store.sqlite3")
+ROUND_STORE_MAX_ROUNDS = int(os.getenv("ROUND_STORE_MAX_ROUNDS", "50000"))
+ROUND_STORE_TTL = float(os.getenv("ROUND_STORE_TTL", "3600"))
+
+# Per-blank fuzzy matching for lyrics rounds: minimum similarity (0-100) for a blank
+# to count as correct after normalization. 0 keeps exact matching.
+LYRICS_BLANK_FUZZY_THRESHOLD = int(os.getenv("LYRICS_BLANK_FUZZY_THRESHOLD", "0"))
+
+# Recent-track window shared by the song pickers: a rotating Bloom filter remembering
+# roughly the last RECENT_TRACKS_WINDOW picks, in-process ("memory") or in a local
+# SQLite file shared by every worker on the host ("sqlite"). Keep the window below
+# the 50-100 track listings it filters, or whole listings read as recent.
+RECENT_TRACKS_BACKEND = os.getenv("RECENT_TRACKS_BACKEND", "memory")
+RECENT_TRACKS_DB_PATH = os.getenv("RECENT_TRACKS_DB_PATH", "/tmp/recent-tracks.sqlite3")
+RECENT_TRACKS_WINDOW = int(os.getenv("RECENT_TRACKS_WINDOW", "50"))
+RECENT_TRACKS_FALSE_POSITIVE_RATE = float(os.getenv("RECENT_TRACKS_FALSE_POSITIVE_RATE", "0.01"))
+RECENT_TRACKS_GENERATIONS = int(os.getenv("RECENT_TRACKS_GENERATIONS", "4"))
+
+# Per-player no-repeat history for requests carrying a session_id: the last
+# SESSION_MAX_SEEN songs per session (4 bytes each), kept SESSION_TTL seconds after
+# last use, for at most SESSION_MAX_SESSIONS sessions per process
+SESSION_MAX_SESSIONS = int(os.getenv("SESSION_MAX_SESSIONS", "10000"))
+SESSION_MAX_SEEN = int(os.getenv("SESSION_MAX_SEEN", "500"))
+SESSION_TTL = float(os.getenv("SESSION_TTL", str(6 * 3600)))
+
+# Precomputed round packs built by tools/build_round_pack.py. Requests with
+# source=pack are served from the pack with no upstream calls; ROUND_SOURCE sets the
+# default source ("live" or "pack"), e.g. to move all traffic onto a pack for an event.
+ROUND_PACK_PATH = os.getenv(
+    "ROUND_PACK_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "round-pack.bin"),
+)
+ROUND_SOURCE = os.getenv("ROUND_SOURCE", "live")
+
+# Maximum number of rounds built in parallel by /game/queue
+QUEUE_CONCURRENCY = int(os.getenv("QUEUE_CONCURRENCY", "4"))
+
+# Logging: "json" (one object per line) or "text"; records are written off the event
+# loop, except under Lambda, where a frozen sandbox would strand queued records.
+# DEBUG per-attempt lines are kept for this fraction of requests when enabled.
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json")
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "0.01"))
+RUNNING_IN_LAMBDA = bool(os.getenv("AWS_LAMBDA_FUNCTION_NAME"))
+
+# Pre-validated song catalog built by tools/build_catalog.py: memory-mapped at startup
+# and sampled for fallback picks, with its lyrics served locally. SONG_DATABASE below
+# stands in when the file is missing.
+SONG_CATALOG_PATH = os.getenv(
+    "SONG_CATALOG_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(__file__)), "data", "song-catalog.bin"),
+)
+
 # Hardcoded list to ensure valid Artist/Title pairs for Lyrics.ovh
 SONG_DATABASE = [
     {"artist": "Ed Sheeran", "title": "Shape of You"},
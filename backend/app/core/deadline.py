@@ -0,0 +1,32 @@
+import time
+
+from app.core.config import HTTP_TIMEOUT
+
+
+class Deadline:
+    """
+    Absolute time budget for one request, created at the endpoint and handed
+    down to every layer it reaches so retries and per-call timeouts shrink as
+    the budget is spent.
+    """
+
+    def __init__(self, budget: float):
+        self.budget = budget
+        self.expires_at = time.monotonic() + budget
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+
+def is_expired(deadline: Deadline | None) -> bool:
+    return deadline is not None and deadline.expired
+
+
+def timeout_for(deadline: Deadline | None, cap: float = HTTP_TIMEOUT) -> float:
+    if deadline is None:
+        return cap
+    return min(cap, deadline.remaining())
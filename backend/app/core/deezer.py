@@ -1,20 +1,77 @@
+import asyncio
 import logging
 import random
-from collections import deque
+from collections.abc import Awaitable, Callable
 from typing import Any
 
 import httpx
 
-from app.core.config import SONG_DATABASE
-
-_RECENT_TRACKS_MAX = 50
-_recent_track_keys: deque[str] = deque()
-_recent_track_set: set[str] = set()
+from app.core.cache import TTLCache
+from app.core.catalog import pick_fallback_song
+from app.core.config import DEEZER_CACHE_MAX_ENTRIES, DEEZER_CACHE_STALE_TTL
+from app.core.deadline import Deadline, is_expired, timeout_for
+from app.core.health import SourceHealth, choose_weighted
+from app.core.http import get_client
+from app.core.metrics import fallbacks, retries, timed
+from app.core.recent_tracks import NO_FRESH_TRACKS, recent_tracks, track_key
+from app.core.singleflight import SingleFlight
+
+_DEEZER_API = "https://api.deezer.com"
+# Catalog listings change slowly; root listings (genres, editorials, radios) barely at all.
+_ROOT_LISTING_TTL = 6 * 3600
+_CHART_TTL = 600
+_TRACK_LISTING_TTL = 1800
+_catalog_cache = TTLCache(
+    "deezer",
+    max_entries=DEEZER_CACHE_MAX_ENTRIES,
+    stale_ttl=DEEZER_CACHE_STALE_TTL,
+)
+_inflight = SingleFlight("deezer")
 logger = logging.getLogger(__name__)
 
 
-async def _get_payload(client: httpx.AsyncClient, url: str) -> dict[str, Any] | None:
-    logger.info("Deezer request: %s", url)
+def _catalog_ttl(url: str) -> float:
+    path = url.removeprefix(_DEEZER_API)
+    if path in ("/genre", "/editorial", "/radio"):
+        return _ROOT_LISTING_TTL
+    if path.startswith("/chart?"):
+        return _CHART_TTL
+    return _TRACK_LISTING_TTL
+
+
+def get_cache_stats() -> dict[str, int]:
+    return _catalog_cache.stats()
+
+
+def get_request_stats() -> dict[str, int]:
+    return _inflight.stats()
+
+
+async def _get_payload(
+    client: httpx.AsyncClient,
+    url: str,
+    deadline: Deadline | None = None,
+) -> dict[str, Any] | None:
+    """
+    Cached, coalesced fetch, waited on for at most this caller's deadline.
+    """
+    if is_expired(deadline):
+        logger.debug("Deezer request skipped (deadline spent): %s", url)
+        return None
+    load = _catalog_cache.get_or_load(
+        url,
+        ttl=_catalog_ttl(url),
+        loader=lambda: _inflight.do(url, lambda: _fetch_payload(client, url)),
+    )
+    try:
+        return await asyncio.wait_for(load, timeout=timeout_for(deadline))
+    except TimeoutError:
+        logger.debug("Deezer request abandoned (deadline spent): %s", url)
+        return None
+
+
+async def _fetch_payload(client: httpx.AsyncClient, url: str) -> dict[str, Any] | None:
+    logger.debug("Deezer request: %s", url)
     try:
         response = await client.get(url)
     except httpx.HTTPError:
@@ -22,7 +79,7 @@ async def _get_payload(client: httpx.AsyncClient, url: str) -> dict[str, Any] |
         return None
 
     if response.status_code != 200:
-        logger.info("Deezer response status %s for %s", response.status_code, url)
+        logger.debug("Deezer response status %s for %s", response.status_code, url)
         return None
 
     payload = response.json()
@@ -31,8 +88,12 @@ async def _get_payload(client: httpx.AsyncClient, url: str) -> dict[str, Any] |
     return None
 
 
-async def _get_data(client: httpx.AsyncClient, url: str) -> list[dict[str, Any]]:
-    payload = await _get_payload(client, url)
+async def _get_data(
+    client: httpx.AsyncClient,
+    url: str,
+    deadline: Deadline | None = None,
+) -> list[dict[str, Any]]:
+    payload = await _get_payload(client, url, deadline)
     if not payload:
         return []
     data = payload.get("data", [])
@@ -50,154 +111,241 @@ def _extract_chart_tracks(payload: dict[str, Any]) -> list[dict[str, Any]]:
     return []
 
 
-def _pick_track(tracks: list[dict[str, Any]]) -> dict[str, Any] | None:
-    if not tracks:
-        return None
-
-    selection = random.choice(tracks)
+def _parse_track(selection: dict[str, Any]) -> dict[str, Any] | None:
     artist = selection.get("artist", {}).get("name")
     title = selection.get("title")
     album_cover = selection.get("album", {}).get("cover_medium")
     if not artist or not title:
         return None
-    logger.info("Deezer candidate picked: %s - %s", artist, title)
     return {"artist": artist, "title": title, "album_cover": album_cover}
 
 
-def _track_key(song: dict[str, Any]) -> str:
-    artist = song.get("artist", "").strip().lower()
-    title = song.get("title", "").strip().lower()
-    return f"{artist}::{title}"
-
-
-def _is_recent(song: dict[str, Any]) -> bool:
-    return _track_key(song) in _recent_track_set
-
-
-def _mark_recent(song: dict[str, Any]) -> None:
-    key = _track_key(song)
-    if key in _recent_track_set:
-        return
-    if len(_recent_track_keys) >= _RECENT_TRACKS_MAX:
-        oldest = _recent_track_keys.popleft()
-        _recent_track_set.discard(oldest)
-    _recent_track_keys.append(key)
-    _recent_track_set.add(key)
-
+def _pick_track(tracks: list[dict[str, Any]]) -> dict[str, Any] | None:
+    if not tracks:
+        return None
 
-async def _get_song_from_radio(client: httpx.AsyncClient) -> dict[str, Any] | None:
-    radios = await _get_data(client, "https://api.deezer.com/radio")
+    song = _parse_track(random.choice(tracks))
+    if song:
+        logger.debug("Deezer candidate picked: %s - %s", song["artist"], song["title"])
+    return song
+
+
+def _sample_tracks(
+    tracks: list[dict[str, Any]],
+    count: int,
+    exclude: set[str],
+) -> list[dict[str, Any]]:
+    songs = []
+    for selection in random.sample(tracks, k=len(tracks)):
+        if len(songs) >= count:
+            break
+        song = _parse_track(selection)
+        if not song:
+            continue
+        key = track_key(song)
+        if key in exclude or recent_tracks.is_recent(song):
+            continue
+        exclude.add(key)
+        songs.append(song)
+    return songs
+
+
+async def _get_tracks_from_radio(
+    client: httpx.AsyncClient,
+    deadline: Deadline | None = None,
+) -> list[dict[str, Any]]:
+    radios = await _get_data(client, "https://api.deezer.com/radio", deadline)
     if not radios:
-        return None
+        return []
 
     radio_id = random.choice(radios).get("id")
     if not radio_id:
-        return None
-    logger.info("Deezer radio selected: %s", radio_id)
+        return []
+    logger.debug("Deezer radio selected: %s", radio_id)
 
-    tracks = await _get_data(client, f"https://api.deezer.com/radio/{radio_id}/tracks")
-    return _pick_track(tracks)
+    return await _get_data(client, f"https://api.deezer.com/radio/{radio_id}/tracks", deadline)
 
 
-async def _get_song_from_genre_chart(client: httpx.AsyncClient) -> dict[str, Any] | None:
-    genres = await _get_data(client, "https://api.deezer.com/genre")
+async def _get_tracks_from_genre_chart(
+    client: httpx.AsyncClient,
+    deadline: Deadline | None = None,
+) -> list[dict[str, Any]]:
+    genres = await _get_data(client, "https://api.deezer.com/genre", deadline)
     if not genres:
-        return None
+        return []
 
     valid_genres = [genre for genre in genres if genre.get("id") not in (None, 0)]
     if not valid_genres:
-        return None
+        return []
 
     genre_id = random.choice(valid_genres).get("id")
     if not genre_id:
-        return None
-    logger.info("Deezer genre selected: %s", genre_id)
+        return []
+    logger.debug("Deezer genre selected: %s", genre_id)
 
-    tracks = await _get_data(client, f"https://api.deezer.com/chart/{genre_id}/tracks")
-    return _pick_track(tracks)
+    return await _get_data(client, f"https://api.deezer.com/chart/{genre_id}/tracks", deadline)
 
 
-async def _get_song_from_global_chart(client: httpx.AsyncClient) -> dict[str, Any] | None:
-    payload = await _get_payload(client, "https://api.deezer.com/chart?limit=50")
+async def _get_tracks_from_global_chart(
+    client: httpx.AsyncClient,
+    deadline: Deadline | None = None,
+) -> list[dict[str, Any]]:
+    payload = await _get_payload(client, "https://api.deezer.com/chart?limit=50", deadline)
     if not payload:
-        return None
-    tracks = _extract_chart_tracks(payload)
-    return _pick_track(tracks)
+        return []
+    return _extract_chart_tracks(payload)
 
 
-async def _get_song_from_editorial_chart(client: httpx.AsyncClient) -> dict[str, Any] | None:
-    editorials = await _get_data(client, "https://api.deezer.com/editorial")
+async def _get_tracks_from_editorial_chart(
+    client: httpx.AsyncClient,
+    deadline: Deadline | None = None,
+) -> list[dict[str, Any]]:
+    editorials = await _get_data(client, "https://api.deezer.com/editorial", deadline)
     if not editorials:
-        return None
+        return []
 
     valid_editorials = [editorial for editorial in editorials if editorial.get("id") not in (None, 0)]
     if not valid_editorials:
-        return None
+        return []
 
     editorial_id = random.choice(valid_editorials).get("id")
     if not editorial_id:
-        return None
-    logger.info("Deezer editorial selected: %s", editorial_id)
+        return []
+    logger.debug("Deezer editorial selected: %s", editorial_id)
 
-    payload = await _get_payload(client, f"https://api.deezer.com/editorial/{editorial_id}/charts")
+    payload = await _get_payload(
+        client,
+        f"https://api.deezer.com/editorial/{editorial_id}/charts",
+        deadline,
+    )
     if not payload:
-        return None
-    tracks = _extract_chart_tracks(payload)
-    return _pick_track(tracks)
+        return []
+    return _extract_chart_tracks(payload)
 
 
-async def _get_song_from_artist_top(client: httpx.AsyncClient) -> dict[str, Any] | None:
-    payload = await _get_payload(client, "https://api.deezer.com/chart?limit=50")
-    if not payload:
-        return None
-    chart_tracks = _extract_chart_tracks(payload)
+async def _get_tracks_from_artist_top(
+    client: httpx.AsyncClient,
+    deadline: Deadline | None = None,
+) -> list[dict[str, Any]]:
+    chart_tracks = await _get_tracks_from_global_chart(client, deadline)
     if not chart_tracks:
-        return None
+        return []
 
     artist = random.choice(chart_tracks).get("artist", {})
     artist_id = artist.get("id")
     if not artist_id:
+        return []
+    logger.debug("Deezer artist selected for top tracks: %s", artist_id)
+
+    return await _get_data(
+        client,
+        f"https://api.deezer.com/artist/{artist_id}/top?limit=50",
+        deadline,
+    )
+
+
+Fetcher = Callable[[httpx.AsyncClient], Awaitable[list[dict[str, Any]]]]
+
+# Static weights are the priors; live success rate and latency scale them.
+_FETCHERS: list[tuple[Fetcher, SourceHealth]] = [
+    (_get_tracks_from_global_chart, SourceHealth("deezer.global_chart", prior=10)),
+    (_get_tracks_from_editorial_chart, SourceHealth("deezer.editorial_chart", prior=40)),
+    (_get_tracks_from_artist_top, SourceHealth("deezer.artist_top", prior=20)),
+    (_get_tracks_from_genre_chart, SourceHealth("deezer.genre_chart", prior=15)),
+    (_get_tracks_from_radio, SourceHealth("deezer.radio", prior=15)),
+]
+
+
+def get_health_stats() -> dict[str, dict[str, Any]]:
+    return {health.name: health.snapshot() for _, health in _FETCHERS}
+
+
+async def _fetch_tracks(
+    client: httpx.AsyncClient,
+    deadline: Deadline | None = None,
+) -> list[dict[str, Any]] | None:
+    """
+    Runs one weighted, breaker-aware fetcher. Returns None if every breaker is open.
+    """
+    entry = choose_weighted(_FETCHERS, lambda fetcher: fetcher[1])
+    if entry is None:
+        logger.warning("All Deezer fetchers unavailable (circuits open).")
         return None
-    logger.info("Deezer artist selected for top tracks: %s", artist_id)
-
-    top_tracks = await _get_data(client, f"https://api.deezer.com/artist/{artist_id}/top?limit=50")
-    return _pick_track(top_tracks)
-
-
-async def get_random_song(max_attempts: int = 6) -> dict[str, Any]:
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        attempts = 0
-        fetchers = [
-            (_get_song_from_global_chart, 10),
-            (_get_song_from_editorial_chart, 40),
-            (_get_song_from_artist_top, 20),
-            (_get_song_from_genre_chart, 15),
-            (_get_song_from_radio, 15),
-        ]
-
-        while attempts < max_attempts:
-            attempts += 1
-            logger.info("Deezer fetch attempt %s/%s", attempts, max_attempts)
-            fetcher = random.choices(
-                [fetcher for fetcher, _ in fetchers],
-                weights=[weight for _, weight in fetchers],
-                k=1,
-            )[0]
-            logger.info("Deezer fetcher: %s", fetcher.__name__)
-            song = await fetcher(client)
-            if not song:
-                continue
-            if _is_recent(song):
-                logger.info("Deezer track skipped (recent): %s - %s", song["artist"], song["title"])
-                continue
-            _mark_recent(song)
-            logger.info("Deezer track selected: %s - %s", song["artist"], song["title"])
-            return song
-
-    fallback_pool = [song for song in SONG_DATABASE if not _is_recent(song)]
-    if not fallback_pool:
-        fallback_pool = SONG_DATABASE
-    selection = random.choice(fallback_pool)
-    _mark_recent(selection)
+    fetcher, health = entry
+    logger.debug("Deezer fetcher: %s", fetcher.__name__)
+    with timed("deezer_fetcher", health.name):
+        return await health.call(lambda: fetcher(client, deadline), deadline=deadline)
+
+
+async def get_random_song(
+    max_attempts: int = 6,
+    client: httpx.AsyncClient | None = None,
+    fallback: bool = True,
+    deadline: Deadline | None = None,
+) -> dict[str, Any] | None:
+    """
+    Picks a non-recent track. Only checks the shared recent-track window; the
+    caller marks whatever it ends up serving. Without `fallback`, returns
+    NO_FRESH_TRACKS when listings came back but every pick was recent.
+    """
+    client = client or get_client("deezer")
+    attempts = 0
+    fetched = False
+
+    while attempts < max_attempts and not is_expired(deadline):
+        attempts += 1
+        if attempts > 1:
+            retries.inc(component="deezer")
+        logger.debug("Deezer fetch attempt %s/%s", attempts, max_attempts)
+        tracks = await _fetch_tracks(client, deadline)
+        if tracks is None:
+            break
+        fetched = fetched or bool(tracks)
+        song = _pick_track(tracks)
+        if not song:
+            continue
+        if recent_tracks.is_recent(song):
+            logger.debug("Deezer track skipped (recent): %s - %s", song["artist"], song["title"])
+            continue
+        logger.debug("Deezer track selected: %s - %s", song["artist"], song["title"])
+        return song
+
+    if not fallback:
+        return NO_FRESH_TRACKS if fetched else None
+    fallbacks.inc(component="deezer")
+    selection = pick_fallback_song(recent_tracks.is_recent)
     logger.info("Fallback track selected: %s - %s", selection["artist"], selection["title"])
     return selection
+
+
+async def get_random_songs(
+    count: int,
+    max_attempts: int = 3,
+    client: httpx.AsyncClient | None = None,
+    deadline: Deadline | None = None,
+) -> list[dict[str, Any]]:
+    """
+    Samples up to `count` distinct, non-recent tracks, reusing each fetched
+    listing for as many picks as it can supply. May return fewer than `count`,
+    or NO_FRESH_TRACKS if listings came back holding only recent tracks.
+    """
+    client = client or get_client("deezer")
+    songs: list[dict[str, Any]] = []
+    seen: set[str] = set()
+    attempts = 0
+    fetched = False
+
+    while len(songs) < count and attempts < max_attempts and not is_expired(deadline):
+        attempts += 1
+        if attempts > 1:
+            retries.inc(component="deezer")
+        tracks = await _fetch_tracks(client, deadline)
+        if tracks is None:
+            break
+        fetched = fetched or bool(tracks)
+        songs.extend(_sample_tracks(tracks, count - len(songs), seen))
+
+    logger.debug("Deezer batch selected %s/%s tracks.", len(songs), count)
+    if not songs and fetched:
+        return NO_FRESH_TRACKS
+    return songs
@@ -0,0 +1,159 @@
+import asyncio
+import logging
+import random
+import time
+from collections.abc import Awaitable, Callable, Sequence
+from typing import Any, TypeVar
+
+from app.core.config import (
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RESET_TIMEOUT,
+    HEALTH_EWMA_ALPHA,
+    HEALTH_LATENCY_SCALE,
+)
+from app.core.deadline import Deadline, is_expired
+
+T = TypeVar("T")
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+# Keeps a struggling (but not tripped) source in rotation so it can recover.
+_MIN_SUCCESS_RATE = 0.05
+logger = logging.getLogger(__name__)
+
+
+class SourceHealth:
+    """
+    Rolling health of one upstream source (a provider or a fetcher).
+    Its selection weight is the static prior scaled by the EWMA success rate
+    and an EWMA latency penalty. After `failure_threshold` consecutive failures
+    the breaker opens; after `reset_timeout` it lets a single probe through.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        prior: float,
+        failure_threshold: int = CIRCUIT_FAILURE_THRESHOLD,
+        reset_timeout: float = CIRCUIT_RESET_TIMEOUT,
+        alpha: float = HEALTH_EWMA_ALPHA,
+    ):
+        self.name = name
+        self.prior = prior
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.alpha = alpha
+        self.success_rate = 1.0
+        self.latency: float | None = None
+        self.consecutive_failures = 0
+        self.state = CLOSED
+        self.opened_at = 0.0
+        self._probing = False
+
+    def is_available(self) -> bool:
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            return time.monotonic() - self.opened_at >= self.reset_timeout
+        return not self._probing
+
+    def weight(self) -> float:
+        latency_factor = 1.0
+        if self.latency is not None:
+            latency_factor = 1.0 / (1.0 + self.latency / HEALTH_LATENCY_SCALE)
+        return self.prior * max(self.success_rate, _MIN_SUCCESS_RATE) * latency_factor
+
+    def _begin(self) -> None:
+        if self.state == OPEN:
+            self.state = HALF_OPEN
+            logger.info("Circuit half-open for %s; probing.", self.name)
+        if self.state == HALF_OPEN:
+            self._probing = True
+
+    def record(self, success: bool, latency: float) -> None:
+        self._probing = False
+        self.success_rate += self.alpha * ((1.0 if success else 0.0) - self.success_rate)
+        if self.latency is None:
+            self.latency = latency
+        else:
+            self.latency += self.alpha * (latency - self.latency)
+
+        if success:
+            if self.state != CLOSED:
+                logger.info("Circuit closed for %s.", self.name)
+            self.consecutive_failures = 0
+            self.state = CLOSED
+            return
+
+        self.consecutive_failures += 1
+        if self.state == HALF_OPEN or self.consecutive_failures >= self.failure_threshold:
+            if self.state != OPEN:
+                logger.warning(
+                    "Circuit opened for %s after %s failures.",
+                    self.name,
+                    self.consecutive_failures,
+                )
+            self.state = OPEN
+            self.opened_at = time.monotonic()
+
+    async def call(
+        self,
+        fn: Callable[[], Awaitable[Any]],
+        is_success: Callable[[Any], bool | None] = bool,
+        deadline: Deadline | None = None,
+    ) -> Any:
+        """
+        Runs `fn` and records the outcome `is_success` gives its result;
+        None records nothing (a result that says nothing about the source).
+        Nothing is recorded either once `deadline` has run out: an empty result
+        then reflects the caller's budget, not the source.
+        """
+        self._begin()
+        start = time.monotonic()
+        try:
+            result = await fn()
+        except asyncio.CancelledError:
+            # Losing a race says nothing about the source; free the probe slot.
+            self._probing = False
+            raise
+        except Exception:
+            if is_expired(deadline):
+                self._probing = False
+            else:
+                self.record(False, time.monotonic() - start)
+            raise
+        outcome = None if is_expired(deadline) else is_success(result)
+        if outcome is None:
+            self._probing = False
+        else:
+            self.record(outcome, time.monotonic() - start)
+        return result
+
+    def snapshot(self) -> dict[str, Any]:
+        return {
+            "state": self.state,
+            "weight": round(self.weight(), 3),
+            "success_rate": round(self.success_rate, 3),
+            "latency": round(self.latency, 3) if self.latency is not None else None,
+            "consecutive_failures": self.consecutive_failures,
+        }
+
+
+def choose_weighted(
+    sources: Sequence[T],
+    health: Callable[[T], SourceHealth],
+) -> T | None:
+    """
+    Weighted random choice among sources whose breaker allows a request.
+    Returns None when every breaker is open.
+    """
+    available = [source for source in sources if health(source).is_available()]
+    if not available:
+        return None
+    return random.choices(
+        available,
+        weights=[health(source).weight() for source in available],
+        k=1,
+    )[0]
@@ -0,0 +1,56 @@
+import importlib.util
+import logging
+
+import httpx
+
+from app.core.config import (
+    HTTP2_ENABLED,
+    HTTP_KEEPALIVE_EXPIRY,
+    HTTP_MAX_CONNECTIONS,
+    HTTP_MAX_KEEPALIVE_CONNECTIONS,
+    HTTP_TIMEOUT,
+)
+
+# One pooled client per upstream host group, reused for the lifetime of the process
+# (including warm Lambda invocations, where the container and event loop survive).
+HOST_GROUPS = ("deezer", "itunes", "lyrics")
+
+_HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+_clients: dict[str, httpx.AsyncClient] = {}
+logger = logging.getLogger(__name__)
+
+
+def _create_client(group: str) -> httpx.AsyncClient:
+    http2 = HTTP2_ENABLED and _HTTP2_AVAILABLE
+    logger.info("Opening %s HTTP client (http2=%s).", group, http2)
+    return httpx.AsyncClient(
+        timeout=HTTP_TIMEOUT,
+        http2=http2,
+        limits=httpx.Limits(
+            max_connections=HTTP_MAX_CONNECTIONS,
+            max_keepalive_connections=HTTP_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=HTTP_KEEPALIVE_EXPIRY,
+        ),
+    )
+
+
+def get_client(group: str) -> httpx.AsyncClient:
+    if group not in HOST_GROUPS:
+        raise ValueError(f"Unknown HTTP host group: {group}")
+    client = _clients.get(group)
+    if client is None or client.is_closed:
+        client = _create_client(group)
+        _clients[group] = client
+    return client
+
+
+def open_clients() -> None:
+    for group in HOST_GROUPS:
+        get_client(group)
+
+
+async def close_clients() -> None:
+    clients = list(_clients.values())
+    _clients.clear()
+    for client in clients:
+        await client.aclose()
@@ -1,14 +1,46 @@
+import asyncio
 import logging
 import random
 from typing import Any
 
 import httpx
 
+from app.core.deadline import Deadline, is_expired, timeout_for
+from app.core.http import get_client
+from app.core.recent_tracks import NO_FRESH_TRACKS, recent_tracks, track_key
+from app.core.singleflight import SingleFlight
+
+_inflight = SingleFlight("itunes")
 logger = logging.getLogger(__name__)
 
 
-async def _get_payload(client: httpx.AsyncClient, url: str) -> dict[str, Any] | None:
-    logger.info("iTunes request: %s", url)
+def get_request_stats() -> dict[str, int]:
+    return _inflight.stats()
+
+
+async def _get_payload(
+    client: httpx.AsyncClient,
+    url: str,
+    deadline: Deadline | None = None,
+) -> dict[str, Any] | None:
+    """
+    Coalesced fetch, waited on for at most this caller's deadline.
+    """
+    if is_expired(deadline):
+        logger.debug("iTunes request skipped (deadline spent): %s", url)
+        return None
+    try:
+        return await asyncio.wait_for(
+            _inflight.do(url, lambda: _fetch_payload(client, url)),
+            timeout=timeout_for(deadline),
+        )
+    except TimeoutError:
+        logger.debug("iTunes request abandoned (deadline spent): %s", url)
+        return None
+
+
+async def _fetch_payload(client: httpx.AsyncClient, url: str) -> dict[str, Any] | None:
+    logger.debug("iTunes request: %s", url)
     try:
         response = await client.get(url)
     except httpx.HTTPError:
@@ -16,7 +48,7 @@ async def _get_payload(client: httpx.AsyncClient, url: str) -> dict[str, Any] |
         return None
 
     if response.status_code != 200:
-        logger.info("iTunes response status %s for %s", response.status_code, url)
+        logger.debug("iTunes response status %s for %s", response.status_code, url)
         return None
 
     payload = response.json()
@@ -37,25 +69,69 @@ def _extract_top_songs(payload: dict[str, Any]) -> list[dict[str, Any]]:
     return []
 
 
-def _pick_track(entries: list[dict[str, Any]]) -> dict[str, str] | None:
-    if not entries:
-        return None
-    selection = random.choice(entries)
+def _parse_track(selection: dict[str, Any]) -> dict[str, str] | None:
     title = selection.get("im:name", {}).get("label")
     artist = selection.get("im:artist", {}).get("label")
     if not artist or not title:
         return None
-    logger.info("iTunes candidate picked: %s - %s", artist, title)
     return {"artist": artist, "title": title}
 
 
-async def get_top_song() -> dict[str, str] | None:
-    async with httpx.AsyncClient(timeout=10.0) as client:
-        payload = await _get_payload(
-            client,
-            "https://itunes.apple.com/us/rss/topsongs/limit=100/json",
-        )
-        if not payload:
-            return None
-        entries = _extract_top_songs(payload)
-        return _pick_track(entries)
+def _pick_track(entries: list[dict[str, Any]]) -> dict[str, str] | None:
+    if not entries:
+        return None
+    song = _parse_track(random.choice(entries))
+    if song:
+        logger.debug("iTunes candidate picked: %s - %s", song["artist"], song["title"])
+    return song
+
+
+async def _get_top_entries(
+    client: httpx.AsyncClient,
+    deadline: Deadline | None = None,
+) -> list[dict[str, Any]]:
+    payload = await _get_payload(
+        client,
+        "https://itunes.apple.com/us/rss/topsongs/limit=100/json",
+        deadline,
+    )
+    if not payload:
+        return []
+    return _extract_top_songs(payload)
+
+
+async def get_top_song(
+    client: httpx.AsyncClient | None = None,
+    deadline: Deadline | None = None,
+) -> dict[str, str] | None:
+    client = client or get_client("itunes")
+    return _pick_track(await _get_top_entries(client, deadline))
+
+
+async def get_top_songs(
+    count: int,
+    client: httpx.AsyncClient | None = None,
+    deadline: Deadline | None = None,
+) -> list[dict[str, str]]:
+    """
+    Samples up to `count` distinct, non-recent tracks from one top songs listing,
+    or returns NO_FRESH_TRACKS if every track in it was recent.
+    """
+    client = client or get_client("itunes")
+    entries = await _get_top_entries(client, deadline)
+    songs = []
+    seen: set[str] = set()
+    for selection in random.sample(entries, k=len(entries)):
+        if len(songs) >= count:
+            break
+        song = _parse_track(selection)
+        if not song:
+            continue
+        key = track_key(song)
+        if key in seen or recent_tracks.is_recent(song):
+            continue
+        seen.add(key)
+        songs.append(song)
+    if not songs and entries:
+        return NO_FRESH_TRACKS
+    return songs
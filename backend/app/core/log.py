@@ -0,0 +1,160 @@
+import atexit
+import copy
+import json
+import logging
+import queue
+import random
+import sys
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Any
+
+from app.core.config import LOG_DEBUG_SAMPLE_RATE, LOG_FORMAT, LOG_LEVEL, RUNNING_IN_LAMBDA
+
+_request_id: ContextVar[str | None] = ContextVar("request_id", default=None)
+# Whether this request's DEBUG lines are kept; None outside a request.
+_debug_sampled: ContextVar[bool | None] = ContextVar("debug_sampled", default=None)
+
+_STANDARD_ATTRS = frozenset(logging.makeLogRecord({}).__dict__) | {
+    "message",
+    "asctime",
+    "request_id",
+}
+_MAX_REQUEST_ID_LENGTH = 128
+_TEXT_FORMAT = "%(asctime)s %(levelname)s [%(name)s] [%(request_id)s] %(message)s"
+
+_configured = False
+_listener: QueueListener | None = None
+
+
+class RequestContextFilter(logging.Filter):
+    """
+    Stamps the request ID on each record and drops unsampled DEBUG records
+    before they are queued.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = _request_id.get() or "-"
+        if record.levelno > logging.DEBUG:
+            return True
+        sampled = _debug_sampled.get()
+        if sampled is None:
+            return random.random() < LOG_DEBUG_SAMPLE_RATE
+        return sampled
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        created = datetime.fromtimestamp(record.created, timezone.utc)
+        entry: dict[str, Any] = {
+            "time": created.isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", "-"),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _STANDARD_ATTRS and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc"] = record.exc_text
+        return json.dumps(entry, default=str, ensure_ascii=False)
+
+
+class _DeferredQueueHandler(QueueHandler):
+    """
+    Resolves only what cannot safely cross threads (message args, tracebacks)
+    and leaves formatting to the listener.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+def configure_logging(queued: bool = not RUNNING_IN_LAMBDA) -> None:
+    """
+    Routes the root logger through a QueueHandler; a listener thread formats
+    and writes records, so logging never blocks the event loop on I/O.
+    With `queued` off (the default under Lambda, which freezes the sandbox as
+    soon as an invocation returns and could strand records still in the
+    queue), records are written synchronously instead.
+    """
+    global _configured, _listener
+    if _configured:
+        return
+    _configured = True
+
+    stream = logging.StreamHandler(sys.stdout)
+    stream.setFormatter(JsonFormatter() if LOG_FORMAT == "json" else logging.Formatter(_TEXT_FORMAT))
+    root = logging.getLogger()
+    root.setLevel(LOG_LEVEL)
+    if not queued:
+        stream.addFilter(RequestContextFilter())
+        root.handlers = [stream]
+        return
+
+    records: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+    handler = _DeferredQueueHandler(records)
+    handler.addFilter(RequestContextFilter())
+    root.handlers = [handler]
+
+    _listener = QueueListener(records, stream, respect_handler_level=True)
+    _listener.start()
+    atexit.register(_listener.stop)
+
+
+def _header(scope: dict[str, Any], name: bytes) -> str | None:
+    for key, value in scope.get("headers", ()):
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+class RequestIdMiddleware:
+    """
+    Assigns each HTTP request a correlation ID (the caller's X-Request-ID, the
+    Lambda request ID, or a new one), decides DEBUG sampling for it, and echoes
+    the ID back in the X-Request-ID response header.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = _header(scope, b"x-request-id")
+        if (
+            not request_id
+            or len(request_id) > _MAX_REQUEST_ID_LENGTH
+            or not request_id.isprintable()
+        ):
+            aws_context = scope.get("aws.context")
+            request_id = getattr(aws_context, "aws_request_id", None) or uuid.uuid4().hex
+        request_id_token = _request_id.set(request_id)
+        sampled_token = _debug_sampled.set(random.random() < LOG_DEBUG_SAMPLE_RATE)
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", ()))
+                headers.append((b"x-request-id", request_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            _debug_sampled.reset(sampled_token)
+            _request_id.reset(request_id_token)
@@ -0,0 +1,303 @@
+import asyncio
+import logging
+import os
+import shutil
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import quote
+
+import httpx
+
+from app.core.catalog import song_catalog
+from app.core.config import (
+    LYRICS_DB_PATH,
+    LYRICS_MEMORY_ENTRIES,
+    LYRICS_NEGATIVE_TTL,
+    LYRICS_SEED_DB_PATH,
+    LYRICS_TTL,
+)
+from app.core.deadline import Deadline, is_expired, timeout_for
+from app.core.lyrics_index import LyricsIndex
+from app.core.metrics import cache_lookups, retries
+
+logger = logging.getLogger(__name__)
+
+
+def _lyrics_key(artist: str, title: str) -> str:
+    return f"{artist.strip().lower()}::{title.strip().lower()}"
+
+
+class LyricsStore:
+    """
+    Two-tier lyrics cache: an in-memory LRU backed by a SQLite file.
+    Cached values are cleaned lyrics; an empty string is a negative entry
+    (known-missing track) and expires after the shorter negative TTL.
+    Each positive entry also keeps its LyricsIndex, persisted next to the text.
+    The memory tier is checked inline; SQLite reads and writes run in a worker
+    thread so they never block the event loop.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        seed_path: str | None = None,
+        memory_entries: int = 1024,
+        ttl: float = LYRICS_TTL,
+        negative_ttl: float = LYRICS_NEGATIVE_TTL,
+    ):
+        self.path = path
+        self.seed_path = seed_path
+        self.memory_entries = memory_entries
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self._memory: OrderedDict[str, tuple[str, float, LyricsIndex | None]] = OrderedDict()
+        self._db: sqlite3.Connection | None = None
+        self._db_failed = False
+        self._lock = threading.Lock()
+
+    def _connection(self) -> sqlite3.Connection | None:
+        if self._db is not None or self._db_failed:
+            return self._db
+        try:
+            if self.seed_path and not os.path.exists(self.path) and os.path.exists(self.seed_path):
+                shutil.copyfile(self.seed_path, self.path)
+                logger.info("Lyrics cache seeded from %s", self.seed_path)
+            db = sqlite3.connect(self.path, check_same_thread=False)
+            db.execute("PRAGMA journal_mode=WAL")
+            db.execute(
+                "CREATE TABLE IF NOT EXISTS lyrics ("
+                "key TEXT PRIMARY KEY, lyrics TEXT NOT NULL, expires_at REAL NOT NULL,"
+                " token_index BLOB)"
+            )
+            columns = {row[1] for row in db.execute("PRAGMA table_info(lyrics)")}
+            if "token_index" not in columns:
+                # Caches and seeds written before the index existed.
+                db.execute("ALTER TABLE lyrics ADD COLUMN token_index BLOB")
+            db.commit()
+        except (OSError, sqlite3.Error):
+            logger.warning("Lyrics cache database unavailable at %s; using memory only.", self.path)
+            self._db_failed = True
+            return None
+        self._db = db
+        return db
+
+    def _remember(
+        self,
+        key: str,
+        lyrics: str,
+        expires_at: float,
+        index: LyricsIndex | None = None,
+    ) -> None:
+        self._memory[key] = (lyrics, expires_at, index)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.memory_entries:
+            self._memory.popitem(last=False)
+
+    def _read(self, key: str) -> tuple[str, float, bytes | None] | None:
+        with self._lock:
+            db = self._connection()
+            if db is None:
+                return None
+            try:
+                return db.execute(
+                    "SELECT lyrics, expires_at, token_index FROM lyrics WHERE key = ?",
+                    (key,),
+                ).fetchone()
+            except sqlite3.Error:
+                logger.warning("Lyrics cache read failed for %s", key)
+                return None
+
+    async def _lookup(self, key: str) -> tuple[str, float, LyricsIndex | None] | None:
+        now = time.time()
+        cached = self._memory.get(key)
+        if cached is not None:
+            if cached[1] > now:
+                self._memory.move_to_end(key)
+                return cached
+            del self._memory[key]
+
+        row = await asyncio.to_thread(self._read, key)
+        if row is None or row[1] <= now:
+            return None
+        lyrics, expires_at, blob = row
+        index = LyricsIndex.from_bytes(lyrics, blob) if lyrics and blob else None
+        self._remember(key, lyrics, expires_at, index)
+        return self._memory[key]
+
+    async def get(self, artist: str, title: str) -> str | None:
+        """
+        Returns cached lyrics, "" for a known-missing track, or None if unknown.
+        """
+        cached = await self._lookup(_lyrics_key(artist, title))
+        return cached[0] if cached is not None else None
+
+    async def get_index(self, artist: str, title: str, lyrics: str) -> LyricsIndex:
+        """
+        Returns the stored index for `lyrics`, tokenizing only on a miss
+        (evicted entries, or rows cached before the index existed).
+        """
+        key = _lyrics_key(artist, title)
+        cached = await self._lookup(key)
+        if cached is not None and cached[0] == lyrics and cached[2] is not None:
+            return cached[2]
+        index = LyricsIndex.build(lyrics)
+        if cached is not None and cached[0] == lyrics:
+            self._remember(key, lyrics, cached[1], index)
+            await asyncio.to_thread(self._write, key, lyrics, cached[1], index)
+        return index
+
+    async def put(self, artist: str, title: str, lyrics: str) -> None:
+        key = _lyrics_key(artist, title)
+        expires_at = time.time() + (self.ttl if lyrics else self.negative_ttl)
+        index = LyricsIndex.build(lyrics) if lyrics else None
+        self._remember(key, lyrics, expires_at, index)
+        await asyncio.to_thread(self._write, key, lyrics, expires_at, index)
+
+    def _write(self, key: str, lyrics: str, expires_at: float, index: LyricsIndex | None) -> None:
+        with self._lock:
+            db = self._connection()
+            if db is None:
+                return
+            try:
+                db.execute(
+                    "INSERT OR REPLACE INTO lyrics (key, lyrics, expires_at, token_index)"
+                    " VALUES (?, ?, ?, ?)",
+                    (key, lyrics, expires_at, index.to_bytes() if index is not None else None),
+                )
+                db.commit()
+            except sqlite3.Error:
+                logger.warning("Lyrics cache write failed for %s", key)
+
+    async def put_missing(self, artist: str, title: str) -> None:
+        await self.put(artist, title, "")
+
+    def remember(self, artist: str, title: str, lyrics: str) -> None:
+        """
+        Keeps lyrics that already live elsewhere (the song catalog) and their
+        index in the memory tier only, tokenizing once per stay in the LRU.
+        """
+        key = _lyrics_key(artist, title)
+        cached = self._memory.get(key)
+        if cached is not None and cached[0] == lyrics and cached[1] > time.time():
+            self._memory.move_to_end(key)
+            return
+        self._remember(key, lyrics, time.time() + self.ttl, LyricsIndex.build(lyrics))
+
+
+lyrics_store = LyricsStore(
+    LYRICS_DB_PATH,
+    seed_path=LYRICS_SEED_DB_PATH,
+    memory_entries=LYRICS_MEMORY_ENTRIES,
+)
+
+
+def clean_lyrics(raw_lyrics: str, title: str) -> str:
+    # Cleanup: API sometimes returns "Paroles de la chanson..." headers
+    return raw_lyrics.replace(f"Paroles de la chanson {title}", "").strip()
+
+
+async def get_lyrics_index(
+    artist: str,
+    title: str,
+    lyrics: str,
+    store: LyricsStore | None = None,
+) -> LyricsIndex:
+    return await (store or lyrics_store).get_index(artist, title, lyrics)
+
+
+async def fetch_lyrics(
+    client: httpx.AsyncClient,
+    artist: str,
+    title: str,
+    store: LyricsStore | None = None,
+    deadline: Deadline | None = None,
+) -> str:
+    store = store or lyrics_store
+    if song_catalog is not None:
+        catalog_lyrics = song_catalog.get_lyrics(artist, title)
+        if catalog_lyrics:
+            cache_lookups.inc(cache="catalog", result="hit")
+            # Not written to SQLite: the catalog is already durable, only the index is new.
+            store.remember(artist, title, catalog_lyrics)
+            return catalog_lyrics
+
+    cached = await store.get(artist, title)
+    if cached is not None:
+        if cached:
+            cache_lookups.inc(cache="lyrics", result="hit")
+            logger.debug("Lyrics cache hit for %s - %s.", artist, title)
+        else:
+            cache_lookups.inc(cache="lyrics", result="missing")
+            logger.debug("Lyrics known missing for %s - %s; skipping lookup.", artist, title)
+        return cached
+    cache_lookups.inc(cache="lyrics", result="miss")
+
+    artist_path = quote(artist, safe="")
+    title_path = quote(title, safe="")
+    url = f"https://api.lyrics.ovh/v1/{artist_path}/{title_path}"
+    empty_responses = 0
+    for attempt in range(1, 3):
+        if is_expired(deadline):
+            logger.debug("Lyrics lookup stopped (deadline spent) for %s - %s.", artist, title)
+            break
+        if attempt > 1:
+            retries.inc(component="lyrics")
+        logger.debug(
+            "Lyrics lookup attempt %s/2 for %s - %s (url=%s).",
+            attempt,
+            artist,
+            title,
+            url,
+        )
+        try:
+            response = await client.get(url, timeout=timeout_for(deadline))
+        except httpx.HTTPError:
+            logger.warning(
+                "Lyrics request failed for %s - %s (attempt %s/2).",
+                artist,
+                title,
+                attempt,
+            )
+            continue
+
+        if response.status_code == 404:
+            logger.debug("Lyrics not found for %s - %s.", artist, title)
+            await store.put_missing(artist, title)
+            return ""
+
+        if response.status_code != 200:
+            logger.debug(
+                "Lyrics response status %s for %s - %s (attempt %s/2).",
+                response.status_code,
+                artist,
+                title,
+                attempt,
+            )
+            continue
+
+        data = response.json()
+        raw_lyrics = data.get("lyrics", "")
+        if not raw_lyrics:
+            empty_responses += 1
+            logger.debug(
+                "Lyrics response empty for %s - %s (attempt %s/2).",
+                artist,
+                title,
+                attempt,
+            )
+            continue
+
+        lyrics = clean_lyrics(raw_lyrics, title)
+        if lyrics:
+            logger.debug("Lyrics found for %s - %s.", artist, title)
+        else:
+            logger.debug("Lyrics cleanup produced empty text for %s - %s.", artist, title)
+        await store.put(artist, title, lyrics)
+        return lyrics
+
+    # Transport errors and 5xx are transient; only answered misses are remembered.
+    if empty_responses:
+        await store.put_missing(artist, title)
+    return ""
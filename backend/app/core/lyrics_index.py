@@ -0,0 +1,235 @@
+import random
+import re
+import struct
+from array import array
+from bisect import bisect_left
+
+from app.core.byteorder import from_little_endian, to_little_endian
+from app.core.config import LYRICS_PASSAGE_MAX_CHARS, LYRICS_PASSAGE_MIN_WORDS
+
+_WORD_PATTERN = re.compile(r"\b[\w']+\b")
+# Words this short are never blanked or starred out.
+_MIN_ELIGIBLE_LENGTH = 3
+_HEADER = struct.Struct("<BIIIIH")
+_FORMAT_VERSION = 2
+
+
+class LyricsIndex:
+    """
+    Word offsets and lengths for one cleaned lyrics text, tokenized once.
+    `eligible` holds the positions (into starts/lengths) of words long enough
+    to be masked, so masking only samples integers and slices the text.
+    `passages` holds [start, end) character spans of whole lines that fit the
+    passage budget and have enough eligible words, one per starting line.
+    """
+
+    __slots__ = ("text", "starts", "lengths", "eligible", "passages")
+
+    def __init__(
+        self,
+        text: str,
+        starts: array,
+        lengths: array,
+        eligible: array,
+        passages: array | None = None,
+    ):
+        self.text = text
+        self.starts = starts
+        self.lengths = lengths
+        self.eligible = eligible
+        self.passages = passages if passages is not None else array("I")
+
+    @classmethod
+    def build(cls, text: str) -> "LyricsIndex":
+        starts = array("I")
+        lengths = array("H")
+        eligible = array("I")
+        for position, match in enumerate(_WORD_PATTERN.finditer(text)):
+            length = min(match.end() - match.start(), 0xFFFF)
+            starts.append(match.start())
+            lengths.append(length)
+            if length >= _MIN_ELIGIBLE_LENGTH:
+                eligible.append(position)
+        index = cls(text, starts, lengths, eligible)
+        index.passages = index._build_passages(LYRICS_PASSAGE_MAX_CHARS, LYRICS_PASSAGE_MIN_WORDS)
+        return index
+
+    def _build_passages(self, max_chars: int, min_words: int) -> array:
+        """
+        For every stanza start, and every line of a stanza too long to show whole,
+        takes the longest run of whole lines within `max_chars`. Runs with fewer
+        than `min_words` eligible words are dropped.
+        """
+        # Non-blank lines as character spans, grouped into stanzas by blank lines.
+        lines: list[tuple[int, int]] = []
+        stanzas: list[tuple[int, int]] = []
+        offset = 0
+        stanza_first = 0
+        for line in self.text.split("\n"):
+            if line.strip():
+                lines.append((offset, offset + len(line)))
+            elif len(lines) > stanza_first:
+                stanzas.append((stanza_first, len(lines) - 1))
+                stanza_first = len(lines)
+            offset += len(line) + 1
+        if len(lines) > stanza_first:
+            stanzas.append((stanza_first, len(lines) - 1))
+
+        stanza_ends = {last for _, last in stanzas}
+        passages = array("I")
+        for stanza_first, stanza_last in stanzas:
+            fits_whole = lines[stanza_last][1] - lines[stanza_first][0] <= max_chars
+            for first in range(stanza_first, stanza_first + 1 if fits_whole else stanza_last + 1):
+                start = lines[first][0]
+                last = last_break = None
+                for current in range(first, len(lines)):
+                    if lines[current][1] - start > max_chars:
+                        break
+                    last = current
+                    if current in stanza_ends:
+                        last_break = current
+                if last is None:
+                    continue
+                # Prefer ending on a stanza break; run on to the last fitting line
+                # if the shorter passage lacks enough words.
+                for end_line in dict.fromkeys((last_break, last)):
+                    if end_line is None:
+                        continue
+                    end = lines[end_line][1]
+                    low, high = self._eligible_range(start, end)
+                    if high - low >= min_words:
+                        passages.extend((start, end))
+                        break
+        return passages
+
+    def passage_count(self) -> int:
+        return len(self.passages) // 2
+
+    def choose_passage(self, max_chars: int = LYRICS_PASSAGE_MAX_CHARS) -> tuple[int, int]:
+        """
+        Picks a random precomputed passage, or the head of the text cut at the
+        last space within `max_chars` when no passage qualifies.
+        """
+        count = self.passage_count()
+        if count:
+            pick = random.randrange(count) * 2
+            return self.passages[pick], self.passages[pick + 1]
+        if len(self.text) <= max_chars:
+            return 0, len(self.text)
+        end = self.text.rfind(" ", 0, max_chars)
+        return 0, max_chars if end == -1 else end
+
+    def to_bytes(self) -> bytes:
+        return b"".join(
+            (
+                _HEADER.pack(
+                    _FORMAT_VERSION,
+                    len(self.starts),
+                    len(self.eligible),
+                    len(self.passages),
+                    LYRICS_PASSAGE_MAX_CHARS,
+                    LYRICS_PASSAGE_MIN_WORDS,
+                ),
+                to_little_endian(self.starts),
+                to_little_endian(self.lengths),
+                to_little_endian(self.eligible),
+                to_little_endian(self.passages),
+            )
+        )
+
+    @classmethod
+    def from_bytes(cls, text: str, data: bytes) -> "LyricsIndex | None":
+        """
+        Rebuilds an index stored by `to_bytes`; returns None if it is unreadable
+        or was built with different passage settings.
+        """
+        try:
+            header = _HEADER.unpack_from(data)
+        except struct.error:
+            return None
+        version, words, eligible_count, passage_count, max_chars, min_words = header
+        if version != _FORMAT_VERSION or (max_chars, min_words) != (
+            LYRICS_PASSAGE_MAX_CHARS,
+            LYRICS_PASSAGE_MIN_WORDS,
+        ):
+            return None
+        offset = _HEADER.size
+        starts_end = offset + words * 4
+        lengths_end = starts_end + words * 2
+        eligible_end = lengths_end + eligible_count * 4
+        passages_end = eligible_end + passage_count * 4
+        if len(data) != passages_end:
+            return None
+        return cls(
+            text,
+            from_little_endian("I", data[offset:starts_end]),
+            from_little_endian("H", data[starts_end:lengths_end]),
+            from_little_endian("I", data[lengths_end:eligible_end]),
+            from_little_endian("I", data[eligible_end:passages_end]),
+        )
+
+    def _word_range(self, start: int, end: int) -> tuple[int, int]:
+        """
+        Positions [first, last) of the words lying wholly inside text[start:end].
+        """
+        first = bisect_left(self.starts, start)
+        last = bisect_left(self.starts, end, lo=first)
+        if last > first and self.starts[last - 1] + self.lengths[last - 1] > end:
+            last -= 1
+        return first, last
+
+    def _eligible_range(self, start: int, end: int) -> tuple[int, int]:
+        first, last = self._word_range(start, end)
+        low = bisect_left(self.eligible, first)
+        return low, bisect_left(self.eligible, last, lo=low)
+
+    def _replace(self, start: int, end: int, positions: list[int], placeholder) -> str:
+        parts = []
+        cursor = start
+        for index, position in enumerate(positions, start=1):
+            word_start = self.starts[position]
+            parts.append(self.text[cursor:word_start])
+            parts.append(placeholder(index, position))
+            cursor = word_start + self.lengths[position]
+        parts.append(self.text[cursor:end])
+        return "".join(parts)
+
+    def mask_with_blanks(
+        self,
+        mask_ratio: float = 0.25,
+        start: int = 0,
+        end: int | None = None,
+    ) -> tuple[str, list[dict], list[str]]:
+        """
+        Same contract as utils.mask_text_with_blanks, applied to text[start:end]
+        and sampled from the index instead of re-scanning the text.
+        """
+        end = len(self.text) if end is None else end
+        low, high = self._eligible_range(start, end)
+        if low == high:
+            return self.text[start:end], [], []
+
+        blanks_count = max(1, int((high - low) * mask_ratio))
+        picks = sorted(random.sample(range(low, high), k=min(high - low, blanks_count)))
+        positions = [self.eligible[pick] for pick in picks]
+
+        blanks_metadata = []
+        answers = []
+        for index, position in enumerate(positions, start=1):
+            word_start = self.starts[position]
+            answers.append(self.text[word_start:word_start + self.lengths[position]])
+            blanks_metadata.append({"key": f"BLANK_{index}", "length": self.lengths[position]})
+
+        masked = self._replace(start, end, positions, lambda index, _: f"[BLANK_{index}]")
+        return masked, blanks_metadata, answers
+
+    def mask_words(self, mask_ratio: float = 0.4, start: int = 0, end: int | None = None) -> str:
+        """
+        Stars out each eligible word of text[start:end] with probability
+        `mask_ratio`, leaving punctuation and line breaks where they were.
+        """
+        end = len(self.text) if end is None else end
+        low, high = self._eligible_range(start, end)
+        draw = random.random
+        positions = [position for position in self.eligible[low:high] if draw() < mask_ratio]
+        return self._replace(start, end, positions, lambda _, position: "*" * self.lengths[position])
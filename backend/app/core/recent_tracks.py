@@ -0,0 +1,248 @@
+import hashlib
+import logging
+import math
+import sqlite3
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import Any
+
+from app.core.config import (
+    RECENT_TRACKS_BACKEND,
+    RECENT_TRACKS_DB_PATH,
+    RECENT_TRACKS_FALSE_POSITIVE_RATE,
+    RECENT_TRACKS_GENERATIONS,
+    RECENT_TRACKS_WINDOW,
+)
+
+logger = logging.getLogger(__name__)
+
+# Marks run on the request path: give up on a busy SQLite store quickly instead of
+# blocking the event loop. Startup may wait for another worker's setup.
+_BUSY_TIMEOUT = 0.05
+_SETUP_TIMEOUT = 5.0
+
+
+class _NoFreshTracks:
+    """
+    Pick result when listings were fetched but every track in them was recent.
+    Falsy and empty like a miss, but not an upstream failure.
+    """
+
+    def __bool__(self) -> bool:
+        return False
+
+    def __iter__(self):
+        return iter(())
+
+    def __len__(self) -> int:
+        return 0
+
+
+NO_FRESH_TRACKS = _NoFreshTracks()
+
+
+def track_key(song: dict[str, Any]) -> str:
+    artist = song.get("artist", "").strip().lower()
+    title = song.get("title", "").strip().lower()
+    return f"{artist}::{title}"
+
+
+class BloomGeometry:
+    """
+    Sizing for a rotating Bloom filter: `generations` filters of `bits` bits and
+    `hashes` hash functions, each taking `per_generation` insertions before the
+    oldest is cleared. A key is remembered for between (generations - 1) and
+    `generations` fills, i.e. the last ~`window` marks. Each filter gets an equal
+    share of `false_positive_rate`, so a lookup across all of them stays within it.
+    """
+
+    def __init__(self, window: int, false_positive_rate: float, generations: int):
+        self.generations = max(2, generations)
+        self.per_generation = max(1, math.ceil(window / self.generations))
+        share = false_positive_rate / self.generations
+        self.bits = max(64, math.ceil(-self.per_generation * math.log(share) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.bits / self.per_generation * math.log(2)))
+
+    def positions(self, key: str) -> list[int]:
+        digest = hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], "little")
+        second = int.from_bytes(digest[8:], "little") | 1
+        return [(first + index * second) % self.bits for index in range(self.hashes)]
+
+
+class RecentTracks(ABC):
+    """
+    Recent-track window shared by every picker. Membership is probabilistic (a
+    fresh track is skipped at most at the configured false-positive rate, a
+    recent one is never missed) and costs O(hashes * generations). Pinned
+    tracks, held by this process's round buffer, are tracked exactly.
+    """
+
+    def __init__(self, geometry: BloomGeometry):
+        self.geometry = geometry
+        self._pinned: set[str] = set()
+
+    @abstractmethod
+    def _contains(self, positions: list[int]) -> bool: ...
+
+    @abstractmethod
+    def _add(self, positions: list[int]) -> None: ...
+
+    def is_recent(self, song: dict[str, Any]) -> bool:
+        key = track_key(song)
+        return key in self._pinned or self._contains(self.geometry.positions(key))
+
+    def mark(self, song: dict[str, Any]) -> None:
+        self._add(self.geometry.positions(track_key(song)))
+
+    def pin(self, song: dict[str, Any]) -> None:
+        self._pinned.add(track_key(song))
+
+    def release(self, song: dict[str, Any]) -> None:
+        self._pinned.discard(track_key(song))
+        # Served now: marking again puts it in the newest filter, restarting its window.
+        self.mark(song)
+
+
+def _has_bits(bits: bytes | bytearray, positions: list[int]) -> bool:
+    return all(bits[position >> 3] & (1 << (position & 7)) for position in positions)
+
+
+class MemoryRecentTracks(RecentTracks):
+    def __init__(self, geometry: BloomGeometry):
+        super().__init__(geometry)
+        size = (geometry.bits + 7) // 8
+        self._filters = deque(bytearray(size) for _ in range(geometry.generations))
+        self._count = 0
+
+    def _contains(self, positions: list[int]) -> bool:
+        return any(_has_bits(bits, positions) for bits in self._filters)
+
+    def _add(self, positions: list[int]) -> None:
+        if self._count >= self.geometry.per_generation:
+            oldest = self._filters.popleft()
+            oldest[:] = bytes(len(oldest))
+            self._filters.append(oldest)
+            self._count = 0
+        current = self._filters[-1]
+        for position in positions:
+            current[position >> 3] |= 1 << (position & 7)
+        self._count += 1
+
+
+class SQLiteRecentTracks(RecentTracks):
+    """
+    Rotating Bloom filter kept in a local SQLite file, so every worker on the host
+    sees the same window. Each filter is a fixed-size BLOB row read and written
+    through incremental blob I/O, so lookups touch only the bytes they test.
+    """
+
+    def __init__(self, path: str, geometry: BloomGeometry):
+        super().__init__(geometry)
+        self.path = path
+        self._size = (geometry.bits + 7) // 8
+        self._db = sqlite3.connect(
+            path,
+            timeout=_SETUP_TIMEOUT,
+            check_same_thread=False,
+            isolation_level=None,
+        )
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS recent_filters ("
+            "slot INTEGER PRIMARY KEY, generation INTEGER NOT NULL,"
+            " count INTEGER NOT NULL, bits BLOB NOT NULL)"
+        )
+        self._db.execute("BEGIN IMMEDIATE")
+        try:
+            rows = self._db.execute("SELECT length(bits) FROM recent_filters").fetchall()
+            if len(rows) != geometry.generations or any(row[0] != self._size for row in rows):
+                # First run, or the window settings changed: start a fresh filter set.
+                self._db.execute("DELETE FROM recent_filters")
+                self._db.executemany(
+                    "INSERT INTO recent_filters (slot, generation, count, bits)"
+                    " VALUES (?, ?, 0, zeroblob(?))",
+                    [(slot, slot, self._size) for slot in range(geometry.generations)],
+                )
+            self._db.execute("COMMIT")
+        except BaseException:
+            self._db.execute("ROLLBACK")
+            raise
+        self._db.execute(f"PRAGMA busy_timeout = {round(_BUSY_TIMEOUT * 1000)}")
+
+    def _read(self, slot: int, positions: list[int]) -> bool:
+        with self._db.blobopen("recent_filters", "bits", slot, readonly=True) as blob:
+            for position in positions:
+                blob.seek(position >> 3)
+                if not blob.read(1)[0] & (1 << (position & 7)):
+                    return False
+        return True
+
+    def _contains(self, positions: list[int]) -> bool:
+        try:
+            return any(self._read(slot, positions) for slot in range(self.geometry.generations))
+        except sqlite3.Error:
+            logger.warning("Recent-track lookup failed; treating track as fresh.")
+            return False
+
+    def _add(self, positions: list[int]) -> None:
+        try:
+            self._db.execute("BEGIN IMMEDIATE")
+        except sqlite3.Error:
+            logger.warning("Recent-track store busy; mark skipped.")
+            return
+        try:
+            slot, generation, count = self._db.execute(
+                "SELECT slot, generation, count FROM recent_filters"
+                " ORDER BY generation DESC LIMIT 1"
+            ).fetchone()
+            if count >= self.geometry.per_generation:
+                oldest = self._db.execute(
+                    "SELECT slot FROM recent_filters ORDER BY generation LIMIT 1"
+                ).fetchone()[0]
+                self._db.execute(
+                    "UPDATE recent_filters SET generation = ?, count = 0, bits = zeroblob(?)"
+                    " WHERE slot = ?",
+                    (generation + 1, self._size, oldest),
+                )
+                slot = oldest
+            with self._db.blobopen("recent_filters", "bits", slot) as blob:
+                for position in positions:
+                    blob.seek(position >> 3)
+                    current = blob.read(1)[0]
+                    blob.seek(position >> 3)
+                    blob.write(bytes((current | (1 << (position & 7)),)))
+            self._db.execute("UPDATE recent_filters SET count = count + 1 WHERE slot = ?", (slot,))
+            self._db.execute("COMMIT")
+        except sqlite3.Error:
+            self._rollback()
+            logger.warning("Recent-track mark failed; mark skipped.")
+        except BaseException:
+            self._rollback()
+            raise
+
+    def _rollback(self) -> None:
+        try:
+            self._db.execute("ROLLBACK")
+        except sqlite3.Error:
+            # SQLite may already have rolled the transaction back itself.
+            pass
+
+
+def create_recent_tracks(backend: str = RECENT_TRACKS_BACKEND) -> RecentTracks:
+    geometry = BloomGeometry(
+        RECENT_TRACKS_WINDOW,
+        RECENT_TRACKS_FALSE_POSITIVE_RATE,
+        RECENT_TRACKS_GENERATIONS,
+    )
+    if backend == "sqlite":
+        try:
+            return SQLiteRecentTracks(RECENT_TRACKS_DB_PATH, geometry)
+        except sqlite3.Error:
+            logger.warning("Recent-track database unavailable at %s; using memory.", RECENT_TRACKS_DB_PATH)
+    elif backend != "memory":
+        logger.warning("Unknown RECENT_TRACKS_BACKEND %r; using memory.", backend)
+    return MemoryRecentTracks(geometry)
+
+
+recent_tracks = create_recent_tracks()
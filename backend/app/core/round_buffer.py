@@ -0,0 +1,94 @@
+import asyncio
+import contextvars
+import logging
+from collections import deque
+from collections.abc import Awaitable, Callable
+from typing import Any
+
+from fastapi import HTTPException
+
+from app.core.recent_tracks import recent_tracks
+from app.schemas.game import NewRoundResponse
+
+RoundBuilder = Callable[[str, str], Awaitable[tuple[NewRoundResponse, dict[str, Any]]]]
+
+_MAX_CONSECUTIVE_FAILURES = 3
+logger = logging.getLogger(__name__)
+
+
+class RoundBuffer:
+    """
+    Bounded per-(mode, difficulty) buffer of ready rounds.
+    Popping at or below the low watermark schedules a background refill up to
+    the high watermark. Buffered tracks stay pinned in the song picker's
+    recent-track dedupe until they are served.
+    """
+
+    def __init__(self, builder: RoundBuilder, high_watermark: int, low_watermark: int):
+        self.builder = builder
+        self.high_watermark = max(1, high_watermark)
+        self.low_watermark = min(max(0, low_watermark), self.high_watermark - 1)
+        self._rounds: dict[tuple[str, str], deque[tuple[NewRoundResponse, dict[str, Any]]]] = {}
+        self._refills: dict[tuple[str, str], asyncio.Task] = {}
+
+    def pop(
+        self,
+        mode: str,
+        difficulty: str,
+        skip: Callable[[dict[str, Any]], bool] | None = None,
+    ) -> tuple[NewRoundResponse, dict[str, Any]] | None:
+        """
+        Returns the oldest buffered (round, song) whose song `skip` does not reject.
+        """
+        key = (mode, difficulty)
+        buffered = self._rounds.setdefault(key, deque())
+        entry = None
+        for index, (_, song) in enumerate(buffered):
+            if skip is None or not skip(song):
+                entry = buffered[index]
+                del buffered[index]
+                recent_tracks.release(song)
+                break
+        if len(buffered) <= self.low_watermark:
+            self._schedule_refill(key)
+        return entry
+
+    def size(self, mode: str, difficulty: str) -> int:
+        return len(self._rounds.get((mode, difficulty), ()))
+
+    def _schedule_refill(self, key: tuple[str, str]) -> None:
+        if key in self._refills:
+            return
+        # A fresh context keeps refill timings out of the request that triggered it.
+        self._refills[key] = asyncio.create_task(self._refill(key), context=contextvars.Context())
+
+    async def _refill(self, key: tuple[str, str]) -> None:
+        mode, difficulty = key
+        buffered = self._rounds[key]
+        failures = 0
+        try:
+            while len(buffered) < self.high_watermark and failures < _MAX_CONSECUTIVE_FAILURES:
+                try:
+                    round_, song = await self.builder(mode, difficulty)
+                except HTTPException:
+                    failures += 1
+                    continue
+                failures = 0
+                recent_tracks.pin(song)
+                buffered.append((round_, song))
+            logger.info("Round buffer %s/%s refilled to %s.", mode, difficulty, len(buffered))
+        except Exception:
+            logger.exception("Round buffer refill failed for %s/%s.", mode, difficulty)
+        finally:
+            self._refills.pop(key, None)
+
+    async def close(self) -> None:
+        tasks = list(self._refills.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.gather(*tasks, return_exceptions=True)
+        for buffered in self._rounds.values():
+            for _, song in buffered:
+                recent_tracks.release(song)
+        self._rounds.clear()
@@ -0,0 +1,186 @@
+import json
+import logging
+import mmap
+import os
+import random
+import struct
+import tempfile
+from array import array
+from collections.abc import Callable
+from typing import Any
+
+from app.core.byteorder import from_little_endian, to_little_endian
+from app.core.config import ROUND_PACK_PATH
+from app.core.security import decode_game_token
+from app.schemas.game import NewRoundResponse
+
+logger = logging.getLogger(__name__)
+
+_MAGIC = b"LGRP"
+_FORMAT_VERSION = 1
+# magic, version, groups, rounds
+_HEADER = struct.Struct("<4sBHI")
+# mode code, difficulty code, first round, round count
+_GROUP = struct.Struct("<BBII")
+_MODES = ("artist", "track", "lyrics")
+_DIFFICULTIES = ("easy", "hard")
+
+PackEntry = tuple[NewRoundResponse, dict[str, Any]]
+
+
+def write_round_pack(path: str, entries: list[PackEntry]) -> int:
+    """
+    Writes (round, song) pairs as a round pack, atomically replacing `path`.
+    Rounds are grouped by mode and difficulty; each is stored as one compact
+    JSON record holding the response plus the song's artist and title, which
+    never leave the server. Returns the number of rounds written.
+    """
+    groups: dict[tuple[int, int], list[bytes]] = {}
+    for round_, song in entries:
+        record = {
+            "round": round_.model_dump(),
+            "artist": song["artist"],
+            "title": song["title"],
+        }
+        key = (_MODES.index(round_.round_type), _DIFFICULTIES.index(round_.difficulty))
+        groups.setdefault(key, []).append(
+            json.dumps(record, separators=(",", ":"), ensure_ascii=False).encode()
+        )
+
+    directory = bytearray()
+    offsets = array("Q", [0])
+    records = bytearray()
+    for (mode_code, difficulty_code), group in sorted(groups.items()):
+        directory += _GROUP.pack(mode_code, difficulty_code, len(offsets) - 1, len(group))
+        for record in group:
+            records += record
+            offsets.append(len(records))
+
+    total = len(offsets) - 1
+    path_directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(path_directory, exist_ok=True)
+    with tempfile.NamedTemporaryFile("wb", dir=path_directory, delete=False) as handle:
+        handle.write(_HEADER.pack(_MAGIC, _FORMAT_VERSION, len(groups), total))
+        handle.write(directory)
+        handle.write(to_little_endian(offsets))
+        handle.write(records)
+    os.replace(handle.name, path)
+    return total
+
+
+class RoundPack:
+    """
+    Read-only view of a round pack built by tools/build_round_pack.py. The file
+    is memory-mapped; an offset table gives O(1) access to any round, and only
+    the rounds actually served are read and parsed.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as handle:
+            self._mmap = mmap.mmap(handle.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            self._load()
+        except ValueError:
+            self.close()
+            raise
+
+    def _load(self) -> None:
+        if len(self._mmap) < _HEADER.size:
+            raise ValueError(f"Truncated round pack: {self.path}")
+        magic, version, group_count, total = _HEADER.unpack_from(self._mmap)
+        if magic != _MAGIC or version != _FORMAT_VERSION:
+            raise ValueError(f"Not a version {_FORMAT_VERSION} round pack: {self.path}")
+
+        offsets_size = (total + 1) * 8
+        self._records_start = _HEADER.size + group_count * _GROUP.size + offsets_size
+        if self._records_start > len(self._mmap):
+            raise ValueError(f"Truncated round pack: {self.path}")
+
+        self._groups: dict[tuple[str, str], tuple[int, int]] = {}
+        position = _HEADER.size
+        for _ in range(group_count):
+            mode_code, difficulty_code, first, count = _GROUP.unpack_from(self._mmap, position)
+            self._groups[(_MODES[mode_code], _DIFFICULTIES[difficulty_code])] = (first, count)
+            position += _GROUP.size
+
+        self._offsets = from_little_endian("Q", self._mmap[position : self._records_start])
+        if self._records_start + self._offsets[-1] > len(self._mmap):
+            raise ValueError(f"Truncated round pack: {self.path}")
+        self._total = total
+
+    def __len__(self) -> int:
+        return self._total
+
+    def count(self, mode: str, difficulty: str) -> int:
+        return self._groups.get((mode, difficulty), (0, 0))[1]
+
+    def _record(self, index: int) -> dict[str, Any]:
+        start = self._records_start + self._offsets[index]
+        end = self._records_start + self._offsets[index + 1]
+        return json.loads(self._mmap[start:end])
+
+    def get(self, mode: str, difficulty: str, position: int) -> PackEntry:
+        first, count = self._groups[(mode, difficulty)]
+        if not 0 <= position < count:
+            raise IndexError(position)
+        record = self._record(first + position)
+        song = {"artist": record["artist"], "title": record["title"]}
+        return NewRoundResponse.model_validate(record["round"]), song
+
+    def sample(
+        self,
+        mode: str,
+        difficulty: str,
+        skip: Callable[[dict[str, Any]], bool] | None = None,
+        attempts: int = 16,
+    ) -> PackEntry | None:
+        """
+        Returns a (round, song) of this mode and difficulty whose song `skip` does
+        not reject, scanning up to `attempts` rounds from a random position.
+        """
+        count = self.count(mode, difficulty)
+        if not count:
+            return None
+        start = random.randrange(count)
+        for step in range(min(attempts, count)):
+            entry = self.get(mode, difficulty, (start + step) % count)
+            if skip is None or not skip(entry[1]):
+                return entry
+        return None
+
+    def verify_tokens(self) -> bool:
+        """
+        Checks one token per group against this server's SECRET_KEY, so a pack
+        signed with another key is refused instead of failing every submit.
+        """
+        for mode, difficulty in self._groups:
+            round_, _ = self.get(mode, difficulty, 0)
+            try:
+                decode_game_token(round_.game_token)
+            except Exception:
+                return False
+        return True
+
+    def close(self) -> None:
+        self._mmap.close()
+
+
+def load_round_pack(path: str = ROUND_PACK_PATH) -> RoundPack | None:
+    if not os.path.exists(path):
+        logger.info("No round pack at %s; source=pack is unavailable.", path)
+        return None
+    try:
+        pack = RoundPack(path)
+    except (OSError, ValueError) as exc:
+        logger.warning("Round pack unusable at %s (%s).", path, exc)
+        return None
+    if not pack.verify_tokens():
+        logger.warning("Round pack at %s was signed with a different SECRET_KEY.", path)
+        pack.close()
+        return None
+    logger.info("Round pack loaded: %s rounds from %s", len(pack), path)
+    return pack
+
+
+round_pack = load_round_pack()
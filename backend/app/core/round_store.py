@@ -0,0 +1,148 @@
+import asyncio
+import json
+import logging
+import secrets
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Protocol
+
+from app.core.config import (
+    ROUND_STORE_BACKEND,
+    ROUND_STORE_DB_PATH,
+    ROUND_STORE_MAX_ROUNDS,
+    ROUND_STORE_TTL,
+)
+
+# Round IDs are distinguishable from signed tokens without any crypto work.
+ROUND_ID_PREFIX = "r."
+_PRUNE_EVERY = 256
+logger = logging.getLogger(__name__)
+
+
+def _new_round_id() -> str:
+    return ROUND_ID_PREFIX + secrets.token_urlsafe(9)
+
+
+def is_round_id(token: str) -> bool:
+    return token.startswith(ROUND_ID_PREFIX)
+
+
+class RoundStore(Protocol):
+    async def put(self, state: dict[str, Any]) -> str: ...
+
+    async def get(self, round_id: str) -> dict[str, Any] | None: ...
+
+    async def take(self, round_id: str) -> dict[str, Any] | None: ...
+
+
+class MemoryRoundStore:
+    """
+    Bounded, TTL-evicting in-process round store. Every round shares the same
+    TTL, so insertion order is expiry order and eviction is O(1) from the front.
+    """
+
+    def __init__(self, max_rounds: int, ttl: float):
+        self.max_rounds = max_rounds
+        self.ttl = ttl
+        self._rounds: OrderedDict[str, tuple[dict[str, Any], float]] = OrderedDict()
+
+    async def put(self, state: dict[str, Any]) -> str:
+        now = time.monotonic()
+        while self._rounds:
+            _, (_, expires_at) = next(iter(self._rounds.items()))
+            if expires_at > now and len(self._rounds) < self.max_rounds:
+                break
+            self._rounds.popitem(last=False)
+        round_id = _new_round_id()
+        self._rounds[round_id] = (state, now + self.ttl)
+        return round_id
+
+    async def get(self, round_id: str) -> dict[str, Any] | None:
+        entry = self._rounds.get(round_id)
+        if entry is None or entry[1] <= time.monotonic():
+            return None
+        return entry[0]
+
+    async def take(self, round_id: str) -> dict[str, Any] | None:
+        entry = self._rounds.pop(round_id, None)
+        if entry is None or entry[1] <= time.monotonic():
+            return None
+        return entry[0]
+
+
+class SQLiteRoundStore:
+    """
+    Round store in a local SQLite file, shared by every worker on the host.
+    `take` deletes the row it returns, so a round can only be submitted once.
+    Queries run in a worker thread so they never block the event loop.
+    """
+
+    def __init__(self, path: str, max_rounds: int, ttl: float):
+        self.path = path
+        self.max_rounds = max_rounds
+        self.ttl = ttl
+        self._puts = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS rounds ("
+            "id TEXT PRIMARY KEY, state TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        self._db.execute("CREATE INDEX IF NOT EXISTS rounds_expires_at ON rounds (expires_at)")
+
+    def _prune(self, now: float) -> None:
+        self._db.execute("DELETE FROM rounds WHERE expires_at <= ?", (now,))
+        self._db.execute(
+            "DELETE FROM rounds WHERE id IN ("
+            "SELECT id FROM rounds ORDER BY expires_at DESC LIMIT -1 OFFSET ?)",
+            (self.max_rounds,),
+        )
+
+    def _put(self, state: dict[str, Any]) -> str:
+        now = time.time()
+        round_id = _new_round_id()
+        with self._lock:
+            self._puts += 1
+            if self._puts % _PRUNE_EVERY == 0:
+                self._prune(now)
+            self._db.execute(
+                "INSERT INTO rounds (id, state, expires_at) VALUES (?, ?, ?)",
+                (round_id, json.dumps(state, separators=(",", ":")), now + self.ttl),
+            )
+        return round_id
+
+    def _query(self, sql: str, round_id: str) -> dict[str, Any] | None:
+        with self._lock:
+            row = self._db.execute(sql, (round_id,)).fetchone()
+        if row is None or row[1] <= time.time():
+            return None
+        return json.loads(row[0])
+
+    async def put(self, state: dict[str, Any]) -> str:
+        return await asyncio.to_thread(self._put, state)
+
+    async def get(self, round_id: str) -> dict[str, Any] | None:
+        return await asyncio.to_thread(
+            self._query, "SELECT state, expires_at FROM rounds WHERE id = ?", round_id
+        )
+
+    async def take(self, round_id: str) -> dict[str, Any] | None:
+        return await asyncio.to_thread(
+            self._query, "DELETE FROM rounds WHERE id = ? RETURNING state, expires_at", round_id
+        )
+
+
+def create_round_store(backend: str = ROUND_STORE_BACKEND) -> RoundStore | None:
+    if backend == "memory":
+        return MemoryRoundStore(ROUND_STORE_MAX_ROUNDS, ROUND_STORE_TTL)
+    if backend == "sqlite":
+        return SQLiteRoundStore(ROUND_STORE_DB_PATH, ROUND_STORE_MAX_ROUNDS, ROUND_STORE_TTL)
+    if backend != "token":
+        logger.warning("Unknown ROUND_STORE_BACKEND %r; using signed tokens.", backend)
+    return None
+
+
+round_store = create_round_store()
@@ -0,0 +1,54 @@
+import re
+import unicodedata
+from functools import lru_cache
+
+from rapidfuzz import fuzz
+
+from app.core.config import LYRICS_BLANK_FUZZY_THRESHOLD
+
+# "Song (feat. X)", "Song [ft X]", "Artist feat. X", "Artist featuring X"
+_FEATURING = re.compile(
+    r"(?:\s*[(\[]\s*(?:feat\.?|ft\.?|featuring)\s|\s+(?:feat\.|ft\.|featuring)\s).*$",
+    re.IGNORECASE,
+)
+_PUNCTUATION = re.compile(r"[^\w\s]|_")
+_WHITESPACE = re.compile(r"\s+")
+
+
+@lru_cache(maxsize=4096)
+def normalize_answer(text: str) -> str:
+    """
+    Folds case, strips accents and punctuation and drops "feat." suffixes,
+    so "Beyoncé (feat. JAY-Z)" and "beyonce" compare equal and "don't" == "dont".
+    """
+    stripped = _FEATURING.sub("", text)
+    folded = unicodedata.normalize("NFKD", stripped.casefold())
+    folded = "".join(char for char in folded if not unicodedata.combining(char))
+    folded = _PUNCTUATION.sub("", folded)
+    normalized = _WHITESPACE.sub(" ", folded).strip()
+    # Titles made only of punctuation would otherwise normalize to nothing.
+    return normalized or text.casefold().strip()
+
+
+def score_guess(guess: str, normalized_answer: str) -> int:
+    return round(fuzz.ratio(normalize_answer(guess), normalized_answer))
+
+
+def score_blanks(
+    guesses: list[str],
+    normalized_answers: list[str],
+    fuzzy_threshold: int = LYRICS_BLANK_FUZZY_THRESHOLD,
+) -> list[bool]:
+    """
+    Scores every blank of a lyrics round in one pass over the pairs.
+    A blank matches when the normalized guess equals the normalized answer or,
+    with `fuzzy_threshold` > 0, is at least that similar.
+    """
+    results = []
+    for guess, answer in zip(guesses, normalized_answers):
+        normalized_guess = normalize_answer(guess)
+        matched = normalized_guess == answer
+        if not matched and fuzzy_threshold > 0:
+            matched = fuzz.ratio(normalized_guess, answer, score_cutoff=fuzzy_threshold) > 0
+        results.append(matched)
+    return results
@@ -1,13 +1,97 @@
-from itsdangerous import URLSafeSerializer
+import base64
+import json
+import zlib
+
+from itsdangerous import Signer, URLSafeSerializer
 
 from .config import SECRET_KEY
 
+# Legacy tokens: URLSafeSerializer over the full JSON payload. Still accepted.
 _serializer = URLSafeSerializer(SECRET_KEY)
 
+# Compact v2 tokens: "v2." + flag + base64(body) + "." + signature, where the body
+# is JSON with short field codes, enum-coded mode/difficulty and the answer words
+# space-joined, raw-deflated ("z" flag) whenever that makes it smaller ("j" otherwise).
+_TOKEN_PREFIX = "v2."
+_signer = Signer(SECRET_KEY, salt="game-token-v2")
+
+_FIELD_CODES = {
+    "artist": "a",
+    "title": "t",
+    "round_type": "m",
+    "difficulty": "d",
+    "lyrics_answers": "w",
+    "normalized_answer": "n",
+    "normalized_answers": "x",
+}
+# Lists of single words, stored space-joined.
+_WORD_LISTS = {"lyrics_answers", "normalized_answers"}
+_FIELD_NAMES = {code: name for name, code in _FIELD_CODES.items()}
+_ENUMS = {
+    "round_type": ("artist", "track", "lyrics"),
+    "difficulty": ("easy", "hard"),
+}
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode("ascii")
+
+
+def _b64decode(data: str) -> bytes:
+    return base64.urlsafe_b64decode(data + "=" * (-len(data) % 4))
+
+
+def _pack(payload: dict) -> dict:
+    packed = {}
+    for name, value in payload.items():
+        if value == []:
+            # Artist/track rounds carry no answers; decoders default to [].
+            continue
+        if name in _WORD_LISTS and not any(" " in word for word in value):
+            # Space-joining is much shorter than a JSON array, and lossless while no
+            # word holds a space. Normalization can add some (NFKD turns a ligature
+            # like "ﷺ" into four words), so such lists stay JSON arrays.
+            value = " ".join(value)
+        values = _ENUMS.get(name)
+        if values is not None and value in values:
+            value = values.index(value)
+        packed[_FIELD_CODES.get(name, name)] = value
+    return packed
+
+
+def _unpack(packed: dict) -> dict:
+    payload = {}
+    for code, value in packed.items():
+        name = _FIELD_NAMES.get(code, code)
+        if name in _WORD_LISTS and isinstance(value, str):
+            value = value.split(" ")
+        values = _ENUMS.get(name)
+        if values is not None and isinstance(value, int):
+            value = values[value]
+        payload[name] = value
+    return payload
+
 
 def create_game_token(payload: dict) -> str:
-    return _serializer.dumps(payload)
+    body = json.dumps(_pack(payload), separators=(",", ":"), ensure_ascii=False).encode("utf-8")
+    compressor = zlib.compressobj(9, zlib.DEFLATED, -zlib.MAX_WBITS)
+    compressed = compressor.compress(body) + compressor.flush()
+    if len(compressed) < len(body):
+        value = f"{_TOKEN_PREFIX}z{_b64encode(compressed)}"
+    else:
+        value = f"{_TOKEN_PREFIX}j{_b64encode(body)}"
+    return _signer.sign(value).decode("ascii")
 
 
 def decode_game_token(token: str) -> dict:
-    return _serializer.loads(token)
+    if not token.startswith(_TOKEN_PREFIX):
+        return _serializer.loads(token)
+
+    value = _signer.unsign(token).decode("ascii")[len(_TOKEN_PREFIX):]
+    flag, encoded = value[:1], value[1:]
+    body = _b64decode(encoded)
+    if flag == "z":
+        body = zlib.decompress(body, -zlib.MAX_WBITS)
+    elif flag != "j":
+        raise ValueError("Unknown game token encoding.")
+    return _unpack(json.loads(body))
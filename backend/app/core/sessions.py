@@ -0,0 +1,82 @@
+import hashlib
+import time
+from array import array
+from collections import OrderedDict
+from typing import Any
+
+from app.core.config import SESSION_MAX_SEEN, SESSION_MAX_SESSIONS, SESSION_TTL
+from app.core.recent_tracks import track_key
+
+
+def _fingerprint(song: dict[str, Any]) -> int:
+    digest = hashlib.blake2b(track_key(song).encode(), digest_size=4).digest()
+    return int.from_bytes(digest, "little")
+
+
+class _Session:
+    __slots__ = ("seen", "cursor", "expires_at")
+
+    def __init__(self, expires_at: float):
+        self.seen = array("I")
+        self.cursor = 0
+        self.expires_at = expires_at
+
+
+class SessionHistory:
+    """
+    Songs each player session has already been served, so pickers can skip them.
+    A session keeps the 32-bit fingerprints of its last `max_seen` songs in a
+    ring buffer (4 bytes each); sessions expire `ttl` seconds after last use and
+    the least recently used are evicted beyond `max_sessions`.
+    """
+
+    def __init__(self, max_sessions: int, ttl: float, max_seen: int):
+        self.max_sessions = max_sessions
+        self.ttl = ttl
+        self.max_seen = max(1, max_seen)
+        self._sessions: OrderedDict[str, _Session] = OrderedDict()
+
+    def _get(self, session_id: str, now: float) -> _Session | None:
+        session = self._sessions.get(session_id)
+        if session is None:
+            return None
+        if session.expires_at <= now:
+            del self._sessions[session_id]
+            return None
+        return session
+
+    def has_seen(self, session_id: str | None, song: dict[str, Any]) -> bool:
+        if session_id is None:
+            return False
+        session = self._get(session_id, time.monotonic())
+        # A scan of at most `max_seen` uint32s in C takes microseconds; a set
+        # beside the ring would cost ~25x the memory per session.
+        return session is not None and _fingerprint(song) in session.seen
+
+    def mark_seen(self, session_id: str | None, song: dict[str, Any]) -> None:
+        if session_id is None:
+            return
+        now = time.monotonic()
+        session = self._get(session_id, now)
+        if session is None:
+            session = self._sessions[session_id] = _Session(now + self.ttl)
+            # New sessions evict expired ones from the LRU end first, then the oldest.
+            while self._sessions:
+                oldest_id, oldest = next(iter(self._sessions.items()))
+                if oldest.expires_at > now and len(self._sessions) <= self.max_sessions:
+                    break
+                del self._sessions[oldest_id]
+        self._sessions.move_to_end(session_id)
+        session.expires_at = now + self.ttl
+
+        fingerprint = _fingerprint(song)
+        if fingerprint in session.seen:
+            return
+        if len(session.seen) < self.max_seen:
+            session.seen.append(fingerprint)
+        else:
+            session.seen[session.cursor] = fingerprint
+            session.cursor = (session.cursor + 1) % self.max_seen
+
+
+session_history = SessionHistory(SESSION_MAX_SESSIONS, SESSION_TTL, SESSION_MAX_SEEN)
@@ -1,68 +1,213 @@
+import asyncio
 import logging
-import random
-from collections import deque
+from collections.abc import Awaitable, Callable
+from functools import partial
 from typing import Any
 
-from app.core.config import SONG_DATABASE
+import httpx
+
+from app.core.catalog import pick_fallback_song
+from app.core.config import SONG_PICKER_HEDGE_DELAY, SONG_PICKER_HEDGED
+from app.core.deadline import Deadline, is_expired
 from app.core.deezer import get_random_song as get_deezer_song
+from app.core.deezer import get_random_songs as get_deezer_songs
+from app.core.health import SourceHealth, choose_weighted
+from app.core.http import get_client
 from app.core.itunes import get_top_song as get_itunes_song
+from app.core.itunes import get_top_songs as get_itunes_songs
+from app.core.metrics import fallbacks, retries, timed
+from app.core.recent_tracks import NO_FRESH_TRACKS, recent_tracks
+from app.core.sessions import session_history
+
+Provider = tuple[Callable[..., Awaitable[Any]], httpx.AsyncClient, SourceHealth]
+
+# Static 70/30 split kept as priors; live health scales them.
+_deezer_health = SourceHealth("deezer", prior=70)
+_itunes_health = SourceHealth("itunes", prior=30)
 
-_RECENT_TRACKS_MAX = 50
-_recent_track_keys: deque[str] = deque()
-_recent_track_set: set[str] = set()
 logger = logging.getLogger(__name__)
 
 
-def _track_key(song: dict[str, Any]) -> str:
-    artist = song.get("artist", "").strip().lower()
-    title = song.get("title", "").strip().lower()
-    return f"{artist}::{title}"
+def get_health_stats() -> dict[str, dict[str, Any]]:
+    return {
+        health.name: health.snapshot()
+        for health in (_deezer_health, _itunes_health)
+    }
+
+
+def _is_excluded(song: dict[str, Any], session_id: str | None = None) -> bool:
+    return recent_tracks.is_recent(song) or session_history.has_seen(session_id, song)
+
+
+def _provider_outcome(result: Any) -> bool | None:
+    # Running out of fresh tracks is not the provider's fault: leave its health alone.
+    if result is NO_FRESH_TRACKS:
+        return None
+    return bool(result)
+
+
+def _choose_provider(providers: list[Provider]) -> Provider | None:
+    return choose_weighted(providers, lambda provider: provider[2])
 
 
-def _is_recent(song: dict[str, Any]) -> bool:
-    return _track_key(song) in _recent_track_set
+async def _call_provider(
+    provider: Provider,
+    *args: Any,
+    deadline: Deadline | None = None,
+) -> Any:
+    fn, client, health = provider
+    logger.debug("Song provider selected: %s", health.name)
+    with timed("provider", health.name):
+        return await health.call(
+            lambda: fn(*args, client=client, deadline=deadline),
+            is_success=_provider_outcome,
+            deadline=deadline,
+        )
 
 
-def _mark_recent(song: dict[str, Any]) -> None:
-    key = _track_key(song)
-    if key in _recent_track_set:
-        return
-    if len(_recent_track_keys) >= _RECENT_TRACKS_MAX:
-        oldest = _recent_track_keys.popleft()
-        _recent_track_set.discard(oldest)
-    _recent_track_keys.append(key)
-    _recent_track_set.add(key)
+async def _hedged_pick(
+    providers: list[Provider],
+    hedge_delay: float,
+    deadline: Deadline | None = None,
+    session_id: str | None = None,
+) -> dict[str, Any] | None:
+    """
+    Starts the weighted provider, then races a backup provider against it if no
+    usable song has arrived after `hedge_delay` seconds (or the first one came
+    back empty). The first valid, non-recent song wins; the rest are cancelled.
+    """
+    backups = list(providers)
+    pending: set[asyncio.Task] = set()
 
+    def launch() -> None:
+        provider = _choose_provider(backups)
+        if provider is None:
+            backups.clear()
+            return
+        backups.remove(provider)
+        pending.add(asyncio.create_task(_call_provider(provider, deadline=deadline)))
 
-async def get_random_song(max_attempts: int = 6) -> dict[str, Any]:
-    providers = [
-        (get_deezer_song, 70),
-        (get_itunes_song, 30),
+    launch()
+    try:
+        while pending:
+            timeout = hedge_delay if backups else None
+            if deadline is not None:
+                remaining = deadline.remaining()
+                timeout = remaining if timeout is None else min(timeout, remaining)
+            done, _ = await asyncio.wait(
+                pending,
+                timeout=timeout,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+            if not done:
+                if is_expired(deadline):
+                    logger.debug("Song pick abandoned (deadline spent).")
+                    return None
+                logger.debug("Song provider slow after %ss; hedging.", hedge_delay)
+                launch()
+                continue
+            for task in done:
+                pending.discard(task)
+                song = task.result()
+                if not song:
+                    continue
+                if _is_excluded(song, session_id):
+                    logger.debug("Track skipped (recent or seen): %s - %s", song["artist"], song["title"])
+                    continue
+                return song
+            if backups and not pending:
+                launch()
+    finally:
+        for task in pending:
+            task.cancel()
+    return None
+
+
+async def get_random_song(
+    max_attempts: int = 6,
+    deezer_client: httpx.AsyncClient | None = None,
+    itunes_client: httpx.AsyncClient | None = None,
+    hedged: bool = SONG_PICKER_HEDGED,
+    deadline: Deadline | None = None,
+    session_id: str | None = None,
+) -> dict[str, Any]:
+    """
+    Picks a track that is neither recent nor already seen by `session_id`,
+    falling back to the song catalog when the providers come up empty.
+    """
+    providers: list[Provider] = [
+        (
+            partial(get_deezer_song, fallback=False),
+            deezer_client or get_client("deezer"),
+            _deezer_health,
+        ),
+        (get_itunes_song, itunes_client or get_client("itunes"), _itunes_health),
     ]
 
     attempts = 0
-    while attempts < max_attempts:
+    while attempts < max_attempts and not is_expired(deadline):
         attempts += 1
-        provider = random.choices(
-            [provider for provider, _ in providers],
-            weights=[weight for _, weight in providers],
-            k=1,
-        )[0]
-        logger.info("Song provider selected: %s", provider.__name__)
-        song = await provider()
+        if attempts > 1:
+            retries.inc(component="song_picker")
+        if hedged:
+            song = await _hedged_pick(providers, SONG_PICKER_HEDGE_DELAY, deadline, session_id)
+        else:
+            provider = _choose_provider(providers)
+            if provider is None:
+                logger.warning("All song providers unavailable (circuits open).")
+                break
+            song = await _call_provider(provider, deadline=deadline)
         if not song:
             continue
-        if _is_recent(song):
-            logger.info("Track skipped (recent): %s - %s", song["artist"], song["title"])
+        if _is_excluded(song, session_id):
+            logger.debug("Track skipped (recent or seen): %s - %s", song["artist"], song["title"])
             continue
-        _mark_recent(song)
-        logger.info("Track selected: %s - %s", song["artist"], song["title"])
+        recent_tracks.mark(song)
+        logger.debug("Track selected: %s - %s", song["artist"], song["title"])
         return song
 
-    fallback_pool = [song for song in SONG_DATABASE if not _is_recent(song)]
-    if not fallback_pool:
-        fallback_pool = SONG_DATABASE
-    selection = random.choice(fallback_pool)
-    _mark_recent(selection)
+    fallbacks.inc(component="song_picker")
+    selection = pick_fallback_song(partial(_is_excluded, session_id=session_id))
+    recent_tracks.mark(selection)
     logger.info("Fallback track selected: %s - %s", selection["artist"], selection["title"])
     return selection
+
+
+async def get_random_songs(
+    count: int,
+    max_attempts: int = 3,
+    deezer_client: httpx.AsyncClient | None = None,
+    itunes_client: httpx.AsyncClient | None = None,
+    deadline: Deadline | None = None,
+    session_id: str | None = None,
+    mark_recent: bool = True,
+) -> list[dict[str, Any]]:
+    """
+    Picks up to `count` distinct tracks, neither recent nor seen by `session_id`,
+    using batched provider listings. May return fewer than `count`; callers pick the rest one by one.
+    With `mark_recent` off the caller marks the tracks it actually serves.
+    """
+    providers: list[Provider] = [
+        (get_deezer_songs, deezer_client or get_client("deezer"), _deezer_health),
+        (get_itunes_songs, itunes_client or get_client("itunes"), _itunes_health),
+    ]
+
+    songs: list[dict[str, Any]] = []
+    attempts = 0
+    while len(songs) < count and attempts < max_attempts and not is_expired(deadline):
+        attempts += 1
+        if attempts > 1:
+            retries.inc(component="song_picker")
+        provider = _choose_provider(providers)
+        if provider is None:
+            logger.warning("All song providers unavailable (circuits open).")
+            break
+        for song in await _call_provider(provider, count - len(songs), deadline=deadline):
+            if _is_excluded(song, session_id):
+                continue
+            if mark_recent:
+                recent_tracks.mark(song)
+            songs.append(song)
+
+    logger.debug("Batch selected %s/%s tracks.", len(songs), count)
+    return songs
@@ -1,17 +1,27 @@
-import logging
+from contextlib import asynccontextmanager
 
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from mangum import Mangum
 
 from app.api.v1.api import api_router
+from app.api.v1.endpoints.game import round_buffer
+from app.core.http import close_clients, open_clients
+from app.core.log import RequestIdMiddleware, configure_logging
+
+configure_logging()
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI):
+    open_clients()
+    yield
+    if round_buffer is not None:
+        await round_buffer.close()
+    await close_clients()
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s %(levelname)s [%(name)s] %(message)s",
-)
 
-app = FastAPI(title="Lyrics Guesser API")
+app = FastAPI(title="Lyrics Guesser API", lifespan=lifespan)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["*"],
@@ -19,6 +29,9 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(RequestIdMiddleware)
 app.include_router(api_router, prefix="/api")
 
-handler = Mangum(app)
+# Lifespan is off under Mangum: it would run per invocation and close the pooled
+# clients, which are instead created lazily and kept across warm invocations.
+handler = Mangum(app, lifespan="off")
@@ -9,7 +9,7 @@ class BlankMetadata(BaseModel):
 
 
 class NewRoundResponse(BaseModel):
-    game_token: str       # Encrypted token containing the answer
+    game_token: str       # Signed token with the answer, or a short server-side round ID
     masked_lyrics: str    # The lyrics with words hidden
     hint_length: int      # Length of the artist name (e.g. 5 for "Adele")
     round_type: str       # artist, track, lyrics
@@ -36,3 +36,16 @@ class GuessResult(BaseModel):
     message: str          # Feedback message ("Correct!", "So close!", etc.)
     round_type: str
     correct_words: list[str] = Field(default_factory=list)
+
+
+class BatchGuessRequest(BaseModel):
+    guesses: list[GuessRequest] = Field(min_length=1, max_length=20)
+
+
+class BatchGuessItem(BaseModel):
+    result: GuessResult | None = None  # Set when the guess was scored
+    error: str | None = None           # Set when this guess was rejected
+
+
+class BatchGuessResponse(BaseModel):
+    results: list[BatchGuessItem]     # Same order as the submitted guesses
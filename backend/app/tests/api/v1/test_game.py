@@ -0,0 +1,563 @@
+import asyncio
+import time
+from collections import deque
+
+import httpx
+from fastapi import HTTPException
+
+from app.api.deps import get_lyrics_client
+from app.api.v1.endpoints import game
+from app.core import catalog, lyrics, round_pack, song_picker
+from app.core.deadline import Deadline
+from app.core.round_buffer import RoundBuffer
+from app.core.round_store import MemoryRoundStore, is_round_id
+from app.core.recent_tracks import BloomGeometry, MemoryRecentTracks
+from app.core.security import create_game_token, decode_game_token
+from app.core.sessions import session_history
+from app.main import app
+
+
+def _timed_queue(
+    client,
+    count: int,
+    concurrency: int,
+    deadline: Deadline | None = None,
+) -> tuple[list, float]:
+    start = time.perf_counter()
+    rounds = asyncio.run(
+        game._build_round_queue(
+            client,
+            count=count,
+            mode="artist",
+            difficulty="easy",
+            concurrency=concurrency,
+            deadline=deadline,
+        )
+    )
+    return rounds, time.perf_counter() - start
+
+
+def test_queue_concurrent_build_is_faster_than_sequential(stub_song_picker, lyrics_client):
+    sequential_rounds, sequential_elapsed = _timed_queue(lyrics_client, count=8, concurrency=1)
+    concurrent_rounds, concurrent_elapsed = _timed_queue(lyrics_client, count=8, concurrency=4)
+
+    assert len(sequential_rounds) == 8
+    assert len(concurrent_rounds) == 8
+    assert concurrent_elapsed < sequential_elapsed / 2
+
+
+def test_queue_stops_scheduling_once_count_is_reached(
+    monkeypatch,
+    stub_song_picker,
+    lyrics_client,
+):
+    builds = 0
+    real_build_round_entry = game._build_round_entry
+
+    async def counting_build_round_entry(client, mode, difficulty, **kwargs):
+        nonlocal builds
+        builds += 1
+        return await real_build_round_entry(client, mode=mode, difficulty=difficulty, **kwargs)
+
+    monkeypatch.setattr(game, "_build_round_entry", counting_build_round_entry)
+    rounds, _ = _timed_queue(lyrics_client, count=5, concurrency=10)
+
+    assert len(rounds) == 5
+    assert builds == 5
+
+
+def test_queue_skips_failed_rounds_within_attempt_budget(
+    monkeypatch,
+    stub_song_picker,
+    lyrics_client,
+):
+    calls = 0
+    real_build_round_entry = game._build_round_entry
+
+    async def flaky_build_round_entry(client, mode, difficulty, **kwargs):
+        nonlocal calls
+        calls += 1
+        if calls % 2:
+            raise HTTPException(status_code=503, detail="Could not fetch lyrics provider.")
+        return await real_build_round_entry(client, mode=mode, difficulty=difficulty, **kwargs)
+
+    monkeypatch.setattr(game, "_build_round_entry", flaky_build_round_entry)
+    rounds, _ = _timed_queue(lyrics_client, count=5, concurrency=3)
+
+    assert len(rounds) == 5
+    assert 5 < calls <= 15
+
+
+def test_queue_consumes_batched_candidates_before_single_picks(monkeypatch, lyrics_client):
+    single_picks = 0
+
+    async def fake_get_random_songs(count, deadline=None, session_id=None, mark_recent=True):
+        return [
+            {"artist": f"Batch {index}", "title": "Title", "album_cover": None}
+            for index in range(count)
+        ]
+
+    async def fake_get_random_song(deadline=None, session_id=None):
+        nonlocal single_picks
+        single_picks += 1
+        return {"artist": "Single", "title": "Title", "album_cover": None}
+
+    monkeypatch.setattr(game, "get_random_songs", fake_get_random_songs)
+    monkeypatch.setattr(game, "get_random_song", fake_get_random_song)
+    rounds, _ = _timed_queue(lyrics_client, count=6, concurrency=3)
+
+    assert len(rounds) == 6
+    assert single_picks == 0
+
+
+def test_queue_returns_partial_results_when_deadline_is_spent(
+    stub_song_picker,
+    lyrics_client,
+):
+    # Each round takes two upstream delays; the budget covers roughly two waves.
+    rounds, elapsed = _timed_queue(
+        lyrics_client,
+        count=10,
+        concurrency=2,
+        deadline=Deadline(0.45),
+    )
+
+    assert 0 < len(rounds) < 10
+    assert elapsed < 0.7
+
+
+def test_queue_stream_yields_first_round_before_queue_finishes(stub_song_picker, lyrics_client):
+    async def first_round_and_total() -> tuple[float, float]:
+        start = time.perf_counter()
+        stream = game._iter_round_queue(
+            lyrics_client,
+            count=8,
+            mode="artist",
+            difficulty="easy",
+            concurrency=2,
+        )
+        first = None
+        async for _ in stream:
+            if first is None:
+                first = time.perf_counter() - start
+        return first, time.perf_counter() - start
+
+    first, total = asyncio.run(first_round_and_total())
+
+    assert first < total / 2
+
+
+def test_queue_stream_cancels_pending_builds_when_closed(stub_song_picker, lyrics_client):
+    async def calls_before_and_after_close() -> tuple[int, int]:
+        stream = game._iter_round_queue(
+            lyrics_client,
+            count=8,
+            mode="artist",
+            difficulty="easy",
+            concurrency=4,
+        )
+        await anext(stream)
+        await stream.aclose()
+        calls_at_close = lyrics_client.calls
+        await asyncio.sleep(0.3)
+        return calls_at_close, lyrics_client.calls
+
+    calls_at_close, calls_later = asyncio.run(calls_before_and_after_close())
+
+    assert calls_later == calls_at_close
+
+
+def test_rounds_vary_the_passage_and_keep_line_breaks(monkeypatch, long_lyrics_client):
+    async def same_song(deadline=None, session_id=None):
+        return {"artist": "Artist", "title": "Title", "album_cover": None}
+
+    monkeypatch.setattr(game, "get_random_song", same_song)
+
+    async def build_rounds() -> list:
+        return [
+            await game._build_round(long_lyrics_client, mode="artist", difficulty="easy")
+            for _ in range(12)
+        ]
+
+    rounds = asyncio.run(build_rounds())
+    openings = {round_.masked_lyrics.split("\n", 1)[0] for round_ in rounds}
+
+    assert len(openings) > 1
+    assert all(len(round_.masked_lyrics) <= 503 for round_ in rounds)
+    assert all("\n" in round_.masked_lyrics for round_ in rounds)
+
+
+def test_new_round_reports_request_id_stage_timings_and_metrics(stub_song_picker, lyrics_client):
+    app.dependency_overrides[get_lyrics_client] = lambda: lyrics_client
+
+    async def new_round_then_metrics() -> tuple[httpx.Response, httpx.Response]:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            round_response = await client.get(
+                "/api/game/new",
+                params={"mode": "lyrics"},
+                headers={"X-Request-ID": "test-request"},
+            )
+            return round_response, await client.get("/api/metrics")
+
+    try:
+        round_response, metrics_response = asyncio.run(new_round_then_metrics())
+    finally:
+        app.dependency_overrides.clear()
+
+    assert round_response.status_code == 200
+    assert round_response.headers["X-Request-ID"] == "test-request"
+    stages = {entry.split(";")[0] for entry in round_response.headers["Server-Timing"].split(", ")}
+    assert {"song_pick", "lyrics", "mask", "sign", "total"} <= stages
+    assert 'lyrics_guesser_stage_duration_seconds_count{stage="lyrics",source=""}' in metrics_response.text
+    assert 'lyrics_guesser_cache_lookups_total{cache="lyrics",result="miss"}' in metrics_response.text
+
+
+def test_song_picker_skips_songs_the_session_has_seen(monkeypatch):
+    seen = {"artist": "Session Artist", "title": "Already Seen"}
+    fresh = {"artist": "Session Artist", "title": "Fresh"}
+    picks = iter([dict(seen), dict(seen), dict(fresh)])
+
+    async def fake_provider(client=None, deadline=None, fallback=True):
+        return next(picks)
+
+    monkeypatch.setattr(song_picker, "get_deezer_song", fake_provider)
+    monkeypatch.setattr(song_picker, "get_itunes_song", fake_provider)
+    session_history.mark_seen("player-1", seen)
+
+    song = asyncio.run(song_picker.get_random_song(hedged=False, session_id="player-1"))
+
+    assert song == fresh
+    assert session_history.has_seen("player-1", seen)
+    assert not session_history.has_seen("player-2", seen)
+
+
+def test_buffered_rounds_seen_by_the_session_are_skipped(monkeypatch):
+    async def failing_builder(mode, difficulty):
+        raise HTTPException(status_code=503, detail="offline")
+
+    def make_round(token: str) -> game.NewRoundResponse:
+        return game.NewRoundResponse(
+            game_token=token,
+            masked_lyrics="...",
+            hint_length=1,
+            round_type="artist",
+            difficulty="easy",
+        )
+
+    first = {"artist": "Buffered", "title": "First"}
+    second = {"artist": "Buffered", "title": "Second"}
+    buffer = RoundBuffer(failing_builder, high_watermark=3, low_watermark=1)
+    buffer._rounds[("artist", "easy")] = deque([(make_round("a"), first), (make_round("b"), second)])
+    monkeypatch.setattr(game, "round_buffer", buffer)
+    session_history.mark_seen("player-3", first)
+
+    async def pop() -> tuple[game.NewRoundResponse | None, int]:
+        round_ = await game._pop_buffered_round("artist", "easy", session_id="player-3")
+        remaining = buffer.size("artist", "easy")
+        await buffer.close()
+        return round_, remaining
+
+    round_, remaining = asyncio.run(pop())
+
+    assert round_.game_token == "b"
+    assert remaining == 1
+    assert session_history.has_seen("player-3", second)
+
+
+def test_song_catalog_serves_fallback_picks_and_lyrics_offline(monkeypatch, tmp_path):
+    path = str(tmp_path / "song-catalog.bin")
+    entries = [
+        ({"artist": "Catalog Artist", "title": f"Track {index}"}, f"Words of track {index}")
+        for index in range(3)
+    ]
+    assert catalog.write_catalog(path, entries + entries[:1]) == 3
+    song_catalog = catalog.SongCatalog(path)
+    monkeypatch.setattr(catalog, "song_catalog", song_catalog)
+    monkeypatch.setattr(lyrics, "song_catalog", song_catalog)
+
+    picks = {
+        catalog.pick_fallback_song(lambda song: song["title"] == "Track 0")["title"]
+        for _ in range(50)
+    }
+    lyrics_text = asyncio.run(lyrics.fetch_lyrics(None, "catalog artist", "TRACK 2"))
+    song_catalog.close()
+
+    assert picks == {"Track 1", "Track 2"}
+    assert lyrics_text == "Words of track 2"
+
+
+def test_pack_source_serves_prebuilt_rounds_without_upstream_calls(
+    monkeypatch, tmp_path, stub_song_picker, lyrics_client
+):
+    async def build_entries() -> list:
+        return [
+            await game._build_round_entry(lyrics_client, mode="lyrics", difficulty="easy")
+            for _ in range(6)
+        ]
+
+    path = str(tmp_path / "round-pack.bin")
+    assert round_pack.write_round_pack(path, asyncio.run(build_entries())) == 6
+    pack = round_pack.RoundPack(path)
+    assert pack.verify_tokens()
+    monkeypatch.setattr(game, "round_pack", pack)
+
+    async def no_upstream(*args, **kwargs):
+        raise AssertionError("pack rounds must not call upstreams")
+
+    monkeypatch.setattr(game, "get_random_song", no_upstream)
+    monkeypatch.setattr(game, "get_random_songs", no_upstream)
+    lyrics_client.calls = 0
+    app.dependency_overrides[get_lyrics_client] = lambda: lyrics_client
+    params = {"mode": "lyrics", "source": "pack", "session_id": "pack-player"}
+
+    async def play() -> tuple[httpx.Response, httpx.Response, httpx.Response]:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            queue = await client.get("/api/game/queue", params={**params, "count": 5})
+            new = await client.get("/api/game/new", params=params)
+            round_ = new.json()
+            submit = await client.post(
+                "/api/game/submit",
+                json={"game_token": round_["game_token"], "give_up": True, "user_guess": []},
+            )
+            return queue, new, submit
+
+    try:
+        queue, new, submit = asyncio.run(play())
+    finally:
+        app.dependency_overrides.clear()
+        pack.close()
+
+    rounds = queue.json()["rounds"] + [new.json()]
+    assert queue.status_code == new.status_code == submit.status_code == 200
+    assert len({round_["game_token"] for round_ in rounds}) == 6
+    assert len(submit.json()["correct_words"]) == len(new.json()["blanks_metadata"])
+    assert lyrics_client.calls == 0
+
+
+def test_new_round_is_served_from_an_enabled_round_buffer(monkeypatch, stub_song_picker, lyrics_client):
+    buffer = RoundBuffer(
+        lambda mode, difficulty: game._build_round_entry(lyrics_client, mode=mode, difficulty=difficulty),
+        high_watermark=2,
+        low_watermark=0,
+    )
+    monkeypatch.setattr(game, "round_buffer", buffer)
+    app.dependency_overrides[get_lyrics_client] = lambda: lyrics_client
+
+    async def scenario() -> tuple[httpx.Response, int, int]:
+        buffer.pop("artist", "easy")
+        while buffer._refills:
+            await asyncio.gather(*buffer._refills.values())
+        calls_before = lyrics_client.calls
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            response = await client.get("/api/game/new", params={"mode": "artist"})
+        remaining = buffer.size("artist", "easy")
+        calls_during = lyrics_client.calls - calls_before
+        await buffer.close()
+        return response, remaining, calls_during
+
+    try:
+        response, remaining, calls_during = asyncio.run(scenario())
+    finally:
+        app.dependency_overrides.clear()
+
+    assert response.status_code == 200
+    assert remaining == 1
+    assert calls_during == 0
+
+
+def test_stored_round_survives_an_invalid_guess_and_is_consumed_by_a_valid_one(monkeypatch):
+    store = MemoryRoundStore(max_rounds=10, ttl=60)
+    monkeypatch.setattr(game, "round_store", store)
+    state = {
+        "artist": "Stored Artist",
+        "title": "Stored Title",
+        "round_type": "artist",
+        "difficulty": "easy",
+        "lyrics_answers": [],
+    }
+
+    async def play() -> list[httpx.Response]:
+        game_token = await store.put(state)
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            guesses = [["not", "a", "string"], "Stored Artist", "Stored Artist"]
+            return [
+                await client.post(
+                    "/api/game/submit",
+                    json={"game_token": game_token, "user_guess": guess},
+                )
+                for guess in guesses
+            ]
+
+    invalid, valid, repeated = asyncio.run(play())
+
+    assert invalid.status_code == 400
+    assert invalid.json()["detail"] == "Guess must be a string."
+    assert valid.status_code == 200
+    assert valid.json()["is_correct"]
+    assert repeated.status_code == 400
+    assert repeated.json()["detail"] == "Round not found, expired or already submitted."
+
+
+def test_buffered_rounds_get_their_round_id_when_popped(monkeypatch, stub_song_picker, lyrics_client):
+    store = MemoryRoundStore(max_rounds=10, ttl=60)
+    monkeypatch.setattr(game, "round_store", store)
+    buffer = RoundBuffer(
+        lambda mode, difficulty: game._build_round_entry(
+            lyrics_client, mode=mode, difficulty=difficulty, store_round=False
+        ),
+        high_watermark=2,
+        low_watermark=0,
+    )
+    monkeypatch.setattr(game, "round_buffer", buffer)
+
+    async def scenario() -> tuple[int, game.NewRoundResponse, dict]:
+        buffer.pop("artist", "easy")
+        while buffer._refills:
+            await asyncio.gather(*buffer._refills.values())
+        stored_while_buffered = len(store._rounds)
+        round_ = await game._pop_buffered_round("artist", "easy")
+        state = await store.get(round_.game_token)
+        await buffer.close()
+        return stored_while_buffered, round_, state
+
+    stored_while_buffered, round_, state = asyncio.run(scenario())
+
+    assert stored_while_buffered == 0
+    assert is_round_id(round_.game_token)
+    assert state["round_type"] == "artist"
+    assert len(store._rounds) == 1
+
+
+def test_batch_submit_reports_bad_guesses_per_item():
+    artist_token = create_game_token(
+        {"artist": "Batch Artist", "title": "Batch Title", "round_type": "artist"}
+    )
+    lyrics_token = create_game_token(
+        {
+            "artist": "Batch Artist",
+            "title": "Batch Title",
+            "round_type": "lyrics",
+            "lyrics_answers": ["hello", "world"],
+        }
+    )
+    guesses = [
+        {"game_token": artist_token, "user_guess": "batch artist"},
+        {"game_token": "tampered", "user_guess": "batch artist"},
+        {"game_token": lyrics_token, "user_guess": ["hello"]},
+        {"game_token": lyrics_token, "user_guess": ["hello", "world"]},
+    ]
+
+    async def submit() -> httpx.Response:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await client.post("/api/game/submit/batch", json={"guesses": guesses})
+
+    response = asyncio.run(submit())
+
+    assert response.status_code == 200
+    results = response.json()["results"]
+    assert [item["error"] for item in results] == [
+        None,
+        "Invalid or tampered game token.",
+        "Guess count does not match blanks count.",
+        None,
+    ]
+    assert results[0]["result"]["is_correct"]
+    assert results[1]["result"] is None and results[2]["result"] is None
+    assert results[3]["result"]["correct_words"] == ["hello", "world"]
+
+
+def test_pack_queue_never_repeats_a_song(monkeypatch, tmp_path, stub_song_picker, lyrics_client):
+    async def build_entries() -> list:
+        return [
+            await game._build_round_entry(lyrics_client, mode="artist", difficulty="easy")
+            for _ in range(4)
+        ]
+
+    path = str(tmp_path / "round-pack.bin")
+    round_pack.write_round_pack(path, asyncio.run(build_entries()))
+    pack = round_pack.RoundPack(path)
+    monkeypatch.setattr(game, "round_pack", pack)
+
+    async def queue() -> list[game.NewRoundResponse]:
+        return [
+            round_
+            async for round_ in game._iter_round_queue(
+                lyrics_client, count=6, mode="artist", difficulty="easy", source="pack"
+            )
+        ]
+
+    try:
+        queues = [asyncio.run(queue()) for _ in range(10)]
+    finally:
+        pack.close()
+
+    for rounds in queues:
+        assert len(rounds) == 4
+        assert len({round_.game_token for round_ in rounds}) == 4
+
+
+def test_queue_marks_only_served_pool_tracks_recent(monkeypatch, lyrics_client):
+    pool = [
+        {"artist": f"Pooled {index}", "title": "Title", "album_cover": None}
+        for index in range(12)
+    ]
+
+    async def fake_get_random_songs(count, deadline=None, session_id=None, mark_recent=True):
+        assert not mark_recent
+        return list(pool[:count])
+
+    tracks = MemoryRecentTracks(BloomGeometry(1000, 0.001, 4))
+    monkeypatch.setattr(game, "recent_tracks", tracks)
+    monkeypatch.setattr(game, "get_random_songs", fake_get_random_songs)
+    monkeypatch.setattr(game, "LYRICS_FANOUT", 3)
+    rounds, _ = _timed_queue(lyrics_client, count=4, concurrency=1)
+
+    served = {decode_game_token(round_.game_token)["artist"] for round_ in rounds}
+    assert len(served) == 4
+    assert {song["artist"] for song in pool if tracks.is_recent(song)} == served
+
+
+def test_pack_rounds_are_single_use_with_a_round_store(
+    monkeypatch, tmp_path, stub_song_picker, lyrics_client
+):
+    async def build_entries() -> list:
+        return [await game._build_round_entry(lyrics_client, mode="artist", difficulty="easy")]
+
+    path = str(tmp_path / "round-pack.bin")
+    round_pack.write_round_pack(path, asyncio.run(build_entries()))
+    pack = round_pack.RoundPack(path)
+    monkeypatch.setattr(game, "round_pack", pack)
+    monkeypatch.setattr(game, "round_store", MemoryRoundStore(max_rounds=10, ttl=60))
+    params = {"mode": "artist", "source": "pack"}
+
+    async def play() -> tuple[list[str], list[int]]:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            tokens = [
+                (await client.get("/api/game/new", params=params)).json()["game_token"]
+                for _ in range(2)
+            ]
+            statuses = [
+                (
+                    await client.post(
+                        "/api/game/submit",
+                        json={"game_token": token, "give_up": True, "user_guess": ""},
+                    )
+                ).status_code
+                for token in [tokens[0], tokens[0], tokens[1]]
+            ]
+            return tokens, statuses
+
+    try:
+        tokens, statuses = asyncio.run(play())
+    finally:
+        pack.close()
+
+    assert all(is_round_id(token) for token in tokens)
+    assert tokens[0] != tokens[1]
+    assert statuses == [200, 400, 200]
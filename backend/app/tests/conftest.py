@@ -1 +1,87 @@
-# Pytest fixtures will live here.
+import asyncio
+import itertools
+from typing import Any
+
+import pytest
+
+from app.api.v1.endpoints import game
+from app.core import lyrics
+
+UPSTREAM_DELAY = 0.05
+
+
+class StubResponse:
+    def __init__(self, status_code: int, payload: dict[str, Any]):
+        self.status_code = status_code
+        self._payload = payload
+
+    def json(self) -> dict[str, Any]:
+        return self._payload
+
+
+class StubLyricsClient:
+    """Stands in for the lyrics.ovh client, answering every lookup after a fixed delay."""
+
+    def __init__(
+        self,
+        delay: float = UPSTREAM_DELAY,
+        lyrics: str = "Never gonna give you up\nNever gonna let you down",
+    ):
+        self.delay = delay
+        self.lyrics = lyrics
+        self.calls = 0
+
+    async def get(self, url: str, timeout: float | None = None) -> StubResponse:
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return StubResponse(200, {"lyrics": self.lyrics})
+
+
+@pytest.fixture(autouse=True)
+def no_round_buffer(monkeypatch):
+    monkeypatch.setattr(game, "round_buffer", None)
+
+
+@pytest.fixture(autouse=True)
+def isolated_lyrics_store(monkeypatch, tmp_path):
+    store = lyrics.LyricsStore(str(tmp_path / "lyrics.sqlite3"))
+    monkeypatch.setattr(lyrics, "lyrics_store", store)
+    return store
+
+
+@pytest.fixture
+def stub_song_picker(monkeypatch):
+    counter = itertools.count()
+
+    def make_song() -> dict[str, Any]:
+        index = next(counter)
+        return {"artist": f"Artist {index}", "title": f"Title {index}", "album_cover": None}
+
+    async def fake_get_random_song(deadline=None, session_id=None) -> dict[str, Any]:
+        await asyncio.sleep(UPSTREAM_DELAY)
+        return make_song()
+
+    async def fake_get_random_songs(
+        count: int, deadline=None, session_id=None, mark_recent=True
+    ) -> list[dict[str, Any]]:
+        # A short listing, so queues also exercise the single-pick fallback.
+        await asyncio.sleep(UPSTREAM_DELAY)
+        return [make_song() for _ in range(count // 2)]
+
+    monkeypatch.setattr(game, "get_random_song", fake_get_random_song)
+    monkeypatch.setattr(game, "get_random_songs", fake_get_random_songs)
+    return fake_get_random_song
+
+
+@pytest.fixture
+def lyrics_client() -> StubLyricsClient:
+    return StubLyricsClient()
+
+
+@pytest.fixture
+def long_lyrics_client() -> StubLyricsClient:
+    stanzas = [
+        "\n".join(f"Stanza {stanza} line {line} carries several longer words" for line in range(4))
+        for stanza in range(8)
+    ]
+    return StubLyricsClient(delay=0, lyrics="\n\n".join(stanzas))
@@ -0,0 +1,20 @@
+import struct
+from array import array
+from types import SimpleNamespace
+
+import pytest
+
+from app.core import byteorder
+
+
+@pytest.mark.parametrize("host", ["little", "big"])
+def test_arrays_round_trip_through_the_little_endian_layout(monkeypatch, host):
+    monkeypatch.setattr(byteorder, "sys", SimpleNamespace(byteorder=host))
+    values = array("I", [1, 0x01020304, 0xFFFFFFFF])
+
+    encoded = byteorder.to_little_endian(values)
+
+    assert byteorder.from_little_endian("I", encoded) == values
+    assert values == array("I", [1, 0x01020304, 0xFFFFFFFF])
+    if host == "little":
+        assert encoded == struct.pack("<3I", *values)
@@ -0,0 +1,67 @@
+import asyncio
+
+from app.core.cache import TTLCache
+
+
+def _loader(values: list, calls: list, delay: float = 0.0):
+    async def load():
+        calls.append(len(calls))
+        await asyncio.sleep(delay)
+        return values[min(len(calls), len(values)) - 1]
+
+    return load
+
+
+def test_stale_entries_are_served_while_one_refresh_runs():
+    cache = TTLCache("test", max_entries=8, stale_ttl=60)
+    calls: list = []
+    load = _loader(["old", "new"], calls, delay=0.01)
+
+    async def scenario() -> tuple[list, int, object]:
+        await cache.get_or_load("key", ttl=0, loader=load)
+        stale = await asyncio.gather(*(cache.get_or_load("key", ttl=0, loader=load) for _ in range(5)))
+        await asyncio.sleep(0.05)
+        loads = len(calls)
+        return stale, loads, await cache.get_or_load("key", ttl=60, loader=load)
+
+    stale, loads, refreshed = asyncio.run(scenario())
+
+    assert stale == ["old"] * 5
+    assert loads == 2
+    assert refreshed == "new"
+    assert cache.stats()["refreshes"] >= 1
+
+
+def test_entries_past_the_stale_window_are_reloaded_inline():
+    cache = TTLCache("test", max_entries=8, stale_ttl=0)
+    calls: list = []
+    load = _loader(["first", "second"], calls)
+
+    async def scenario() -> tuple:
+        return (
+            await cache.get_or_load("key", ttl=0, loader=load),
+            await cache.get_or_load("key", ttl=0, loader=load),
+        )
+
+    assert asyncio.run(scenario()) == ("first", "second")
+    assert cache.stats()["misses"] == 2
+
+
+def test_cache_evicts_least_recently_used_and_skips_empty_loads():
+    cache = TTLCache("test", max_entries=2, stale_ttl=60)
+    calls: list = []
+
+    async def value(key: str):
+        calls.append(key)
+        return None if key == "empty" else key.upper()
+
+    async def scenario() -> None:
+        for key in ("a", "b", "a", "c", "empty", "empty"):
+            await cache.get_or_load(key, ttl=60, loader=lambda key=key: value(key))
+        await cache.get_or_load("b", ttl=60, loader=lambda: value("b"))
+
+    asyncio.run(scenario())
+
+    # "a" was touched after "b", so "b" is the one evicted when "c" arrives.
+    assert calls == ["a", "b", "c", "empty", "empty", "b"]
+    assert cache.stats()["entries"] == 2
@@ -0,0 +1,111 @@
+import asyncio
+from functools import partial
+
+import pytest
+
+from app.core import deezer, song_picker
+from app.core.deadline import Deadline
+from app.core.health import CLOSED, HALF_OPEN, OPEN, SourceHealth, choose_weighted
+from app.core.recent_tracks import NO_FRESH_TRACKS, recent_tracks
+
+
+async def _result(value):
+    return value
+
+
+async def _boom():
+    raise RuntimeError("upstream down")
+
+
+def test_breaker_opens_half_opens_and_closes():
+    health = SourceHealth("test", prior=10, failure_threshold=3, reset_timeout=0.05)
+
+    async def scenario() -> list:
+        states = []
+        for _ in range(3):
+            await health.call(lambda: _result(None))
+        states.append((health.state, health.is_available()))
+        await asyncio.sleep(0.06)
+        states.append(health.is_available())
+
+        # A failed probe reopens the breaker at once.
+        with pytest.raises(RuntimeError):
+            await health.call(_boom)
+        states.append(health.state)
+        await asyncio.sleep(0.06)
+
+        probe = asyncio.create_task(health.call(lambda: asyncio.sleep(0.01, result={"ok": 1})))
+        await asyncio.sleep(0)
+        states.append((health.state, health.is_available()))
+        await probe
+        states.append((health.state, health.consecutive_failures))
+        return states
+
+    assert asyncio.run(scenario()) == [
+        (OPEN, False),
+        True,
+        OPEN,
+        (HALF_OPEN, False),
+        (CLOSED, 0),
+    ]
+
+
+def test_weight_tracks_success_rate_and_latency():
+    healthy = SourceHealth("healthy", prior=10)
+    flaky = SourceHealth("flaky", prior=10, failure_threshold=100)
+    slow = SourceHealth("slow", prior=10)
+    for _ in range(5):
+        healthy.record(True, 0.0)
+        flaky.record(False, 0.0)
+        slow.record(True, 2.0)
+
+    assert healthy.weight() == pytest.approx(10)
+    assert flaky.weight() < healthy.weight() / 2
+    assert slow.weight() < healthy.weight() / 2
+    # A source that keeps failing is never weighted out entirely...
+    assert flaky.weight() > 0
+    # ...but an open breaker takes it out of the choice.
+    tripped = SourceHealth("tripped", prior=1000, failure_threshold=1)
+    tripped.record(False, 0.0)
+    assert {choose_weighted([tripped, healthy], lambda source: source) for _ in range(20)} == {healthy}
+    assert choose_weighted([tripped], lambda source: source) is None
+
+
+def test_running_out_of_fresh_tracks_does_not_trip_the_provider_breaker(monkeypatch):
+    recent = {"artist": "Health Test", "title": "Played Already"}
+    recent_tracks.mark(recent)
+
+    async def listing(client, deadline=None):
+        return [{"title": recent["title"], "artist": {"name": recent["artist"]}, "album": {}}]
+
+    monkeypatch.setattr(deezer, "_fetch_tracks", listing)
+    health = SourceHealth("deezer", prior=70, failure_threshold=2)
+    provider = (partial(deezer.get_random_song, fallback=False), object(), health)
+
+    async def scenario() -> list:
+        return [
+            await song_picker._call_provider(provider, deadline=None)
+            for _ in range(5)
+        ]
+
+    results = asyncio.run(scenario())
+
+    assert all(result is NO_FRESH_TRACKS for result in results)
+    assert health.state == CLOSED
+    assert health.consecutive_failures == 0
+    assert health.success_rate == 1.0
+
+
+def test_results_after_the_deadline_are_not_held_against_the_source():
+    health = SourceHealth("test", prior=10, failure_threshold=1)
+    spent = Deadline(0)
+
+    async def scenario() -> None:
+        await health.call(lambda: _result(None), deadline=spent)
+        with pytest.raises(RuntimeError):
+            await health.call(_boom, deadline=spent)
+
+    asyncio.run(scenario())
+
+    assert health.state == CLOSED
+    assert health.success_rate == 1.0
@@ -0,0 +1,56 @@
+import asyncio
+
+import httpx
+
+from app.core import itunes
+from app.core.deadline import Deadline
+from app.core.recent_tracks import recent_tracks
+
+
+def test_top_songs_batch_skips_recent_and_duplicate_tracks(monkeypatch):
+    entries = [
+        {"im:name": {"label": f"Chart Song {index % 6}"}, "im:artist": {"label": "iTunes Test"}}
+        for index in range(12)
+    ]
+
+    async def fake_entries(client, deadline=None):
+        return entries
+
+    monkeypatch.setattr(itunes, "_get_top_entries", fake_entries)
+    recent = {"artist": "iTunes Test", "title": "Chart Song 0"}
+    recent_tracks.mark(recent)
+
+    songs = asyncio.run(itunes.get_top_songs(10, client=object()))
+
+    assert len(songs) == 5
+    assert recent not in songs
+    assert len({song["title"] for song in songs}) == 5
+
+
+class _SlowClient:
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.calls = 0
+
+    async def get(self, url: str, timeout: float | None = None):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return httpx.Response(200, json={"feed": {"entry": []}})
+
+
+def test_coalesced_callers_keep_their_own_deadlines():
+    client = _SlowClient(delay=0.1)
+    url = "https://itunes.apple.com/us/rss/topsongs/limit=100/json"
+
+    async def scenario() -> list:
+        return await asyncio.gather(
+            itunes._get_payload(client, url, Deadline(0.02)),
+            itunes._get_payload(client, url, Deadline(5)),
+        )
+
+    hurried, patient = asyncio.run(scenario())
+
+    # The first caller gives up on its own budget without cutting the shared request short.
+    assert hurried is None
+    assert patient == {"feed": {"entry": []}}
+    assert client.calls == 1
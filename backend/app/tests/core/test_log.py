@@ -0,0 +1,44 @@
+import atexit
+import json
+import logging
+
+import pytest
+
+from app.core import log
+
+
+@pytest.fixture
+def unconfigured_logging(monkeypatch):
+    root = logging.getLogger()
+    monkeypatch.setattr(root, "handlers", [])
+    monkeypatch.setattr(root, "level", root.level)
+    monkeypatch.setattr(log, "_configured", False)
+    monkeypatch.setattr(log, "_listener", None)
+    monkeypatch.setattr(log, "LOG_FORMAT", "json")
+
+
+def test_unqueued_logging_writes_records_before_the_call_returns(unconfigured_logging, capsys):
+    log.configure_logging(queued=False)
+    token = log._request_id.set("lambda-request")
+    try:
+        logging.getLogger("test").warning("written %s", "now", extra={"round": {"blanks": 3}})
+    finally:
+        log._request_id.reset(token)
+
+    entry = json.loads(capsys.readouterr().out)
+
+    assert log._listener is None
+    assert entry["message"] == "written now"
+    assert entry["request_id"] == "lambda-request"
+    assert entry["round"] == {"blanks": 3}
+
+
+def test_queued_logging_hands_records_to_the_listener(unconfigured_logging, capsys):
+    log.configure_logging(queued=True)
+    try:
+        logging.getLogger("test").warning("queued")
+    finally:
+        log._listener.stop()
+        atexit.unregister(log._listener.stop)
+
+    assert json.loads(capsys.readouterr().out)["message"] == "queued"
@@ -0,0 +1,133 @@
+import asyncio
+import sqlite3
+import threading
+
+import pytest
+
+from app.core import catalog, lyrics, lyrics_index
+from app.core.lyrics import LyricsStore
+from app.core.lyrics_index import LyricsIndex
+
+LYRICS = "\n".join(f"Line number {line} carries several longer words here" for line in range(40))
+
+
+@pytest.fixture
+def builds(monkeypatch) -> list[str]:
+    calls: list[str] = []
+    build = LyricsIndex.build.__func__
+
+    def counting_build(cls, text: str) -> LyricsIndex:
+        calls.append(text)
+        return build(cls, text)
+
+    monkeypatch.setattr(LyricsIndex, "build", classmethod(counting_build))
+    return calls
+
+
+def _fields(index: LyricsIndex) -> tuple:
+    return index.text, index.starts, index.lengths, index.eligible, index.passages
+
+
+def test_stored_index_is_reloaded_from_sqlite_without_retokenizing(tmp_path, builds):
+    path = str(tmp_path / "lyrics.sqlite3")
+    asyncio.run(LyricsStore(path).put("Artist", "Title", LYRICS))
+    original = LyricsIndex.build(LYRICS)
+    builds.clear()
+
+    reloaded = asyncio.run(LyricsStore(path).get_index("artist ", "TITLE", LYRICS))
+
+    assert builds == []
+    assert _fields(reloaded) == _fields(original)
+    assert reloaded.passage_count() > 1
+
+
+def test_index_from_another_format_version_is_rebuilt_and_rewritten(tmp_path, builds):
+    path = str(tmp_path / "lyrics.sqlite3")
+    asyncio.run(LyricsStore(path).put("Artist", "Title", LYRICS))
+    with sqlite3.connect(path) as db:
+        (blob,) = db.execute("SELECT token_index FROM lyrics").fetchone()
+        stale = bytes([lyrics_index._FORMAT_VERSION + 1]) + blob[1:]
+        db.execute("UPDATE lyrics SET token_index = ?", (stale,))
+    assert LyricsIndex.from_bytes(LYRICS, stale) is None
+    builds.clear()
+
+    asyncio.run(LyricsStore(path).get_index("Artist", "Title", LYRICS))
+    asyncio.run(LyricsStore(path).get_index("Artist", "Title", LYRICS))
+
+    assert builds == [LYRICS]
+
+
+def test_index_built_with_other_passage_settings_is_not_reused(tmp_path, monkeypatch, builds):
+    path = str(tmp_path / "lyrics.sqlite3")
+    asyncio.run(LyricsStore(path).put("Artist", "Title", LYRICS))
+    max_chars = lyrics_index.LYRICS_PASSAGE_MAX_CHARS + 1
+    monkeypatch.setattr(lyrics_index, "LYRICS_PASSAGE_MAX_CHARS", max_chars)
+    builds.clear()
+
+    asyncio.run(LyricsStore(path).get_index("Artist", "Title", LYRICS))
+
+    assert builds == [LYRICS]
+
+
+def test_changed_lyrics_get_a_fresh_index(tmp_path, builds):
+    store = LyricsStore(str(tmp_path / "lyrics.sqlite3"))
+    asyncio.run(store.put("Artist", "Title", LYRICS))
+    changed = LYRICS.replace("longer", "different")
+    builds.clear()
+
+    index = asyncio.run(store.get_index("Artist", "Title", changed))
+
+    assert builds == [changed]
+    assert index.text == changed
+    assert asyncio.run(store.get_index("Artist", "Title", LYRICS)).text == LYRICS
+    assert builds == [changed]
+
+
+def test_catalog_lyrics_are_indexed_once_and_kept_out_of_sqlite(tmp_path, monkeypatch, builds):
+    catalog_path = str(tmp_path / "song-catalog.bin")
+    catalog.write_catalog(catalog_path, [({"artist": "Artist", "title": "Title"}, LYRICS)])
+    song_catalog = catalog.SongCatalog(catalog_path)
+    monkeypatch.setattr(lyrics, "song_catalog", song_catalog)
+    store = LyricsStore(str(tmp_path / "lyrics.sqlite3"))
+
+    async def play_rounds() -> None:
+        for _ in range(5):
+            text = await lyrics.fetch_lyrics(None, "Artist", "Title", store=store)
+            index = await lyrics.get_lyrics_index("Artist", "Title", text, store=store)
+            index.choose_passage()
+
+    try:
+        asyncio.run(play_rounds())
+    finally:
+        song_catalog.close()
+
+    assert builds == [LYRICS]
+    assert store._connection().execute("SELECT COUNT(*) FROM lyrics").fetchone() == (0,)
+
+
+def test_sqlite_reads_and_writes_run_off_the_event_loop_thread(tmp_path, monkeypatch):
+    path = str(tmp_path / "lyrics.sqlite3")
+    threads: list[int] = []
+    read, write = LyricsStore._read, LyricsStore._write
+
+    def recording_read(self, *args):
+        threads.append(threading.get_ident())
+        return read(self, *args)
+
+    def recording_write(self, *args):
+        threads.append(threading.get_ident())
+        return write(self, *args)
+
+    monkeypatch.setattr(LyricsStore, "_read", recording_read)
+    monkeypatch.setattr(LyricsStore, "_write", recording_write)
+
+    async def scenario() -> tuple[str | None, str | None]:
+        await LyricsStore(path).put("Artist", "Title", LYRICS)
+        store = LyricsStore(path)
+        return await store.get("Artist", "Title"), await store.get("Artist", "Title")
+
+    from_disk, from_memory = asyncio.run(scenario())
+
+    assert from_disk == from_memory == LYRICS
+    assert len(threads) == 2
+    assert threading.get_ident() not in threads
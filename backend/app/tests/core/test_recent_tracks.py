@@ -0,0 +1,111 @@
+import sqlite3
+import time
+
+import pytest
+
+from app.core.recent_tracks import (
+    BloomGeometry,
+    MemoryRecentTracks,
+    RecentTracks,
+    SQLiteRecentTracks,
+)
+
+
+def _song(index: int, prefix: str = "Marked") -> dict[str, str]:
+    return {"artist": f"{prefix} Artist", "title": f"{prefix} Track {index}"}
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_tracks(request, tmp_path):
+    def make(window: int, false_positive_rate: float = 0.01, generations: int = 4) -> RecentTracks:
+        geometry = BloomGeometry(window, false_positive_rate, generations)
+        if request.param == "memory":
+            return MemoryRecentTracks(geometry)
+        return SQLiteRecentTracks(str(tmp_path / "recent.sqlite3"), geometry)
+
+    return make
+
+
+def test_recent_tracks_is_abstract():
+    with pytest.raises(TypeError):
+        RecentTracks(BloomGeometry(8, 0.01, 4))
+
+
+def test_marks_are_remembered_until_their_generation_rotates_out(make_tracks):
+    tracks = make_tracks(window=8)
+    first = _song(0)
+    tracks.mark(first)
+
+    # 4 generations of 2 marks: remembered for at least 3 more generations...
+    for index in range(1, 7):
+        tracks.mark(_song(index))
+        assert tracks.is_recent(first)
+    # ...and forgotten once its generation is the oldest one to be cleared.
+    tracks.mark(_song(7))
+    assert tracks.is_recent(first)
+    tracks.mark(_song(8))
+    assert not tracks.is_recent(first)
+    assert all(tracks.is_recent(_song(index)) for index in range(3, 9))
+
+
+def test_false_positive_rate_stays_within_the_configured_rate(make_tracks):
+    tracks = make_tracks(window=1000, false_positive_rate=0.01)
+    for index in range(1000):
+        tracks.mark(_song(index))
+
+    assert all(tracks.is_recent(_song(index)) for index in range(1000))
+    false_positives = sum(tracks.is_recent(_song(index, "Fresh")) for index in range(5000))
+    assert false_positives / 5000 <= 0.015
+
+
+def test_pinned_tracks_are_recent_until_released(make_tracks):
+    tracks = make_tracks(window=8)
+    song = _song(0)
+    tracks.pin(song)
+    assert tracks.is_recent(song)
+
+    tracks.release(song)
+    assert tracks.is_recent(song)
+    for index in range(1, 9):
+        tracks.mark(_song(index))
+    assert not tracks.is_recent(song)
+
+
+def test_sqlite_window_is_shared_and_reset_when_settings_change(tmp_path):
+    path = str(tmp_path / "recent.sqlite3")
+    geometry = BloomGeometry(8, 0.01, 4)
+    SQLiteRecentTracks(path, geometry).mark(_song(0))
+
+    assert SQLiteRecentTracks(path, geometry).is_recent(_song(0))
+    assert not SQLiteRecentTracks(path, BloomGeometry(1000, 0.01, 4)).is_recent(_song(0))
+
+
+def test_sqlite_mark_gives_up_quickly_while_another_worker_holds_the_lock(tmp_path):
+    path = str(tmp_path / "recent.sqlite3")
+    tracks = SQLiteRecentTracks(path, BloomGeometry(8, 0.01, 4))
+    other = sqlite3.connect(path, isolation_level=None)
+    other.execute("BEGIN IMMEDIATE")
+    try:
+        started = time.perf_counter()
+        tracks.mark(_song(0))
+        elapsed = time.perf_counter() - started
+    finally:
+        other.execute("ROLLBACK")
+        other.close()
+
+    assert elapsed < 0.5
+    assert not tracks.is_recent(_song(0))
+    tracks.mark(_song(0))
+    assert tracks.is_recent(_song(0))
+
+
+def test_sqlite_mark_fails_open_when_the_write_errors(tmp_path, caplog):
+    tracks = SQLiteRecentTracks(str(tmp_path / "recent.sqlite3"), BloomGeometry(8, 0.01, 4))
+    tracks._db.execute("DROP TABLE recent_filters")
+    tracks._db.execute("CREATE TABLE recent_filters (slot INTEGER)")
+
+    tracks.mark(_song(0))
+
+    assert not tracks.is_recent(_song(0))
+    assert "mark skipped" in caplog.text
+    assert not tracks._db.in_transaction
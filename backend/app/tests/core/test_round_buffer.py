@@ -0,0 +1,110 @@
+import asyncio
+import itertools
+
+from fastapi import HTTPException
+
+from app.core.recent_tracks import recent_tracks, track_key
+from app.core.round_buffer import RoundBuffer
+from app.schemas.game import NewRoundResponse
+
+
+def _round(index: int) -> NewRoundResponse:
+    return NewRoundResponse(
+        game_token=f"token-{index}",
+        masked_lyrics="...",
+        hint_length=1,
+        round_type="artist",
+        difficulty="easy",
+    )
+
+
+def _counting_builder(fail_first: int = 0, fail_always: bool = False):
+    calls = itertools.count()
+    built: list[int] = []
+
+    async def builder(mode: str, difficulty: str):
+        index = next(calls)
+        built.append(index)
+        await asyncio.sleep(0)
+        if fail_always or index < fail_first:
+            raise HTTPException(status_code=503, detail="offline")
+        return _round(index), {"artist": "Buffer Test", "title": f"Song {index}"}
+
+    return builder, built
+
+
+async def _settle(buffer: RoundBuffer) -> None:
+    while buffer._refills:
+        await asyncio.gather(*buffer._refills.values())
+
+
+def test_refill_runs_up_to_the_high_watermark_when_low_watermark_is_reached():
+    builder, built = _counting_builder()
+    buffer = RoundBuffer(builder, high_watermark=3, low_watermark=1)
+
+    async def scenario() -> list:
+        events = [buffer.pop("artist", "easy")]
+        await _settle(buffer)
+        events.append(buffer.size("artist", "easy"))
+        events.append(buffer.pop("artist", "easy")[0].game_token)  # 2 left: no refill yet
+        events.append(bool(buffer._refills))
+        events.append(buffer.pop("artist", "easy")[0].game_token)  # 1 left: refill
+        await _settle(buffer)
+        events.append(buffer.size("artist", "easy"))
+        await buffer.close()
+        return events
+
+    assert asyncio.run(scenario()) == [None, 3, "token-0", False, "token-1", 3]
+    assert len(built) == 5
+
+
+def test_refill_gives_up_after_consecutive_failures_and_retries_on_next_pop():
+    builder, built = _counting_builder(fail_always=True)
+    buffer = RoundBuffer(builder, high_watermark=3, low_watermark=1)
+
+    async def scenario() -> list[int]:
+        counts = []
+        for _ in range(2):
+            assert buffer.pop("artist", "easy") is None
+            await _settle(buffer)
+            counts.append(len(built))
+        await buffer.close()
+        return counts
+
+    assert asyncio.run(scenario()) == [3, 6]
+
+
+def test_refill_recovers_after_transient_failures():
+    builder, built = _counting_builder(fail_first=2)
+    buffer = RoundBuffer(builder, high_watermark=2, low_watermark=0)
+
+    async def scenario() -> int:
+        buffer.pop("artist", "easy")
+        await _settle(buffer)
+        size = buffer.size("artist", "easy")
+        await buffer.close()
+        return size
+
+    assert asyncio.run(scenario()) == 2
+    assert len(built) == 4
+
+
+def test_buffered_songs_stay_pinned_until_served():
+    builder, _ = _counting_builder()
+    buffer = RoundBuffer(builder, high_watermark=2, low_watermark=0)
+
+    async def scenario() -> tuple[bool, dict, bool, bool]:
+        buffer.pop("artist", "easy")
+        await _settle(buffer)
+        pinned = track_key({"artist": "Buffer Test", "title": "Song 0"}) in recent_tracks._pinned
+        _, song = buffer.pop("artist", "easy")
+        released = track_key(song) not in recent_tracks._pinned
+        await buffer.close()
+        return pinned, song, released, recent_tracks.is_recent(song)
+
+    pinned, song, released, still_recent = asyncio.run(scenario())
+
+    assert pinned
+    assert released
+    # Serving a buffered song marks it, so it stays in the recent window.
+    assert still_recent
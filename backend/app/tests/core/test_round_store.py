@@ -0,0 +1,77 @@
+import asyncio
+
+import pytest
+
+from app.core.round_store import MemoryRoundStore, SQLiteRoundStore, is_round_id
+
+STATE = {"artist": "Stored Artist", "title": "Stored Title", "round_type": "artist"}
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_store(request, tmp_path):
+    def make(max_rounds: int = 100, ttl: float = 60):
+        if request.param == "memory":
+            return MemoryRoundStore(max_rounds, ttl)
+        return SQLiteRoundStore(str(tmp_path / "rounds.sqlite3"), max_rounds, ttl)
+
+    return make
+
+
+def test_get_peeks_and_take_consumes_a_round_once(make_store):
+    store = make_store()
+
+    async def scenario():
+        round_id = await store.put(STATE)
+        return (
+            round_id,
+            await store.get(round_id),
+            await store.get(round_id),
+            await store.take(round_id),
+            await store.take(round_id),
+            await store.get(round_id),
+        )
+
+    round_id, first_get, second_get, first_take, second_take, after = asyncio.run(scenario())
+
+    assert is_round_id(round_id)
+    assert first_get == second_get == first_take == STATE
+    assert second_take is None
+    assert after is None
+
+
+def test_unknown_and_expired_rounds_miss(make_store):
+    store = make_store(ttl=0)
+
+    async def scenario():
+        round_id = await store.put(STATE)
+        return await store.get(round_id), await store.take(round_id), await store.get("r.unknown")
+
+    assert asyncio.run(scenario()) == (None, None, None)
+
+
+def test_stores_keep_only_the_newest_rounds(make_store):
+    store = make_store(max_rounds=2)
+
+    async def scenario():
+        round_ids = [await store.put({**STATE, "title": str(index)}) for index in range(3)]
+        if isinstance(store, SQLiteRoundStore):
+            store._prune(0)
+        return [await store.get(round_id) for round_id in round_ids]
+
+    oldest, *newest = asyncio.run(scenario())
+
+    assert oldest is None
+    assert [state["title"] for state in newest] == ["1", "2"]
+
+
+def test_concurrent_takes_hand_a_round_to_one_caller(make_store):
+    store = make_store()
+
+    async def scenario():
+        round_id = await store.put(STATE)
+        return await asyncio.gather(*(store.take(round_id) for _ in range(5)))
+
+    results = asyncio.run(scenario())
+
+    assert results.count(STATE) == 1
+    assert results.count(None) == 4
@@ -0,0 +1,40 @@
+import pytest
+
+from app.core.scoring import normalize_answer, score_blanks, score_guess
+
+
+@pytest.mark.parametrize(
+    ("text", "expected"),
+    [
+        ("Don't", "dont"),
+        ("don’t stop", "dont stop"),
+        ("Beyoncé", "beyonce"),
+        ("  Sigur   Rós ", "sigur ros"),
+        ("Crazy in Love (feat. JAY-Z)", "crazy in love"),
+        ("Song [ft Guest]", "song"),
+        ("Artist feat. Guest", "artist"),
+        ("Artist featuring Guest", "artist"),
+        ("Feather", "feather"),
+        ("!!!", "!!!"),
+    ],
+)
+def test_normalize_answer(text, expected):
+    assert normalize_answer(text) == expected
+
+
+def test_score_guess_ignores_case_accents_and_featured_artists():
+    assert score_guess("beyonce", normalize_answer("Beyoncé (feat. JAY-Z)")) == 100
+    assert score_guess("Beyonse", normalize_answer("Beyoncé")) < 100
+
+
+def test_score_blanks_matches_normalized_words_exactly_by_default():
+    answers = [normalize_answer(word) for word in ["Don't", "café", "love", "night"]]
+
+    assert score_blanks(["dont", "CAFE", "lvoe", "night"], answers) == [True, True, False, True]
+
+
+def test_score_blanks_accepts_near_misses_above_the_fuzzy_threshold():
+    answers = ["beautiful", "love"]
+
+    assert score_blanks(["beautifull", "lvoe"], answers, fuzzy_threshold=85) == [True, False]
+    assert score_blanks(["beautifull", "lvoe"], answers, fuzzy_threshold=70) == [True, True]
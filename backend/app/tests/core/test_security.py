@@ -0,0 +1,60 @@
+import pytest
+from itsdangerous import BadSignature
+
+from app.core.scoring import normalize_answer
+from app.core.security import _serializer, create_game_token, decode_game_token
+
+
+def _lyrics_state(words: list[str]) -> dict:
+    return {
+        "artist": "Beyoncé",
+        "title": "Halo",
+        "round_type": "lyrics",
+        "difficulty": "hard",
+        "lyrics_answers": words,
+        "normalized_answers": [normalize_answer(word) for word in words],
+    }
+
+
+def test_compact_tokens_round_trip():
+    artist_state = {
+        "artist": "Beyoncé",
+        "title": "Halo",
+        "round_type": "artist",
+        "difficulty": "easy",
+        "lyrics_answers": [],
+        "normalized_answer": "beyonce",
+    }
+    lyrics_state = _lyrics_state(["Remember", "don't", "walls", "tumbling"])
+
+    artist_token = create_game_token(artist_state)
+    assert artist_token.startswith("v2.")
+    # Empty answer lists are left out; decoders default them to [].
+    assert decode_game_token(artist_token) == {
+        key: value for key, value in artist_state.items() if key != "lyrics_answers"
+    }
+    assert decode_game_token(create_game_token(lyrics_state)) == lyrics_state
+
+
+def test_word_lists_with_spaces_after_normalization_survive_the_token():
+    # NFKD expands this ligature into four words.
+    state = _lyrics_state(["ﷺ", "halo"])
+    assert " " in state["normalized_answers"][0]
+
+    decoded = decode_game_token(create_game_token(state))
+
+    assert decoded["normalized_answers"] == state["normalized_answers"]
+    assert len(decoded["normalized_answers"]) == len(decoded["lyrics_answers"]) == 2
+
+
+def test_legacy_tokens_still_decode():
+    state = _lyrics_state(["walls", "tumbling"])
+    del state["normalized_answers"]
+
+    assert decode_game_token(_serializer.dumps(state)) == state
+
+
+def test_tampered_tokens_are_rejected():
+    token = create_game_token(_lyrics_state(["walls"]))
+    with pytest.raises(BadSignature):
+        decode_game_token(token[:-2] + ("AA" if not token.endswith("AA") else "BB"))
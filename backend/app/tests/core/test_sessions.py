@@ -0,0 +1,49 @@
+import time
+
+from app.core.sessions import SessionHistory
+
+
+def _song(index: int) -> dict[str, str]:
+    return {"artist": "Session Artist", "title": f"Track {index}"}
+
+
+def test_overwritten_songs_are_forgotten():
+    history = SessionHistory(max_sessions=10, ttl=60, max_seen=3)
+    for index in range(5):
+        history.mark_seen("player", _song(index))
+
+    assert [history.has_seen("player", _song(index)) for index in range(5)] == [
+        False,
+        False,
+        True,
+        True,
+        True,
+    ]
+    # The ring stays a bounded array of 4-byte fingerprints.
+    seen = history._sessions["player"].seen
+    assert (seen.itemsize, len(seen)) == (4, 3)
+
+
+def test_marking_a_seen_song_again_keeps_one_ring_slot():
+    history = SessionHistory(max_sessions=10, ttl=60, max_seen=2)
+    history.mark_seen("player", _song(0))
+    history.mark_seen("player", _song(0))
+    history.mark_seen("player", _song(1))
+
+    assert history.has_seen("player", _song(0))
+    assert len(history._sessions["player"].seen) == 2
+
+
+def test_sessions_expire_and_the_least_recently_used_are_evicted():
+    expired = SessionHistory(max_sessions=10, ttl=0.01, max_seen=3)
+    expired.mark_seen("player", _song(0))
+    time.sleep(0.02)
+    assert not expired.has_seen("player", _song(0))
+
+    history = SessionHistory(max_sessions=2, ttl=60, max_seen=3)
+    for player in ("first", "second", "third"):
+        history.mark_seen(player, _song(0))
+
+    assert not history.has_seen("first", _song(0))
+    assert history.has_seen("second", _song(0)) and history.has_seen("third", _song(0))
+    assert not history.has_seen(None, _song(0))
@@ -0,0 +1,71 @@
+import asyncio
+
+import pytest
+
+from app.core.singleflight import SingleFlight
+
+
+def test_concurrent_calls_for_one_key_share_a_single_request():
+    flight = SingleFlight("test")
+    calls: list[str] = []
+
+    async def fetch(key: str) -> str:
+        calls.append(key)
+        await asyncio.sleep(0.01)
+        return key.upper()
+
+    async def scenario() -> list[str]:
+        return await asyncio.gather(
+            *(flight.do(key, lambda key=key: fetch(key)) for key in ["a"] * 5 + ["b"] * 2)
+        )
+
+    assert asyncio.run(scenario()) == ["A"] * 5 + ["B"] * 2
+    assert calls == ["a", "b"]
+    assert flight.stats() == {"inflight": 0, "calls": 2, "coalesced": 5}
+
+
+def test_cancelling_one_caller_leaves_the_shared_call_running():
+    flight = SingleFlight("test")
+    finished: list[bool] = []
+
+    async def fetch() -> str:
+        await asyncio.sleep(0.02)
+        finished.append(True)
+        return "payload"
+
+    async def scenario() -> str:
+        first = asyncio.create_task(flight.do("key", fetch))
+        second = asyncio.create_task(flight.do("key", fetch))
+        await asyncio.sleep(0)
+        first.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await first
+        return await second
+
+    assert asyncio.run(scenario()) == "payload"
+    assert finished == [True]
+
+
+def test_errors_are_shared_and_the_key_is_released():
+    flight = SingleFlight("test")
+    attempts: list[int] = []
+
+    async def failing() -> None:
+        attempts.append(1)
+        await asyncio.sleep(0)
+        raise RuntimeError("upstream down")
+
+    async def scenario() -> list:
+        results = await asyncio.gather(
+            flight.do("key", failing),
+            flight.do("key", failing),
+            return_exceptions=True,
+        )
+        results.append(await flight.do("key", lambda: asyncio.sleep(0, result="retried")))
+        return results
+
+    first, second, retried = asyncio.run(scenario())
+
+    assert isinstance(first, RuntimeError) and second is first
+    assert retried == "retried"
+    assert attempts == [1]
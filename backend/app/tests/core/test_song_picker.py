@@ -0,0 +1,54 @@
+import asyncio
+import time
+
+from app.core import song_picker
+from app.core.health import SourceHealth
+
+
+def _provider(name: str, delay: float, events: list, prior: float):
+    async def pick(client=None, deadline=None):
+        events.append(f"{name} started")
+        try:
+            await asyncio.sleep(delay)
+        except asyncio.CancelledError:
+            events.append(f"{name} cancelled")
+            raise
+        return {"artist": "Hedge Test", "title": f"{name} {time.perf_counter()}"}
+
+    return pick, None, SourceHealth(name, prior=prior)
+
+
+def test_hedged_pick_races_a_backup_and_cancels_the_slow_provider():
+    events: list = []
+    providers = [
+        _provider("slow", 1.0, events, prior=1e9),
+        _provider("fast", 0.01, events, prior=1),
+    ]
+
+    async def scenario() -> tuple[dict, float]:
+        started = time.perf_counter()
+        song = await song_picker._hedged_pick(providers, hedge_delay=0.05)
+        elapsed = time.perf_counter() - started
+        await asyncio.sleep(0)
+        return song, elapsed
+
+    song, elapsed = asyncio.run(scenario())
+
+    assert song["title"].startswith("fast")
+    assert elapsed < 0.5
+    assert events == ["slow started", "fast started", "slow cancelled"]
+    # A lost race is not held against the cancelled provider.
+    assert providers[0][2].consecutive_failures == 0
+
+
+def test_hedged_pick_does_not_hedge_a_provider_that_answers_in_time():
+    events: list = []
+    providers = [
+        _provider("quick", 0.01, events, prior=1e9),
+        _provider("backup", 0.01, events, prior=1),
+    ]
+
+    song = asyncio.run(song_picker._hedged_pick(providers, hedge_delay=0.5))
+
+    assert song["title"].startswith("quick")
+    assert events == ["quick started"]
@@ -0,0 +1,72 @@
+"""
+Benchmark of lyrics masking: regex-per-round helpers vs the precomputed LyricsIndex.
+
+The index is built once per cached lyrics, so its build cost is reported separately
+from the per-round masking cost. Run from the backend directory:
+    python -m benchmarks.bench_masking
+"""
+import argparse
+import random
+import timeit
+
+from app.core.lyrics_index import LyricsIndex
+from app.core.utils import mask_text, mask_text_with_blanks
+
+_WORDS = [
+    "love", "baby", "tonight", "heart", "dance", "never", "forever", "somebody",
+    "dreams", "falling", "together", "yesterday", "believe", "yourself", "don't",
+    "I", "a", "to", "in", "me", "oh", "we", "the", "and", "you",
+]
+
+
+def _lyrics(lines: int) -> str:
+    random.seed(11)
+    stanzas = []
+    for _ in range(max(1, lines // 4)):
+        stanza = [
+            " ".join(random.choices(_WORDS, k=random.randint(4, 10))).capitalize() + ","
+            for _ in range(4)
+        ]
+        stanzas.append("\n".join(stanza))
+    return "\n\n".join(stanzas)
+
+
+def _report(label: str, seconds: float, baseline: float | None = None) -> None:
+    speedup = f"  ({baseline / seconds:6.1f}x)" if baseline else ""
+    print(f"  {label:<28}{seconds * 1e6:10.1f} us{speedup}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--lines", type=int, nargs="+", default=[40, 200, 1000])
+    parser.add_argument("--number", type=int, default=500)
+    args = parser.parse_args()
+
+    for lines in args.lines:
+        text = _lyrics(lines)
+        index = LyricsIndex.build(text)
+        print(
+            f"{lines} lines, {len(text)} chars, {len(index.starts)} words, "
+            f"{len(index.eligible)} eligible, index {len(index.to_bytes())} bytes"
+        )
+
+        def run(fn) -> float:
+            return timeit.timeit(fn, number=args.number) / args.number
+
+        build = run(lambda: LyricsIndex.build(text))
+        blanks_regex = run(lambda: mask_text_with_blanks(text, mask_ratio=0.25))
+        blanks_index = run(lambda: index.mask_with_blanks(mask_ratio=0.25))
+        words_split = run(lambda: mask_text(text, mask_ratio=0.4))
+        words_index = run(lambda: index.mask_words(mask_ratio=0.4))
+        load = run(lambda: LyricsIndex.from_bytes(text, index.to_bytes()))
+
+        _report("index build (once)", build)
+        _report("index load from cache", load)
+        _report("blanks, regex", blanks_regex)
+        _report("blanks, index", blanks_index, blanks_regex)
+        _report("stars, split", words_split)
+        _report("stars, index", words_index, words_split)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,82 @@
+"""
+Benchmark of one /game/submit/batch call against N single /game/submit calls.
+
+Runs the FastAPI app in-process, so it measures per-request framework, token and
+scoring overhead; each saved request also saves a Lambda invocation in production.
+Run from the backend directory:
+    python -m benchmarks.bench_submit
+"""
+import argparse
+import asyncio
+import logging
+import time
+
+import httpx
+
+from app.core.security import create_game_token
+from app.main import app
+
+
+def _tokens(count: int) -> list[dict]:
+    guesses = []
+    for index in range(count):
+        if index % 3 == 2:
+            token = create_game_token(
+                {
+                    "artist": "Queen",
+                    "title": "Bohemian Rhapsody",
+                    "round_type": "lyrics",
+                    "difficulty": "hard",
+                    "lyrics_answers": ["mama", "just", "killed", "man", "gun", "head"],
+                }
+            )
+            guess = ["mama", "just", "killed", "man", "trigger", "head"]
+        else:
+            token = create_game_token(
+                {
+                    "artist": "The Weeknd",
+                    "title": "Blinding Lights",
+                    "round_type": "artist",
+                    "difficulty": "easy",
+                    "lyrics_answers": [],
+                }
+            )
+            guess = "the weekend"
+        guesses.append({"game_token": token, "user_guess": guess})
+    return guesses
+
+
+async def _run(rounds: int, repeat: int) -> None:
+    guesses = _tokens(rounds)
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            for guess in guesses:
+                response = await client.post("/api/game/submit", json=guess)
+                response.raise_for_status()
+        single = (time.perf_counter() - start) / repeat
+
+        start = time.perf_counter()
+        for _ in range(repeat):
+            response = await client.post("/api/game/submit/batch", json={"guesses": guesses})
+            response.raise_for_status()
+        batch = (time.perf_counter() - start) / repeat
+
+    print(f"{rounds} single submits: {single * 1000:8.2f} ms ({rounds} requests)")
+    print(f"1 batch submit:    {batch * 1000:8.2f} ms (1 request)")
+    print(f"speedup:           {single / batch:8.2f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rounds", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    asyncio.run(_run(args.rounds, args.repeat))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+Micro-benchmark of game token size and encode/decode time, legacy vs compact.
+
+Run from the backend directory:
+    python -m benchmarks.bench_tokens
+"""
+import argparse
+import random
+import timeit
+
+from app.core.scoring import normalize_answer
+from app.core.security import _serializer, create_game_token, decode_game_token
+
+_WORDS = [
+    "love", "baby", "tonight", "heart", "dance", "never", "forever", "somebody",
+    "dreams", "falling", "together", "yesterday", "believe", "yourself", "don't",
+]
+
+
+def _with_normalized(payload: dict) -> dict:
+    # Real tokens carry the normalized answers computed when the round is built,
+    # and leave them out for blanks that are already normalized.
+    if payload["round_type"] == "lyrics":
+        normalized_answers = [normalize_answer(word) for word in payload["lyrics_answers"]]
+        if normalized_answers != payload["lyrics_answers"]:
+            payload["normalized_answers"] = normalized_answers
+    else:
+        answer = payload["artist"] if payload["round_type"] == "artist" else payload["title"]
+        payload["normalized_answer"] = normalize_answer(answer)
+    return payload
+
+
+def _payloads() -> dict[str, dict]:
+    random.seed(7)
+    payloads = {
+        "artist/easy": {
+            "artist": "The Weeknd",
+            "title": "Blinding Lights",
+            "round_type": "artist",
+            "difficulty": "easy",
+            "lyrics_answers": [],
+        },
+        "lyrics/easy": {
+            "artist": "Queen",
+            "title": "Bohemian Rhapsody",
+            "round_type": "lyrics",
+            "difficulty": "easy",
+            "lyrics_answers": random.choices(_WORDS, k=14),
+        },
+        "lyrics/hard": {
+            "artist": "Linkin Park",
+            "title": "In the End",
+            "round_type": "lyrics",
+            "difficulty": "hard",
+            "lyrics_answers": random.choices(_WORDS, k=30),
+        },
+    }
+    return {name: _with_normalized(payload) for name, payload in payloads.items()}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--number", type=int, default=20000)
+    args = parser.parse_args()
+
+    print(f"{'payload':<14}{'format':<9}{'bytes':>7}{'encode us':>12}{'decode us':>12}")
+    for name, payload in _payloads().items():
+        formats = {
+            "legacy": (_serializer.dumps, _serializer.loads),
+            "compact": (create_game_token, decode_game_token),
+        }
+        for label, (encode, decode) in formats.items():
+            token = encode(payload)
+            encode_us = timeit.timeit(lambda: encode(payload), number=args.number) / args.number * 1e6
+            decode_us = timeit.timeit(lambda: decode(token), number=args.number) / args.number * 1e6
+            print(f"{name:<14}{label:<9}{len(token):>7}{encode_us:>12.1f}{decode_us:>12.1f}")
+
+
+if __name__ == "__main__":
+    main()
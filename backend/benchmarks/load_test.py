@@ -0,0 +1,200 @@
+"""
+Offline load test of /game/new, /game/queue and /game/submit against stub upstreams.
+
+Runs the FastAPI app in-process with Deezer, iTunes and lyrics.ovh replaced by local
+stand-ins of configurable latency, error rate and 404 rate; reports throughput,
+p50/p95/p99 latency and upstream calls per scenario. Run from the backend directory:
+    python -m benchmarks.load_test --requests 200 --concurrency 16
+"""
+import argparse
+import asyncio
+import logging
+import random
+import tempfile
+import time
+from collections import Counter
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass, field
+
+import httpx
+
+from app.api.v1.endpoints import game
+from app.core import lyrics
+from app.main import app
+from benchmarks.stub_upstreams import StubUpstreams, UpstreamProfile, install
+
+
+@dataclass
+class ScenarioResult:
+    name: str
+    latencies: list[float] = field(default_factory=list)
+    statuses: Counter = field(default_factory=Counter)
+    elapsed: float = 0.0
+    upstream_calls: Counter = field(default_factory=Counter)
+
+
+def _percentile(values: list[float], percent: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, round(percent / 100 * len(ordered)) - 1))
+    return ordered[rank]
+
+
+async def _run_scenario(
+    name: str,
+    upstreams: StubUpstreams,
+    request: Callable[[], Awaitable[httpx.Response]],
+    total: int,
+    concurrency: int,
+) -> ScenarioResult:
+    result = ScenarioResult(name)
+    remaining = iter(range(total))
+    calls_before = Counter(upstreams.calls)
+
+    async def worker() -> None:
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                response = await request()
+                status = response.status_code
+            except httpx.HTTPError:
+                status = "transport"
+            result.latencies.append(time.perf_counter() - started)
+            result.statuses[status] += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    result.elapsed = time.perf_counter() - started
+    result.upstream_calls = upstreams.calls - calls_before
+    return result
+
+
+def _report(result: ScenarioResult) -> None:
+    requests = len(result.latencies)
+    ok = result.statuses.get(200, 0)
+    print(f"{result.name}")
+    print(
+        f"  {requests} requests in {result.elapsed:.2f}s: "
+        f"{requests / result.elapsed:.1f} req/s, {ok} ok, "
+        f"statuses {dict(result.statuses)}"
+    )
+    print(
+        "  latency ms: "
+        + ", ".join(
+            f"p{percent}={_percentile(result.latencies, percent) * 1000:.1f}"
+            for percent in (50, 95, 99)
+        )
+    )
+    calls = ", ".join(f"{host}={count}" for host, count in sorted(result.upstream_calls.items()))
+    print(f"  upstream calls: {calls or 'none'}")
+
+
+async def _run(args: argparse.Namespace) -> None:
+    random.seed(args.seed)
+    upstreams = StubUpstreams(
+        UpstreamProfile(
+            latency=args.latency,
+            jitter=args.jitter,
+            error_rate=args.error_rate,
+            not_found_rate=args.not_found_rate,
+            seed=args.seed,
+        )
+    )
+    install(upstreams)
+    rounds: list[dict] = []
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60) as client:
+
+        async def new_round() -> httpx.Response:
+            response = await client.get(
+                "/api/game/new",
+                params={
+                    "mode": random.choice(args.modes),
+                    "difficulty": "random",
+                    "source": args.source,
+                },
+            )
+            if response.status_code == 200:
+                rounds.append(response.json())
+            return response
+
+        async def queue() -> httpx.Response:
+            return await client.get(
+                "/api/game/queue",
+                params={
+                    "count": args.queue_count,
+                    "mode": "shuffle",
+                    "difficulty": "random",
+                    "source": args.source,
+                },
+            )
+
+        async def submit() -> httpx.Response:
+            round_ = rounds.pop()
+            if round_["round_type"] == "lyrics":
+                guess = ["love"] * len(round_["blanks_metadata"])
+            else:
+                guess = "Artist 1"
+            return await client.post(
+                "/api/game/submit",
+                json={"game_token": round_["game_token"], "user_guess": guess},
+            )
+
+        scenarios = {
+            "new": ("GET /api/game/new", new_round, args.requests),
+            "queue": ("GET /api/game/queue", queue, max(1, args.requests // args.queue_count)),
+            "submit": ("POST /api/game/submit", submit, args.requests),
+        }
+        for scenario in args.scenarios:
+            name, request, total = scenarios[scenario]
+            if scenario == "submit":
+                if not rounds:
+                    print(f"{name}: skipped (run 'new' first to collect rounds)")
+                    continue
+                total = min(total, len(rounds))
+            _report(await _run_scenario(name, upstreams, request, total, args.concurrency))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--queue-count", type=int, default=5)
+    parser.add_argument(
+        "--scenarios",
+        nargs="+",
+        choices=("new", "queue", "submit"),
+        default=["new", "queue", "submit"],
+    )
+    parser.add_argument(
+        "--modes",
+        nargs="+",
+        choices=("artist", "track", "lyrics"),
+        default=["artist", "track", "lyrics"],
+    )
+    parser.add_argument("--latency", type=float, default=0.05, help="Upstream latency (s).")
+    parser.add_argument("--jitter", type=float, default=0.02, help="Upstream latency jitter (s).")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Upstream 503 rate.")
+    parser.add_argument("--not-found-rate", type=float, default=0.1, help="lyrics.ovh 404 rate.")
+    parser.add_argument("--round-buffer", action="store_true", help="Keep the round buffer on.")
+    parser.add_argument(
+        "--source",
+        choices=("live", "pack"),
+        default="live",
+        help="Round source; 'pack' needs a round pack at ROUND_PACK_PATH.",
+    )
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    if not args.round_buffer:
+        game.round_buffer = None
+    with tempfile.TemporaryDirectory() as directory:
+        lyrics.lyrics_store = lyrics.LyricsStore(f"{directory}/lyrics.sqlite3")
+        asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+In-process stand-ins for Deezer, iTunes and lyrics.ovh, served through an httpx
+transport so the app's pooled clients never touch the network.
+"""
+import asyncio
+import random
+from collections import Counter
+from dataclasses import dataclass, field
+
+import httpx
+
+from app.core import http
+
+_WORDS = [
+    "love", "baby", "tonight", "heart", "dance", "never", "forever", "somebody",
+    "dreams", "falling", "together", "yesterday", "believe", "yourself", "don't",
+    "I", "a", "to", "in", "me", "oh", "we", "the", "and", "you",
+]
+
+
+@dataclass
+class UpstreamProfile:
+    latency: float = 0.05
+    jitter: float = 0.02
+    error_rate: float = 0.0
+    not_found_rate: float = 0.1
+    catalog_size: int = 500
+    seed: int = 7
+
+
+@dataclass
+class StubUpstreams(httpx.AsyncBaseTransport):
+    profile: UpstreamProfile = field(default_factory=UpstreamProfile)
+    calls: Counter = field(default_factory=Counter)
+
+    def __post_init__(self):
+        self._random = random.Random(self.profile.seed)
+        self._tracks = [self._track(index) for index in range(self.profile.catalog_size)]
+
+    def _track(self, index: int) -> dict:
+        artist_id = index // 5
+        return {
+            "id": index,
+            "title": f"Song {index}",
+            "artist": {"id": artist_id, "name": f"Artist {artist_id}"},
+            "album": {"cover_medium": f"https://covers.invalid/{index}.jpg"},
+        }
+
+    def _sample(self, count: int) -> list[dict]:
+        return self._random.sample(self._tracks, k=min(count, len(self._tracks)))
+
+    def _lyrics(self, title: str) -> str:
+        generator = random.Random(title)
+        stanzas = [
+            "\n".join(
+                " ".join(generator.choices(_WORDS, k=generator.randint(4, 9))).capitalize()
+                for _ in range(4)
+            )
+            for _ in range(generator.randint(3, 8))
+        ]
+        return "\n\n".join(stanzas)
+
+    def _deezer(self, path: str) -> dict:
+        if path in ("/radio", "/editorial"):
+            return {"data": [{"id": item} for item in range(1, 8)]}
+        if path == "/genre":
+            return {"data": [{"id": 0}] + [{"id": item} for item in (132, 116, 152, 113)]}
+        if path == "/chart" or path.endswith("/charts"):
+            return {"tracks": {"data": self._sample(50)}}
+        if path.startswith("/artist/"):
+            artist_id = int(path.split("/")[2])
+            return {"data": [track for track in self._tracks if track["artist"]["id"] == artist_id]}
+        return {"data": self._sample(25)}
+
+    def _itunes(self) -> dict:
+        return {
+            "feed": {
+                "entry": [
+                    {
+                        "im:name": {"label": track["title"]},
+                        "im:artist": {"label": track["artist"]["name"]},
+                    }
+                    for track in self._sample(100)
+                ]
+            }
+        }
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        self.calls[host] += 1
+        profile = self.profile
+        await asyncio.sleep(max(0.0, profile.latency + self._random.uniform(-1, 1) * profile.jitter))
+
+        if self._random.random() < profile.error_rate:
+            self.calls[f"{host} 5xx"] += 1
+            return httpx.Response(503, json={"error": "stub upstream error"})
+        if host == "api.deezer.com":
+            return httpx.Response(200, json=self._deezer(request.url.path))
+        if host == "itunes.apple.com":
+            return httpx.Response(200, json=self._itunes())
+        if host == "api.lyrics.ovh":
+            if self._random.random() < profile.not_found_rate:
+                self.calls[f"{host} 404"] += 1
+                return httpx.Response(404, json={"error": "No lyrics found"})
+            title = request.url.path.rsplit("/", 1)[-1]
+            return httpx.Response(200, json={"lyrics": self._lyrics(title)})
+        return httpx.Response(404, json={"error": f"unknown stub host {host}"})
+
+
+def install(upstreams: StubUpstreams) -> None:
+    """
+    Points every pooled upstream client at the stubs.
+    """
+    for group in http.HOST_GROUPS:
+        http._clients[group] = httpx.AsyncClient(transport=upstreams)
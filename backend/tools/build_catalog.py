@@ -0,0 +1,133 @@
+"""
+Builds the song catalog memory-mapped by the API for fallback picks and local lyrics.
+
+Crawls Deezer through the weighted fetchers plus the iTunes top songs feed, keeps
+tracks whose lyrics.ovh lyrics exist and hold at least one maskable passage, and
+writes them to the catalog file read by app.core.catalog. Lyrics lookups go through
+a LyricsStore, so reruns only fetch tracks not seen before. Run from the backend directory:
+    python -m tools.build_catalog --tracks 20000
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+from typing import Any
+
+from app.core.catalog import write_catalog
+from app.core.config import LYRICS_DB_PATH, SONG_CATALOG_PATH
+from app.core.deezer import get_random_songs as get_deezer_songs
+from app.core.http import close_clients, get_client
+from app.core.itunes import get_top_songs as get_itunes_songs
+from app.core.lyrics import LyricsStore, fetch_lyrics
+from app.core.lyrics_index import LyricsIndex
+from app.core.recent_tracks import track_key
+
+
+async def _crawl(
+    target: int,
+    max_fetches: int,
+    concurrency: int,
+    patience: int,
+) -> list[dict[str, Any]]:
+    """
+    Collects distinct tracks until `target` is reached, `max_fetches` listings were
+    fetched, or `patience` rounds of fetches in a row turned up nothing new.
+    """
+    songs: dict[str, dict[str, Any]] = {}
+    for song in await get_itunes_songs(100, client=get_client("itunes")):
+        songs.setdefault(track_key(song), song)
+
+    deezer_client = get_client("deezer")
+    fetches = 0
+    idle = 0
+    while len(songs) < target and fetches < max_fetches and idle < patience:
+        batch = min(concurrency, max_fetches - fetches)
+        fetches += batch
+        results = await asyncio.gather(
+            *(get_deezer_songs(50, max_attempts=1, client=deezer_client) for _ in range(batch)),
+            return_exceptions=True,
+        )
+        before = len(songs)
+        for result in results:
+            if isinstance(result, Exception):
+                print(f"  fetch failed: {result!r}")
+                continue
+            for song in result:
+                songs.setdefault(track_key(song), song)
+        idle = idle + 1 if len(songs) == before else 0
+        print(f"  crawled {len(songs)} tracks after {fetches} listings")
+    return list(songs.values())[:target]
+
+
+async def _validate(
+    songs: list[dict[str, Any]],
+    concurrency: int,
+    store: LyricsStore,
+) -> list[tuple[dict[str, Any], str]]:
+    client = get_client("lyrics")
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def check(song: dict[str, Any]) -> tuple[dict[str, Any], str] | None:
+        async with semaphore:
+            lyrics = await fetch_lyrics(client, song["artist"], song["title"], store=store)
+        if lyrics and LyricsIndex.build(lyrics).passage_count():
+            return song, lyrics
+        return None
+
+    results = await asyncio.gather(*(check(song) for song in songs))
+    return [entry for entry in results if entry is not None]
+
+
+async def _run(args: argparse.Namespace) -> None:
+    started = time.perf_counter()
+    try:
+        print("Crawling providers...")
+        songs = await _crawl(args.tracks, args.max_fetches, args.concurrency, args.patience)
+        print(f"Checking lyrics for {len(songs)} tracks...")
+        store = LyricsStore(args.lyrics_db, memory_entries=args.concurrency * 4)
+        entries = await _validate(songs, args.concurrency, store)
+    finally:
+        await close_clients()
+
+    written = write_catalog(args.output, entries)
+    print(
+        f"Wrote {written} tracks ({len(songs) - written} rejected) to {args.output}: "
+        f"{os.path.getsize(args.output) / 1024:.0f} KiB in {time.perf_counter() - started:.1f}s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--tracks", type=int, default=20000, help="Tracks to crawl.")
+    parser.add_argument("--output", default=SONG_CATALOG_PATH)
+    parser.add_argument(
+        "--lyrics-db",
+        default=LYRICS_DB_PATH,
+        help="Lyrics cache reused across runs (a seed for LYRICS_SEED_DB_PATH too).",
+    )
+    parser.add_argument("--max-fetches", type=int, default=5000, help="Deezer listings to fetch.")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument(
+        "--patience",
+        type=int,
+        default=20,
+        help="Stop crawling after this many fetch rounds without a new track.",
+    )
+    parser.add_argument(
+        "--stub-upstreams",
+        action="store_true",
+        help="Crawl the offline stand-ins from benchmarks.stub_upstreams instead.",
+    )
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    if args.stub_upstreams:
+        from benchmarks.stub_upstreams import StubUpstreams, UpstreamProfile, install
+
+        install(StubUpstreams(UpstreamProfile(latency=0.0, jitter=0.0)))
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""
+Builds a round pack: pre-masked rounds with signed tokens, served by source=pack.
+
+Each round goes through the same pipeline as /game/new (song pick, lyrics,
+passage choice, masking, token signing), so pack rounds are indistinguishable
+from live ones. Tokens are always signed, never round-store IDs, and are checked
+against SECRET_KEY when the pack loads: build with the deployment's key. Run from
+the backend directory:
+    SECRET_KEY=... python -m tools.build_round_pack --rounds 500
+"""
+import argparse
+import asyncio
+import logging
+import os
+import time
+from collections import Counter
+
+from fastapi import HTTPException
+
+from app.api.v1.endpoints import game
+from app.core.config import REQUEST_DEADLINE, ROUND_PACK_PATH
+from app.core.deadline import Deadline
+from app.core.http import close_clients, get_client
+from app.core.recent_tracks import track_key
+from app.core.round_pack import PackEntry, write_round_pack
+
+
+async def _build_group(
+    mode: str,
+    difficulty: str,
+    rounds: int,
+    concurrency: int,
+) -> list[PackEntry]:
+    """
+    Builds up to `rounds` rounds of one mode and difficulty, one per song. Songs
+    already in the group are rebuilt in further waves, within `rounds * 3` builds.
+    """
+    client = get_client("lyrics")
+    semaphore = asyncio.Semaphore(concurrency)
+    failures = Counter()
+    # A group-wide session steers the picker away from songs the group already has.
+    session_id = f"pack-{mode}-{difficulty}"
+
+    async def build() -> PackEntry | None:
+        async with semaphore:
+            try:
+                return await game._build_round_entry(
+                    client,
+                    mode=mode,
+                    difficulty=difficulty,
+                    deadline=Deadline(REQUEST_DEADLINE),
+                    session_id=session_id,
+                )
+            except HTTPException as exc:
+                failures[exc.detail] += 1
+                return None
+
+    entries: dict[str, PackEntry] = {}
+    attempts = 0
+    max_attempts = rounds * 3
+    while len(entries) < rounds and attempts < max_attempts:
+        wave = min(rounds - len(entries), max_attempts - attempts)
+        attempts += wave
+        for entry in await asyncio.gather(*(build() for _ in range(wave))):
+            if entry is None:
+                continue
+            key = track_key(entry[1])
+            if key in entries:
+                failures["duplicate song"] += 1
+            else:
+                entries[key] = entry
+    print(f"  {mode}/{difficulty}: {len(entries)} rounds, failures {dict(failures) or 'none'}")
+    return list(entries.values())
+
+
+async def _run(args: argparse.Namespace) -> None:
+    started = time.perf_counter()
+    entries: list[PackEntry] = []
+    try:
+        for mode in args.modes:
+            for difficulty in args.difficulties:
+                entries.extend(await _build_group(mode, difficulty, args.rounds, args.concurrency))
+    finally:
+        await close_clients()
+
+    written = write_round_pack(args.output, entries)
+    print(
+        f"Wrote {written} rounds to {args.output}: "
+        f"{os.path.getsize(args.output) / 1024:.0f} KiB in {time.perf_counter() - started:.1f}s"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rounds", type=int, default=200, help="Rounds per mode and difficulty.")
+    parser.add_argument("--output", default=ROUND_PACK_PATH)
+    parser.add_argument(
+        "--modes",
+        nargs="+",
+        choices=("artist", "track", "lyrics"),
+        default=["artist", "track", "lyrics"],
+    )
+    parser.add_argument(
+        "--difficulties",
+        nargs="+",
+        choices=("easy", "hard"),
+        default=["easy", "hard"],
+    )
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument(
+        "--stub-upstreams",
+        action="store_true",
+        help="Build from the offline stand-ins from benchmarks.stub_upstreams instead.",
+    )
+    args = parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+    # Pack tokens must be self-contained: round-store IDs only exist in this process.
+    game.round_store = None
+    if args.stub_upstreams:
+        from benchmarks.stub_upstreams import StubUpstreams, UpstreamProfile, install
+
+        install(StubUpstreams(UpstreamProfile(latency=0.0, jitter=0.0)))
+    asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()